@@ -0,0 +1,767 @@
+"""In-process engine to bake the template, without spawning cookiecutter or cruft.
+
+The engine keeps the parsed ``cookiecutter.json`` and the Jinja environment loaded between bakes,
+so the templates are compiled only once and re-baking takes milliseconds. It is used by the
+``watch`` task and by the test-suite.
+
+The compiled templates are also kept on disk by `ContentBytecodeCache`, keyed on their source, so
+a new process, like a CI job or a test session, does not compile them again.
+
+``watch`` re-bakes incrementally: only the files whose template, or whose context variables,
+changed are rendered again, and only those whose content changed are rewritten. The other files
+keep their modification time, so the caches of mypy, ruff and pytest in the project stay valid.
+
+Execute 'python bake_engine.py --help' for guidance on using it from the command line.
+"""
+
+import argparse
+import copy
+import hashlib
+import io
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+from collections.abc import Iterable, Iterator
+from contextlib import redirect_stdout, suppress
+from pathlib import Path
+from threading import Event
+from typing import Any
+
+import jinja2
+from binaryornot.check import is_binary
+from cookiecutter.config import get_user_config
+from cookiecutter.environment import StrictEnvironment
+from cookiecutter.exceptions import FailedHookException, OutputDirExistsException
+from cookiecutter.generate import apply_overwrites_to_context, generate_context, is_copy_only_path
+from cookiecutter.prompt import prompt_for_config
+from cookiecutter.replay import dump, load
+from cookiecutter.utils import work_in
+from jinja2 import Environment, FileSystemLoader, Template, nodes
+from jinja2.bccache import Bucket, BytecodeCache
+
+logger = logging.getLogger(__name__)
+
+ROOT_DIR = Path(__file__).parent
+CACHE_DIR = (
+    Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache"))
+    / "cookiecutter-pypackage-poet"
+    / "jinja"
+)
+CACHE_SIZE = 32 * 1024 * 1024
+
+# Context variables that change how every file is rendered
+GLOBAL_VARIABLES = {"_copy_without_render", "_new_lines"}
+
+
+class ContentBytecodeCache(BytecodeCache):
+    """Jinja bytecode cache on disk, keyed on the source of the templates.
+
+    Jinja's own file cache is keyed on the path of the template, so it is not shared between
+    checkouts, or temporary copies, of the template. Here the key is a hash of the template
+    source, its name, the Jinja and Python versions, and the syntax options of the environment, so
+    an entry is valid wherever the same template is compiled. Entries are written atomically, so
+    several processes can share the directory, and the least recently used are evicted when the
+    cache grows over ``max_size``.
+
+    Parameters
+    ----------
+    directory : Path
+        Directory of the cache entries, created when the first entry is written.
+    max_size : int
+        Maximum size of the cache, in bytes.
+    """
+
+    def __init__(self, directory: Path = CACHE_DIR, max_size: int = CACHE_SIZE) -> None:
+        self.directory = directory
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+    def stats(self) -> dict[str, int]:
+        """Return the usage counters of the cache."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "evictions": self.evictions,
+        }
+
+    def usage(self) -> tuple[int, int]:
+        """Return the number of entries of the cache, and their total size in bytes."""
+        entries = self._entries()
+        return len(entries), sum(size for _, size, _ in entries)
+
+    @staticmethod
+    def cache_key(environment: Environment, name: str, source: str) -> str:
+        """Return the key of the compiled ``source``, as ``environment`` compiles it."""
+        options = (
+            sorted(environment.extensions),
+            environment.block_start_string,
+            environment.block_end_string,
+            environment.variable_start_string,
+            environment.variable_end_string,
+            environment.comment_start_string,
+            environment.comment_end_string,
+            environment.line_statement_prefix,
+            environment.line_comment_prefix,
+            environment.trim_blocks,
+            environment.lstrip_blocks,
+            environment.newline_sequence,
+            environment.keep_trailing_newline,
+            environment.optimized,
+        )
+        key = hashlib.sha256(
+            f"{jinja2.__version__}\0{sys.implementation.cache_tag}\0{options}\0{name}\0".encode()
+        )
+        key.update(source.encode("utf-8"))
+        return key.hexdigest()
+
+    def get_bucket(
+        self, environment: Environment, name: str, filename: str | None, source: str
+    ) -> Bucket:
+        """Return the cache bucket of a template, loaded from disk if it is cached."""
+        bucket = Bucket(
+            environment,
+            self.cache_key(environment, name, source),
+            self.get_source_checksum(source),
+        )
+        self.load_bytecode(bucket)
+        return bucket
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.cache"
+
+    def load_bytecode(self, bucket: Bucket) -> None:
+        """Load the bytecode of the bucket, counting it as a hit or a miss."""
+        path = self._path(bucket.key)
+        with suppress(FileNotFoundError), Path.open(path, "rb") as f:
+            bucket.load_bytecode(f)
+        if bucket.code is None:
+            self.misses += 1
+            return
+        self.hits += 1
+        # The modification time orders the entries for eviction
+        with suppress(FileNotFoundError):
+            os.utime(path)
+
+    def dump_bytecode(self, bucket: Bucket) -> None:
+        """Write the bytecode of the bucket, evicting old entries if the cache is too large."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(bucket.key)
+        partial = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with Path.open(partial, "wb") as f:
+            bucket.write_bytecode(f)
+        partial.replace(path)
+        self.writes += 1
+        self.evict()
+
+    def _entries(self) -> list[tuple[int, int, Path]]:
+        """Return the modification time, size and path of every entry, oldest first."""
+        entries = []
+        for path in self.directory.glob("*.cache"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+        return sorted(entries)
+
+    def evict(self) -> None:
+        """Remove the least recently used entries until the cache fits in ``max_size``."""
+        entries = self._entries()
+        size = sum(entry_size for _, entry_size, _ in entries)
+        for _, entry_size, path in entries:
+            if size <= self.max_size:
+                break
+            path.unlink(missing_ok=True)
+            size -= entry_size
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """Remove every entry of the cache."""
+        for _, _, path in self._entries():
+            path.unlink(missing_ok=True)
+
+
+class ProjectState:
+    """What the engine knows about a project it baked, to re-bake it incrementally.
+
+    Parameters
+    ----------
+    values : dict
+        Values of the ``cookiecutter`` context of the bake.
+    sources : dict[str, int]
+        Modification time of every file of the template, relative to the template directory.
+    outputs : dict[str, str]
+        Path of the output of every file of the project template, relative to the project.
+    generated : set[str]
+        Files of the project after the hooks ran, relative to the project.
+    """
+
+    def __init__(
+        self,
+        values: dict[str, Any],
+        sources: dict[str, int],
+        outputs: dict[str, str],
+        generated: set[str],
+    ) -> None:
+        self.values = values
+        self.sources = sources
+        self.outputs = outputs
+        self.generated = generated
+
+
+class BakeEngine:
+    """Bake a cookiecutter template in-process, reusing everything that does not change.
+
+    ``cookiecutter.json`` is parsed, and the Jinja environment created, only when the file
+    changes. The environment caches the compiled templates, and reloads those whose source
+    changed, so a bake only renders. The hooks are rendered and executed in-process too, so only
+    Python hooks are supported.
+
+    Parameters
+    ----------
+    template_dir : Path
+        Root directory of the cookiecutter template.
+    bytecode_cache : BytecodeCache, optional
+        Cache of the compiled templates shared with other processes, e.g. a
+        `ContentBytecodeCache`.
+    """
+
+    def __init__(
+        self, template_dir: Path = ROOT_DIR, bytecode_cache: BytecodeCache | None = None
+    ) -> None:
+        self.template_dir = template_dir.resolve()
+        self.context_file = self.template_dir / "cookiecutter.json"
+        self.project_template = next(
+            path
+            for path in sorted(self.template_dir.iterdir())
+            if path.is_dir() and "cookiecutter" in path.name and "{{" in path.name
+        )
+        # Templates included by the files of the project template, as cookiecutter finds them
+        self.templates_dir = self.template_dir / "templates"
+        self.bytecode_cache = bytecode_cache
+        self.bakes = 0
+        self.last_context: dict[str, Any] = {}
+        self._context_mtime: int | None = None
+        self._defaults: dict[str, Any] = {}
+        self._env = StrictEnvironment(keep_trailing_newline=True)
+        self._strings: dict[str, Template] = {}
+        self._dependencies: dict[str, frozenset[str] | None] = {}
+        self._projects: dict[Path, ProjectState] = {}
+
+    @property
+    def template_name(self) -> str:
+        """Name of the template, as used by cookiecutter for the replay files."""
+        return self.template_dir.name
+
+    def _load(self) -> None:
+        """Parse ``cookiecutter.json`` and create the Jinja environment, if the file changed."""
+        mtime = self.context_file.stat().st_mtime_ns
+        if mtime == self._context_mtime:
+            return
+        self._defaults = generate_context(context_file=str(self.context_file))
+        self._env = StrictEnvironment(
+            context=self._defaults,
+            keep_trailing_newline=True,
+            bytecode_cache=self.bytecode_cache,
+        )
+        self._env.loader = FileSystemLoader([str(self.project_template), str(self.templates_dir)])
+        self._strings = {}
+        self._context_mtime = mtime
+
+    def _render_string(self, source: str, context: dict[str, Any]) -> str:
+        if source not in self._strings:
+            self._strings[source] = self._env.from_string(source)
+        return self._strings[source].render(**context)
+
+    def context(self, extra_context: dict[str, Any] | None = None) -> dict[str, Any]:
+        """Return the context of a bake, as cookiecutter builds it without prompting."""
+        self._load()
+        context = copy.deepcopy(self._defaults)
+        if extra_context:
+            apply_overwrites_to_context(context["cookiecutter"], extra_context)
+        context["cookiecutter"] = prompt_for_config(context, no_input=True)
+        context["cookiecutter"]["_template"] = str(self.template_dir)
+        context["cookiecutter"]["_repo_dir"] = str(self.template_dir)
+        return context
+
+    def template_files(self, context: dict[str, Any]) -> Iterator[tuple[str, bool]]:
+        """Yield the path of every file of the project template, relative to it.
+
+        Each path comes with whether it must be copied without rendering, either because it, or
+        any of its parent directories, matches ``_copy_without_render``.
+        """
+        for root, dirs, files in os.walk(self.project_template):
+            dirs.sort()
+            relative_root = Path(root).relative_to(self.project_template)
+            copy_only_dir = any(
+                is_copy_only_path(str(parent), context)
+                for parent in [relative_root, *relative_root.parents]
+                if parent != Path()
+            )
+            for name in sorted(files):
+                path = (relative_root / name).as_posix()
+                yield path, copy_only_dir or is_copy_only_path(path, context)
+
+    def render_bytes(self, path: str, copy_only: bool, context: dict[str, Any]) -> bytes:
+        """Return the content of a file of the project template, rendered unless ``copy_only``."""
+        infile = self.project_template / path
+        if copy_only or is_binary(str(infile)):
+            return infile.read_bytes()
+        rendered = self._env.get_template(path).render(**context)
+        newline = context["cookiecutter"].get("_new_lines")
+        if not newline:
+            with Path.open(infile, encoding="utf-8") as f:
+                f.readline()
+            newline = f.newlines[0] if isinstance(f.newlines, tuple) else f.newlines
+        return rendered.replace("\n", newline or os.linesep).encode("utf-8")
+
+    def outputs(self, context: dict[str, Any]) -> dict[str, str]:
+        """Return the path of the output of every file of the project template.
+
+        Returns
+        -------
+        dict[str, str]
+            Path of the output, relative to the project, by path of the file, relative to the
+            project template. The outputs may have been removed by the hooks.
+        """
+        return {
+            path: self._render_string(path, context) for path, _ in self.template_files(context)
+        }
+
+    def render_outputs(
+        self, paths: Iterable[str], extra_contexts: Iterable[dict[str, Any] | None]
+    ) -> list[dict[str, str]]:
+        """Render a few files of the project for many contexts, without baking the projects.
+
+        Only the named files are rendered, in memory, and the hooks are not executed: the files
+        that the hooks remove are rendered all the same. This is meant for the tests that only
+        check the content of a few files, which then take milliseconds per context.
+
+        Parameters
+        ----------
+        paths : Iterable[str]
+            Paths of the outputs to render, relative to the project, e.g. ``pyproject.toml``.
+        extra_contexts : Iterable[dict or None]
+            Values that override the defaults of ``cookiecutter.json``, for every context.
+
+        Returns
+        -------
+        list[dict[str, str]]
+            Rendered content by path of the output, for every context.
+
+        Raises
+        ------
+        ValueError
+            If no file of the project template is rendered to one of the paths.
+        """
+        paths = list(paths)
+        rendered = []
+        for extra_context in extra_contexts:
+            context = self.context(extra_context)
+            sources = {
+                self._render_string(path, context): (path, copy_only)
+                for path, copy_only in self.template_files(context)
+            }
+            if missing := [path for path in paths if path not in sources]:
+                msg = f"No file of the project template is rendered to {', '.join(missing)}"
+                raise ValueError(msg)
+            rendered.append(
+                {path: self.render_bytes(*sources[path], context).decode("utf-8") for path in paths}
+            )
+        return rendered
+
+    def render_file(
+        self, path: str, copy_only: bool, project_dir: Path, context: dict[str, Any]
+    ) -> Path | None:
+        """Render, or copy, a file of the project template into the project.
+
+        Returns
+        -------
+        Path or None
+            Path of the output file, or None if its rendered name is empty.
+        """
+        outfile = project_dir / self._render_string(path, context)
+        if outfile.is_dir():
+            return None
+        outfile.parent.mkdir(parents=True, exist_ok=True)
+        outfile.write_bytes(self.render_bytes(path, copy_only, context))
+        shutil.copymode(self.project_template / path, outfile)
+        return outfile
+
+    def dependencies(self, source: str) -> frozenset[str] | None:
+        """Return the ``cookiecutter`` variables used by a template.
+
+        Returns
+        -------
+        frozenset[str] or None
+            Names of the variables, or None if the template may use any of them, e.g. because it
+            includes other templates or passes the whole ``cookiecutter`` object around.
+        """
+        if source not in self._dependencies:
+            self._dependencies[source] = self._find_dependencies(source)
+        return self._dependencies[source]
+
+    def _find_dependencies(self, source: str) -> frozenset[str] | None:
+        ast = self._env.parse(source)
+        if any(ast.find_all((nodes.Include, nodes.Import, nodes.FromImport, nodes.Extends))):
+            return None
+        variables = set()
+        lookups = 0
+        for node in ast.find_all((nodes.Getattr, nodes.Getitem)):
+            if not (isinstance(node.node, nodes.Name) and node.node.name == "cookiecutter"):
+                continue
+            if isinstance(node, nodes.Getattr):
+                variables.add(node.attr)
+            elif isinstance(node.arg, nodes.Const):
+                variables.add(node.arg.value)
+            else:
+                continue
+            lookups += 1
+        # Any other use of ``cookiecutter`` may access any variable
+        names = sum(node.name == "cookiecutter" for node in ast.find_all(nodes.Name))
+        return frozenset(variables) if names == lookups else None
+
+    def _read(self, path: str) -> str:
+        """Return the text of a file of the template, or an empty string if it is binary."""
+        try:
+            return (self.template_dir / path).read_text(encoding="utf-8")
+        except UnicodeDecodeError:
+            return ""
+
+    def _sources(self) -> dict[str, int]:
+        """Return the modification time of the files of the project template, hooks and includes."""
+        sources = {}
+        for root in (self.project_template, self.template_dir / "hooks", self.templates_dir):
+            for dirpath, _, files in os.walk(root):
+                for name in files:
+                    path = Path(dirpath) / name
+                    sources[path.relative_to(self.template_dir).as_posix()] = (
+                        path.stat().st_mtime_ns
+                    )
+        return sources
+
+    def run_hook(self, hook: str, project_dir: Path, context: dict[str, Any]) -> None:
+        """Render and execute a Python hook from inside the project directory."""
+        script = self.template_dir / "hooks" / f"{hook}.py"
+        if not script.exists():
+            return
+        code = compile(
+            self._render_string(script.read_text(encoding="utf-8"), context), script, "exec"
+        )
+        output = io.StringIO()
+        try:
+            with work_in(project_dir), redirect_stdout(output):
+                # The hooks of the template are run as cookiecutter runs them, in-process instead
+                # of in a subprocess
+                exec(code, {"__name__": "__main__", "__file__": str(script)})  # noqa: S102
+        except SystemExit as e:
+            if e.code not in (None, 0):
+                msg = f"Hook script failed ({hook}): {output.getvalue().strip()}"
+                raise FailedHookException(msg) from e
+
+    def bake(
+        self,
+        extra_context: dict[str, Any] | None = None,
+        output_dir: Path | None = None,
+        overwrite: bool = False,
+        accept_hooks: bool = True,
+    ) -> Path:
+        """Bake the template, returning the path of the project.
+
+        Parameters
+        ----------
+        extra_context : dict, optional
+            Values that override the defaults of ``cookiecutter.json``.
+        output_dir : Path, optional
+            Directory where the project is baked, the current one by default.
+        overwrite : bool
+            Replace the project if it already exists, instead of failing.
+        accept_hooks : bool
+            Run the pre and post generation hooks.
+
+        Returns
+        -------
+        Path
+            Directory of the baked project.
+        """
+        context = self.context(extra_context)
+        output_dir = (output_dir or Path.cwd()).resolve()
+        context["cookiecutter"]["_output_dir"] = str(output_dir)
+        project_dir = output_dir / self._render_string(self.project_template.name, context)
+
+        if project_dir.exists():
+            if not overwrite:
+                msg = f'Error: "{project_dir}" directory already exists'
+                raise OutputDirExistsException(msg)
+            shutil.rmtree(project_dir)
+        project_dir.mkdir(parents=True)
+        self._generate(context, project_dir, accept_hooks)
+        return project_dir
+
+    def _generate(self, context: dict[str, Any], project_dir: Path, accept_hooks: bool) -> None:
+        try:
+            if accept_hooks:
+                self.run_hook("pre_gen_project", project_dir, context)
+            for path, copy_only in self.template_files(context):
+                self.render_file(path, copy_only, project_dir, context)
+            if accept_hooks:
+                self.run_hook("post_gen_project", project_dir, context)
+        except Exception:
+            shutil.rmtree(project_dir, ignore_errors=True)
+            raise
+        self.bakes += 1
+        self.last_context = context
+
+    def rebake(
+        self, extra_context: dict[str, Any] | None = None, output_dir: Path | None = None
+    ) -> tuple[Path, list[Path]]:
+        """Bake the template over a project, rewriting only the files whose content changed.
+
+        The first time a project is re-baked, or when a hook, an included template, a file name,
+        or a variable used by them changes, the whole template is baked in a temporary directory
+        and synchronized with the project. Otherwise, only the files whose template changed, or
+        that use a variable that changed, are rendered. Files that are not part of the template,
+        like caches or virtual environments, are never touched.
+
+        Parameters
+        ----------
+        extra_context : dict, optional
+            Values that override the defaults of ``cookiecutter.json``.
+        output_dir : Path, optional
+            Directory where the project is baked, the current one by default.
+
+        Returns
+        -------
+        tuple[Path, list[Path]]
+            Directory of the project, and the files that were written or removed.
+        """
+        context = self.context(extra_context)
+        output_dir = (output_dir or Path.cwd()).resolve()
+        context["cookiecutter"]["_output_dir"] = str(output_dir)
+        project_dir = output_dir / self._render_string(self.project_template.name, context)
+        values = context["cookiecutter"]
+        sources = self._sources()
+
+        state = self._projects.get(project_dir)
+        if state is None or not project_dir.exists():
+            return project_dir, self._sync(context, project_dir, sources, state)
+
+        changed_values = {
+            name
+            for name in values.keys() | state.values.keys()
+            if values.get(name) != state.values.get(name)
+        }
+        changed_sources = {
+            path
+            for path in sources.keys() | state.sources.keys()
+            if sources.get(path) != state.sources.get(path)
+        }
+
+        def affected(source: str) -> bool:
+            dependencies = self.dependencies(source)
+            return dependencies is None or bool(dependencies & changed_values)
+
+        prefix = f"{self.project_template.name}/"
+        hooks = [path for path in sources if not path.startswith(prefix)]
+        if (
+            changed_values & GLOBAL_VARIABLES
+            or sources.keys() != state.sources.keys()
+            or any(path in changed_sources or affected(self._read(path)) for path in hooks)
+            or any(affected(path) for path in state.outputs)
+        ):
+            return project_dir, self._sync(context, project_dir, sources, state)
+
+        written = []
+        for path, copy_only in self.template_files(context):
+            output = state.outputs[path]
+            # Skip the files removed by the hooks, and those that cannot have changed
+            if output not in state.generated:
+                continue
+            if prefix + path not in changed_sources and (
+                copy_only or not affected(self._read(prefix + path))
+            ):
+                continue
+            content = self.render_bytes(path, copy_only, context)
+            if _write_if_changed(project_dir / output, content, self.project_template / path):
+                written.append(project_dir / output)
+
+        state.values = values
+        state.sources = sources
+        self.bakes += 1
+        self.last_context = context
+        return project_dir, written
+
+    def _sync(
+        self,
+        context: dict[str, Any],
+        project_dir: Path,
+        sources: dict[str, int],
+        state: ProjectState | None,
+    ) -> list[Path]:
+        """Bake the whole template in a temporary directory, and copy what changed."""
+        written = []
+        with tempfile.TemporaryDirectory(prefix="bake-") as tmp:
+            fresh_dir = Path(tmp) / project_dir.name
+            fresh_dir.mkdir()
+            self._generate(context, fresh_dir, accept_hooks=True)
+            generated = set()
+            for path in sorted(fresh_dir.rglob("*")):
+                output = path.relative_to(fresh_dir).as_posix()
+                if path.is_dir():
+                    (project_dir / output).mkdir(parents=True, exist_ok=True)
+                elif _write_if_changed(project_dir / output, path.read_bytes(), path):
+                    written.append(project_dir / output)
+                generated.add(output)
+
+        for output in sorted((state.generated if state else set()) - generated, reverse=True):
+            path = project_dir / output
+            if path.is_dir():
+                if not any(path.iterdir()):
+                    path.rmdir()
+            elif path.exists():
+                path.unlink()
+                written.append(path)
+
+        self._projects[project_dir] = ProjectState(
+            context["cookiecutter"], sources, self.outputs(context), generated
+        )
+        return written
+
+    def replay_context(self) -> dict[str, Any]:
+        """Return the values of the last bake of the template, to use as ``extra_context``."""
+        context = load(get_user_config()["replay_dir"], self.template_name)
+        return {k: v for k, v in context["cookiecutter"].items() if not k.startswith("_")}
+
+
+def watch(engine: BakeEngine, extra_context: dict[str, Any], output_dir: Path) -> None:
+    """Bake the template, and bake it again every time it changes, until interrupted."""
+    # watchdog is a development dependency, only needed by ``--watch``, not by the tests
+    from watchdog.events import FileSystemEvent, FileSystemEventHandler  # noqa: PLC0415
+    from watchdog.observers import Observer  # noqa: PLC0415
+
+    changed = Event()
+
+    class Handler(FileSystemEventHandler):
+        def on_any_event(self, event: FileSystemEvent) -> None:
+            changed.set()
+
+    class ContextFileHandler(FileSystemEventHandler):
+        def on_any_event(self, event: FileSystemEvent) -> None:
+            if Path(os.fsdecode(event.src_path)).name == engine.context_file.name:
+                changed.set()
+
+    observer = Observer()
+    observer.schedule(Handler(), str(engine.project_template), recursive=True)
+    observer.schedule(Handler(), str(engine.template_dir / "hooks"), recursive=True)
+    if engine.templates_dir.is_dir():
+        observer.schedule(Handler(), str(engine.templates_dir), recursive=True)
+    observer.schedule(ContextFileHandler(), str(engine.template_dir), recursive=False)
+    observer.start()
+    changed.set()
+    try:
+        while True:
+            if changed.wait(timeout=1):
+                # Let a burst of events, like an editor saving a file, settle
+                time.sleep(0.1)
+                changed.clear()
+                _timed_bake(engine, extra_context, output_dir, incremental=True)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        observer.stop()
+        observer.join()
+
+
+def _write_if_changed(path: Path, content: bytes, mode_source: Path) -> bool:
+    """Write a file, unless it already has the given content, returning whether it was written."""
+    if path.is_file() and path.read_bytes() == content:
+        if path.stat().st_mode != mode_source.stat().st_mode:
+            shutil.copymode(mode_source, path)
+        return False
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+    shutil.copymode(mode_source, path)
+    return True
+
+
+def _timed_bake(
+    engine: BakeEngine, extra_context: dict[str, Any], output_dir: Path, incremental: bool = False
+) -> bool:
+    start = time.perf_counter()
+    try:
+        if incremental:
+            project_dir, written = engine.rebake(extra_context, output_dir)
+        else:
+            project_dir = engine.bake(extra_context, output_dir, overwrite=True)
+    except Exception:
+        logger.exception("Bake failed")
+        return False
+    elapsed = (time.perf_counter() - start) * 1000
+    if incremental:
+        logger.info("Re-baked %s in %.0f ms, %d files changed", project_dir, elapsed, len(written))
+        for path in written:
+            logger.info("  %s", path.relative_to(project_dir))
+    else:
+        logger.info("Baked %s in %.0f ms", project_dir, elapsed)
+    # Keep the replay file up to date, as cookiecutter does
+    dump(get_user_config()["replay_dir"], engine.template_name, engine.last_context)
+    return True
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Bake the template from the command line."""
+    parser = argparse.ArgumentParser(description="Bake the template in-process.")
+    parser.add_argument(
+        "--output-dir", type=Path, default=Path.cwd(), help="Where to bake the project"
+    )
+    parser.add_argument(
+        "--replay", action="store_true", help="Use the values of the last bake of the template"
+    )
+    parser.add_argument(
+        "--watch", action="store_true", help="Bake the project again when the template changes"
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=CACHE_DIR,
+        help=f"Directory of the cache of compiled templates (default: {CACHE_DIR})",
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true", help="Compile the templates without the cache"
+    )
+    parser.add_argument(
+        "--cache-stats", action="store_true", help="Report the usage of the cache after baking"
+    )
+    args = parser.parse_args(argv)
+
+    cache = None if args.no_cache else ContentBytecodeCache(args.cache_dir)
+    engine = BakeEngine(bytecode_cache=cache)
+    extra_context = engine.replay_context() if args.replay else {}
+    output_dir = args.output_dir.resolve()
+    if args.watch:
+        watch(engine, extra_context, output_dir)
+        return 0
+    success = _timed_bake(engine, extra_context, output_dir)
+    if cache is not None and args.cache_stats:
+        entries, size = cache.usage()
+        stats = ", ".join(f"{k}: {v}" for k, v in cache.stats().items())
+        logger.info(
+            "Bytecode cache %s: %s, %d entries, %.1f kB",
+            cache.directory,
+            stats,
+            entries,
+            size / 1024,
+        )
+    return 0 if success else 1
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    sys.exit(main())
@@ -0,0 +1,305 @@
+"""Benchmark how long it takes to bake the template and to start working on the baked project.
+
+Every representative context is timed phase by phase:
+
+- ``render``: rendering the template files, without hooks.
+- ``hooks``: running the pre and post generation hooks on the rendered project.
+- ``install``: first ``poetry install`` of the baked project, in a new virtual environment.
+- ``test``: first ``poetry run pytest`` of the baked project.
+- ``lint``: first ``poetry run invoke lint`` of the baked project.
+
+The results are compared with the baseline of this machine in ``baseline.json``, and the run
+fails when any phase is slower than the baseline by more than the given threshold. The timings
+depend on the machine, so the baseline is not committed: the first run of every phase and context
+is stored as its baseline. The results are also appended to a local JSON history file.
+
+Execute 'python benchmarks/bake_benchmark.py --help' for the available options.
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from cookiecutter.generate import generate_context, generate_files
+from cookiecutter.hooks import run_hook
+from cookiecutter.prompt import prompt_for_config
+from cookiecutter.utils import work_in
+
+logger = logging.getLogger(__name__)
+
+ROOT_DIR = Path(__file__).parents[1]
+BASELINE_FILE = Path(__file__).parent.joinpath("baseline.json")
+HISTORY_FILE = Path(__file__).parent.joinpath("history.json")
+
+PHASES = ["render", "hooks", "install", "test", "lint"]
+# Phases that only depend on the template, and not on the package index or the installed tools
+RENDER_PHASES = ["render", "hooks"]
+# Regressions smaller than this are considered noise, whatever the threshold
+NOISE_FLOOR = 0.05
+
+CONTEXTS: dict[str, dict[str, str]] = {
+    "default": {},
+    "minimal": {
+        "use_pytest": "n",
+        "formatter": "No",
+        "docs": "No",
+        "command_line_interface": "No command-line interface",
+        "with_pydantic_typing": "n",
+    },
+    "full": {
+        "formatter": "Ruff-format",
+        "development_environment": "strict",
+        "command_line_interface": "Typer",
+        "with_jupyter_lab": "y",
+    },
+}
+
+
+def _timed(function: Callable[[], Any]) -> float:
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+@contextmanager
+def _stdout_silenced() -> Iterator[None]:
+    # The hooks are run as subprocesses writing to the inherited stdout file descriptor
+    sys.stdout.flush()
+    saved = os.dup(1)
+    try:
+        with Path.open(Path(os.devnull), "w") as devnull:
+            os.dup2(devnull.fileno(), 1)
+            yield
+    finally:
+        os.dup2(saved, 1)
+        os.close(saved)
+
+
+def _run_in_project(project_dir: Path, command: list[str]) -> None:
+    # Keep the virtual environment inside the project, so it is removed together with it
+    env = {**os.environ, "POETRY_VIRTUALENVS_IN_PROJECT": "true"}
+    env.pop("VIRTUAL_ENV", None)
+    result = subprocess.run(  # noqa: S603
+        command, cwd=project_dir, env=env, capture_output=True, text=True, check=False
+    )
+    if result.returncode != 0:
+        msg = f"'{' '.join(command)}' failed in {project_dir}:\n{result.stdout}{result.stderr}"
+        raise RuntimeError(msg)
+
+
+def bake_phases(
+    extra_context: dict[str, str], output_dir: Path, phases: list[str]
+) -> dict[str, float]:
+    """Bake the template with the given context, returning the duration of each phase.
+
+    Parameters
+    ----------
+    extra_context : dict[str, str]
+        Values that override the defaults of ``cookiecutter.json``.
+    output_dir : Path
+        Directory where the project is baked.
+    phases : list[str]
+        Phases to time, ``render`` and ``hooks`` always run.
+
+    Returns
+    -------
+    dict[str, float]
+        Duration in seconds of each phase.
+    """
+    context = generate_context(
+        context_file=str(ROOT_DIR / "cookiecutter.json"), extra_context=extra_context
+    )
+    context["cookiecutter"] = prompt_for_config(context, no_input=True)
+
+    timings = {}
+    start = time.perf_counter()
+    project_dir = Path(
+        generate_files(
+            repo_dir=str(ROOT_DIR), context=context, output_dir=str(output_dir), accept_hooks=False
+        )
+    )
+    timings["render"] = time.perf_counter() - start
+
+    def hooks() -> None:
+        with work_in(ROOT_DIR), _stdout_silenced():
+            run_hook("pre_gen_project", str(project_dir), context)
+            run_hook("post_gen_project", str(project_dir), context)
+
+    timings["hooks"] = _timed(hooks)
+
+    commands = {
+        "install": ["poetry", "install", "--no-interaction"],
+        "test": ["poetry", "run", "pytest"],
+        "lint": ["poetry", "run", "invoke", "lint"],
+    }
+    for phase, command in commands.items():
+        if phase in phases:
+            timings[phase] = _timed(lambda command=command: _run_in_project(project_dir, command))
+    return timings
+
+
+def run_benchmark(
+    contexts: dict[str, dict[str, str]], phases: list[str], repeat: int
+) -> dict[str, dict[str, float]]:
+    """Time every context, keeping the fastest of ``repeat`` bakes for each phase."""
+    results = {}
+    for name, extra_context in contexts.items():
+        best: dict[str, float] = {}
+        for _ in range(repeat):
+            with tempfile.TemporaryDirectory(prefix="bake-benchmark-") as output_dir:
+                timings = bake_phases(extra_context, Path(output_dir), phases)
+            for phase, duration in timings.items():
+                best[phase] = min(duration, best.get(phase, duration))
+        results[name] = best
+        logger.info("%s: %s", name, ", ".join(f"{p} {d:.3f}s" for p, d in best.items()))
+    return results
+
+
+def find_regressions(
+    results: dict[str, dict[str, float]], baseline: dict[str, dict[str, float]], threshold: float
+) -> list[str]:
+    """Return a description of every phase slower than the baseline by more than ``threshold``.
+
+    Parameters
+    ----------
+    results : dict[str, dict[str, float]]
+        Duration of each phase of each context, as returned by `run_benchmark`.
+    baseline : dict[str, dict[str, float]]
+        Reference durations, with the same structure as ``results``.
+    threshold : float
+        Maximum relative slowdown allowed, e.g. 0.2 for 20%.
+
+    Returns
+    -------
+    list[str]
+        Regressions found, empty if there are none.
+    """
+    regressions = []
+    for name, timings in results.items():
+        for phase, duration in timings.items():
+            reference = baseline.get(name, {}).get(phase)
+            if reference is None:
+                continue
+            if duration > reference * (1 + threshold) and duration - reference > NOISE_FLOOR:
+                regressions.append(
+                    f"{name}/{phase}: {duration:.3f}s vs {reference:.3f}s "
+                    f"(+{(duration / reference - 1):.0%})"
+                )
+    return regressions
+
+
+def load_baseline(baseline_file: Path) -> dict[str, Any]:
+    """Return the baseline of this machine, or an empty one if the file does not exist."""
+    if not baseline_file.exists():
+        return {"results": {}}
+    return json.loads(baseline_file.read_text(encoding="utf-8"))
+
+
+def save_baseline(
+    baseline_file: Path, run: dict[str, Any], results: dict[str, dict[str, float]]
+) -> None:
+    """Store ``results`` as the baseline, with the date, Python and platform of ``run``."""
+    baseline = {**run, "results": results}
+    baseline_file.write_text(json.dumps(baseline, indent=2) + "\n", encoding="utf-8")
+
+
+def load_history(history_file: Path) -> dict[str, Any]:
+    """Return the stored history, or an empty one if the file does not exist."""
+    if not history_file.exists():
+        return {"runs": []}
+    return json.loads(history_file.read_text(encoding="utf-8"))
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the benchmark, returning 1 if any phase regressed."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--context",
+        action="append",
+        choices=sorted(CONTEXTS),
+        help="Context to benchmark, can be repeated (default: all)",
+    )
+    parser.add_argument(
+        "--render-only",
+        action="store_true",
+        help="Only time the render and hooks phases, without installing the project",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="Bakes per context, the fastest is kept"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Maximum relative slowdown against the baseline (default: 0.2)",
+    )
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="Store the results as the new baseline instead of comparing with it",
+    )
+    parser.add_argument(
+        "--baseline", type=Path, default=BASELINE_FILE, help="JSON baseline file, kept locally"
+    )
+    parser.add_argument(
+        "--history", type=Path, default=HISTORY_FILE, help="JSON history file, kept locally"
+    )
+    args = parser.parse_args(argv)
+
+    contexts = {name: CONTEXTS[name] for name in args.context or CONTEXTS}
+    phases = RENDER_PHASES if args.render_only else PHASES
+    # Installing is not repeated, its duration is dominated by the package index and the cache
+    repeat = args.repeat if args.render_only else 1
+    results = run_benchmark(contexts, phases, repeat)
+
+    run = {
+        "date": datetime.now(tz=timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    history = load_history(args.history)
+    history["runs"].append(run)
+    args.history.write_text(json.dumps(history, indent=2) + "\n", encoding="utf-8")
+
+    baseline = load_baseline(args.baseline)
+    if args.update_baseline:
+        # Keep the reference of the phases and contexts that were not run
+        for name, timings in results.items():
+            baseline["results"].setdefault(name, {}).update(timings)
+        save_baseline(args.baseline, run, baseline["results"])
+        return 0
+
+    regressions = find_regressions(results, baseline["results"], args.threshold)
+    missing = [
+        f"{name}/{phase}"
+        for name, timings in results.items()
+        for phase in timings
+        if phase not in baseline["results"].get(name, {})
+    ]
+    if missing:
+        # The first run of a phase on this machine is its baseline
+        for name, timings in results.items():
+            baseline["results"][name] = {**timings, **baseline["results"].get(name, {})}
+        save_baseline(args.baseline, run, baseline["results"])
+        logger.info("Stored the first run of %s as the baseline", ", ".join(missing))
+
+    for regression in regressions:
+        logger.error("Regression %s", regression)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    sys.exit(main())
@@ -10,8 +10,17 @@ PROJECT_SLUG = "{{ cookiecutter.project_slug }}"
 GITHUB_USER = "{{ cookiecutter.github_username }}"
 create_author_file = "{{ cookiecutter.create_author_file }}"
 command_line_interface = "{{ cookiecutter.command_line_interface|lower }}"
+cli_lazy_imports = "{{ cookiecutter.cli_lazy_imports }}"
 open_source_license = "{{ cookiecutter.open_source_license }}"
 documentation = "{{ cookiecutter.docs|lower }}"
+with_pydantic_typing = "{{ cookiecutter.with_pydantic_typing }}"
+numeric_stack = "{{ cookiecutter.numeric_stack }}"
+with_benchmarks = "{{ cookiecutter.with_benchmarks }}"
+with_instrumentation = "{{ cookiecutter.with_instrumentation }}"
+with_concurrency = "{{ cookiecutter.with_concurrency }}"
+with_streaming = "{{ cookiecutter.with_streaming }}"
+use_pytest = "{{ cookiecutter.use_pytest }}"
+compiled_extensions = "{{ cookiecutter.compiled_extensions|lower }}"
 
 
 def _remove_file(filepath: Path | str):
@@ -81,6 +90,9 @@ if __name__ == "__main__":
         cli_file = Path("src") / PROJECT_SLUG / "cli.py"
         _remove_file(cli_file)
 
+    if "no" in command_line_interface or cli_lazy_imports != "y":
+        _remove_file(Path("tests") / "test_cli_startup.py")
+
     if open_source_license == "Not open source":
         _remove_file("LICENSE")
 
@@ -90,4 +102,39 @@ if __name__ == "__main__":
     if "read" not in documentation:
         _remove_file(".readthedocs.yaml")
 
+    if with_pydantic_typing != "y":
+        _remove_file(Path("src") / PROJECT_SLUG / "models.py")
+        _remove_file(Path("tests") / "test_models.py")
+        _remove_file(Path("benchmarks") / "test_models.py")
+
+    if numeric_stack != "y":
+        _remove_file(Path("src") / PROJECT_SLUG / "numeric.py")
+        _remove_file(Path("tests") / "test_numeric.py")
+        _remove_file(Path("benchmarks") / "test_numeric.py")
+
+    if compiled_extensions == "no":
+        _remove_file("build_extensions.py")
+        _remove_file(Path("src") / PROJECT_SLUG / "speedups.py")
+        _remove_file(Path("tests") / "test_speedups.py")
+        _remove_file(Path("benchmarks") / "test_speedups.py")
+
+    if with_benchmarks != "y":
+        _remove_folder("benchmarks")
+
+    if with_instrumentation != "y":
+        _remove_file(Path("src") / PROJECT_SLUG / "instrumentation.py")
+        _remove_file(Path("tests") / "test_instrumentation.py")
+
+    if with_concurrency != "y":
+        _remove_file(Path("src") / PROJECT_SLUG / "concurrency.py")
+        _remove_file(Path("tests") / "test_concurrency.py")
+
+    if with_streaming != "y":
+        _remove_file(Path("src") / PROJECT_SLUG / "streaming.py")
+        _remove_file(Path("tests") / "test_streaming.py")
+
+    if use_pytest != "y":
+        # The configuration of pytest, which only reports the workers of `invoke test --workers`
+        _remove_file(Path("tests") / "conftest.py")
+
     print_final_instructions(project=PROJECT_NAME, github_user=GITHUB_USER)
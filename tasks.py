@@ -3,8 +3,14 @@
 Execute 'invoke --list' for guidance on using Invoke
 """
 
+import atexit
+import functools
+import os
 import platform
 import shutil
+import subprocess
+import sys
+import time
 import webbrowser
 from pathlib import Path
 
@@ -13,6 +19,8 @@ from invoke.runners import Result
 from invoke.tasks import task
 
 BAKE_OPTIONS = "--no-input"
+# Git ref that `invoke test --changed` compares the working tree against, by default
+BASE_REF = "main"
 
 ROOT_DIR = Path(__file__).parent
 COVERAGE_DIR = ROOT_DIR.joinpath("htmlcov")
@@ -22,11 +30,62 @@ DOCS_BUILD_DIR = DOCS_DIR.joinpath("site")
 DOCS_INDEX = DOCS_BUILD_DIR.joinpath("index.html")
 HOOKS_DIR = ROOT_DIR.joinpath("hooks")
 TEST_DIR = ROOT_DIR.joinpath("tests")
-PYTHON_DIRS = [str(d) for d in [HOOKS_DIR, TEST_DIR]]
+BENCHMARKS_DIR = ROOT_DIR.joinpath("benchmarks")
+BAKE_ENGINE = ROOT_DIR.joinpath("bake_engine.py")
+PYTHON_DIRS = [str(d) for d in [HOOKS_DIR, TEST_DIR, BENCHMARKS_DIR, BAKE_ENGINE]]
+# Commands run from the virtual environment of the project, without `poetry run`
+DIRECT_RUNS: list[str] = []
+
+
+@functools.cache
+def _venv() -> tuple[Path, float] | None:
+    """Return the virtual environment of the project, with the time Poetry took to find it.
+
+    The environment is resolved once per invoke session, so that the commands run the tools it
+    installed directly, instead of starting Poetry with ``poetry run`` for every one of them.
+    Returns None when the project has no environment yet.
+    """
+    if virtual_env := os.environ.get("VIRTUAL_ENV"):
+        return Path(virtual_env), 0.0
+    poetry = shutil.which("poetry")
+    if poetry is None:
+        return None
+    start = time.perf_counter()
+    command = [poetry, "env", "info", "--path"]
+    process = subprocess.run(  # noqa: S603
+        command, capture_output=True, text=True, check=False, cwd=ROOT_DIR
+    )
+    if process.returncode != 0 or not process.stdout.strip():
+        return None
+    return Path(process.stdout.strip()), time.perf_counter() - start
+
+
+@atexit.register
+def _report_direct_runs() -> None:
+    """Report the commands run without ``poetry run``, and the time that saved."""
+    if not DIRECT_RUNS or (venv := _venv()) is None:
+        return
+    env_dir, poetry_time = venv
+    message = f"Ran {len(DIRECT_RUNS)} commands from {env_dir} without `poetry run`"
+    if poetry_time:
+        # Finding the environment took as long as starting one `poetry run`
+        message += f", saving about {poetry_time * (len(DIRECT_RUNS) - 1):.1f}s"
+    sys.stdout.write(f"{message}\n")
 
 
 def _run(c: Context, command: str) -> Result | None:
-    return c.run(f"poetry run {command}", pty=platform.system() != "Windows")
+    env: dict[str, str] = {}
+    venv = _venv()
+    if venv is None:
+        command = f"poetry run {command}"
+    else:
+        # Put the environment first in the PATH, as `poetry run` does
+        env_dir = venv[0]
+        bin_dir = env_dir.joinpath("Scripts" if platform.system() == "Windows" else "bin")
+        path = os.pathsep.join([str(bin_dir), os.environ.get("PATH", "")])
+        env = {"VIRTUAL_ENV": str(env_dir), "PATH": path}
+        DIRECT_RUNS.append(command)
+    return c.run(command, env=env, pty=platform.system() != "Windows")
 
 
 @task
@@ -35,20 +94,43 @@ def bake(c: Context, _bake_options: str = BAKE_OPTIONS) -> None:
     _run(c, f"cruft create . --config-file {_bake_options}")
 
 
-@task
-def watch(c: Context, _bake_options: str = BAKE_OPTIONS) -> None:
-    """Generate project using defaults and watch for changes."""
-    bake(c, _bake_options)
-    _run(
-        c,
-        "watchmedo shell-command -p '*.*' -c 'invoke bake --_bake_options={_bake_options}' -W -R -D {{cookiecutter.project_slug}}/",
-    )
+@task(
+    help={
+        "context": "Context to benchmark, can be repeated (default: all)",
+        "render_only": "Only time rendering and hooks, without installing the project",
+        "threshold": "Maximum relative slowdown against the baseline",
+        "update_baseline": "Store the results as the new baseline",
+    },
+    iterable=["context"],
+)
+def benchmark(
+    c: Context,
+    context: list[str] | None = None,
+    render_only: bool = False,
+    threshold: float = 0.2,
+    update_baseline: bool = False,
+) -> None:
+    """Time baking the template, failing if any phase regressed against the baseline."""
+    options = [f"--context {name}" for name in context or []]
+    options.append(f"--threshold {threshold}")
+    if render_only:
+        options.append("--render-only")
+    if update_baseline:
+        options.append("--update-baseline")
+    _run(c, f"python {BENCHMARKS_DIR.joinpath('bake_benchmark.py')} {' '.join(options)}")
+
+
+@task(help={"replay": "Use the values of the last bake instead of the defaults"})
+def watch(c: Context, replay: bool = False) -> None:
+    """Generate project using defaults and re-generate the changed files on every change."""
+    replay_str = "--replay" if replay else ""
+    _run(c, f"python {BAKE_ENGINE} --watch {replay_str}")
 
 
 @task
 def replay(c: Context) -> None:
     """Replay last cookiecutter run and watch for changes."""
-    watch(c, bake_options="--replay")
+    watch(c, replay=True)
 
 
 @task
@@ -97,10 +179,25 @@ def lint(c: Context, check: bool = True) -> None:
 
 
 # Tests
-@task(help={"tox_env": "Environment name to run the test"})
-def test(c: Context, tox_env: str = "py311") -> None:
+@task(
+    help={
+        "tox_env": "Environment name to run the test",
+        "changed": f"Only run the tests affected by the changes since a git ref ({BASE_REF})",
+        "record": "Record the dependencies of the tests, for the next runs with --changed",
+    },
+    optional=["changed"],
+)
+def test(
+    c: Context, tox_env: str = "py311", changed: str | bool | None = None, record: bool = False
+) -> None:
     """Run tests with tox."""
-    _run(c, f"tox -e {tox_env}")
+    options = []
+    # A bare --changed is True, --changed <ref> gives the ref
+    if changed:
+        options.append(f"--changed-since={BASE_REF if changed is True else changed}")
+    if record:
+        options.append("--record-impact")
+    _run(c, f"tox -e {tox_env}" + (f" -- {' '.join(options)}" if options else ""))
 
 
 @task
@@ -0,0 +1,609 @@
+"""Shared fixtures and hooks for the template test-suite."""
+
+import hashlib
+import importlib.util
+import json
+import os
+import shutil
+import subprocess
+import sys
+import venv
+from collections import Counter, defaultdict
+from collections.abc import Iterator
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from pathlib import Path
+from types import ModuleType
+
+import pytest
+from cookiecutter.exceptions import CookiecutterException
+from cookiecutter.utils import rmtree
+from filelock import FileLock
+from packaging.version import Version
+from pytest_cookies.plugin import Result
+
+from bake_engine import BakeEngine, ContentBytecodeCache
+from tests.impact import ImpactTracer, affected_tests, changed_files, changed_keys, read_at
+from tests.sweep import exhaustive, pairwise, sweep_options
+
+if sys.version_info < (3, 11):
+    from tomli import load as toml_load
+else:
+    from tomllib import load as toml_load
+
+BAKE_CACHE_KEY = pytest.StashKey["BakeCache"]()
+VENV_POOL_KEY = pytest.StashKey["VenvPool"]()
+BAKE_ENGINE_KEY = pytest.StashKey[BakeEngine]()
+STATS_KEY = pytest.StashKey[dict[str, Counter[str]]]()
+SWEEP_TIMINGS_KEY = pytest.StashKey[list[tuple[dict[str, str], dict[str, float]]]]()
+IMPACT_TRACER_KEY = pytest.StashKey[ImpactTracer]()
+IMPACT_KEY = pytest.StashKey[dict[str, dict]]()
+IMPACT_SELECTION_KEY = pytest.StashKey[str]()
+# Key of the impact map in the pytest cache
+IMPACT_CACHE_KEY = "impact/map"
+SWEEP_MODES = {"pairwise": pairwise, "exhaustive": exhaustive}
+
+
+class BakeCache:
+    """Session cache of baked projects, keyed on the ``extra_context`` used to bake them.
+
+    Every distinct context is baked only once per session. Tests that only read the rendered
+    files share that tree through `bake`, tests that modify the project or run commands inside it
+    get a private copy of it through `clone`. Tests that only check the content of a few files
+    render just those files, for all their contexts at once, through `render`. When running with
+    pytest-xdist every worker has its own cache, under its own temporary directory.
+
+    Parameters
+    ----------
+    engine : BakeEngine
+        In-process engine used to bake the projects.
+    bake_root : Path
+        Directory where the projects are baked.
+    clone_root : Path
+        Directory where the private copies are created.
+    tracer : ImpactTracer, optional
+        Tracer of the dependencies of the tests, told about every baked project and copy.
+    """
+
+    def __init__(
+        self,
+        engine: BakeEngine,
+        bake_root: Path,
+        clone_root: Path,
+        tracer: ImpactTracer | None = None,
+    ) -> None:
+        self._engine = engine
+        self._bake_root = bake_root
+        self._clone_root = clone_root
+        self._tracer = tracer
+        self._results: dict[str, Result] = {}
+        self._outputs: dict[str, dict[str, str]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.clones = 0
+        self.renders = 0
+
+    def stats(self) -> dict[str, int]:
+        """Return the usage counters of the cache."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "clones": self.clones,
+            "renders": self.renders,
+        }
+
+    @staticmethod
+    def key(extra_context: dict[str, str] | None) -> str:
+        """Return the cache key of the given context."""
+        return json.dumps(extra_context or {}, sort_keys=True)
+
+    def _untraced(self) -> AbstractContextManager[None]:
+        """Stop tracing the reads of the test, which would include the whole template."""
+        return self._tracer.paused() if self._tracer is not None else nullcontext()
+
+    def bake(self, extra_context: dict[str, str] | None = None) -> Result:
+        """Return the shared baked project for ``extra_context``, baking it on a miss.
+
+        The returned project is shared with other tests and must be treated as read-only.
+        """
+        key = self.key(extra_context)
+        if self._tracer is not None:
+            self._tracer.bake(extra_context)
+        if key in self._results:
+            self.hits += 1
+        else:
+            self.misses += 1
+            output_dir = self._bake_root / f"bake{self.misses:02d}"
+            try:
+                with self._untraced():
+                    project_dir = self._engine.bake(extra_context, output_dir)
+            except (CookiecutterException, OSError) as e:
+                # A failed bake, as a failed hook or an undefined variable, is the result of the
+                # context, and cached as such; any other error is raised to the test
+                self._results[key] = Result(exception=e, exit_code=-1)
+            else:
+                self._results[key] = Result(
+                    project_dir=str(project_dir), context=self._engine.last_context["cookiecutter"]
+                )
+                self._outputs[key] = self._engine.outputs(self._engine.last_context)
+                if self._tracer is not None:
+                    self._tracer.add_project(project_dir, self._outputs[key])
+        return self._results[key]
+
+    def render(
+        self, paths: list[str], extra_contexts: list[dict[str, str] | None]
+    ) -> list[dict[str, str]]:
+        """Return the content of a few files of the project for every context, without baking.
+
+        The files are rendered in memory and the hooks are not executed, see
+        `BakeEngine.render_outputs`: use `bake` to check which files a project has.
+        """
+        self.renders += len(extra_contexts)
+        if self._tracer is not None:
+            for extra_context in extra_contexts:
+                outputs = self._engine.outputs(self._engine.context(extra_context))
+                sources = [path for path, output in outputs.items() if output in paths]
+                self._tracer.render(extra_context, sources)
+        with self._untraced():
+            return self._engine.render_outputs(paths, extra_contexts)
+
+    @contextmanager
+    def clone(self, extra_context: dict[str, str] | None = None) -> Iterator[Result]:
+        """Yield a private copy of the baked project for ``extra_context``.
+
+        The copy can be modified freely, and it is removed when the context manager exits.
+        """
+        cached = self.bake(extra_context)
+        if cached.exception is not None:
+            yield cached
+            return
+
+        # Keep the project directory name, as it is the project slug
+        target = self._clone_root / f"clone{self.clones:02d}" / cached.project_path.name
+        self.clones += 1
+        with self._untraced():
+            shutil.copytree(cached.project_path, target, symlinks=True)
+        if self._tracer is not None:
+            self._tracer.add_project(target, self._outputs[self.key(extra_context)])
+        try:
+            yield Result(
+                exception=cached.exception,
+                exit_code=cached.exit_code,
+                project_dir=str(target),
+                context=cached.context,
+            )
+        finally:
+            rmtree(str(target.parent))
+
+
+def load_module(path: Path) -> ModuleType:
+    """Load a module of a baked project from its file, named after it, without importing it."""
+    spec = importlib.util.spec_from_file_location(path.stem, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_tasks(project_path: Path) -> ModuleType:
+    """Load the ``tasks.py`` of invoke of a baked project."""
+    return load_module(project_path / "tasks.py")
+
+
+def _poetry_to_pep508(name: str, spec: str | dict[str, str]) -> str:
+    """Convert a Poetry dependency specification into a PEP 508 requirement.
+
+    Raise `ValueError` for the dependencies that are not installed from an index, like Git or path
+    dependencies, or with several constraints, which the pool cannot install.
+    """
+    if isinstance(spec, str):
+        spec = {"version": spec}
+    if not isinstance(spec, dict) or not spec.keys().isdisjoint({"git", "path", "url"}):
+        msg = f"The dependency {name} = {spec!r} is not supported by the environment pool"
+        raise ValueError(msg)
+    extras = ",".join(spec.get("extras", []))
+    requirement = f"{name}[{extras}]" if extras else name
+
+    version = spec.get("version", "*").strip()
+    if version.startswith(("^", "~")) and not version.startswith("~="):
+        # Pre-releases, like ^1.0.0rc1, are bounded by their release
+        parts = list(Version(version[1:]).release)
+        if version[0] == "^":
+            # Bump the left-most non-zero component
+            index = next((i for i, p in enumerate(parts) if p != 0), len(parts) - 1)
+        else:
+            index = min(len(parts) - 1, 1)
+        upper = [*parts[:index], parts[index] + 1]
+        version = f">={version[1:]},<{'.'.join(str(p) for p in upper)}"
+    if version != "*":
+        requirement += version.replace(" ", "")
+
+    if "markers" in spec:
+        requirement += f"; {spec['markers']}"
+    return requirement
+
+
+class VenvPool:
+    """Pool of virtual environments shared by the baked projects that run Poetry commands.
+
+    One environment is built per distinct set of dependencies, identified by a hash of the
+    dependency tables of the rendered ``pyproject.toml``. The environments are kept in the pytest
+    cache, so they are only built again when the template dependencies change. Building an
+    environment is guarded by a file lock, so parallel workers never build the same one twice.
+    The projects themselves are installed in editable mode next to them, not in the shared
+    environment, so that the projects using an environment at the same time do not replace each
+    other.
+
+    Parameters
+    ----------
+    root : Path
+        Directory where the environments are created.
+    wheelhouse : Path, optional
+        Directory with the wheels to install the dependencies from, without accessing the index.
+    tracer : ImpactTracer, optional
+        Tracer of the dependencies of the tests, tracing the processes of the environments.
+    """
+
+    def __init__(
+        self, root: Path, wheelhouse: Path | None = None, tracer: ImpactTracer | None = None
+    ) -> None:
+        self._root = root
+        self._wheelhouse = wheelhouse
+        self._tracer = tracer
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict[str, int]:
+        """Return the usage counters of the pool."""
+        return {"hits": self.hits, "misses": self.misses}
+
+    @staticmethod
+    def requirements(project_path: Path) -> list[str]:
+        """Return the requirements of every dependency table of the project, and of its build."""
+        with Path.open(project_path / "pyproject.toml", "rb") as f:
+            pyproject = toml_load(f)
+        poetry = pyproject["tool"]["poetry"]
+
+        tables = [poetry.get("dependencies", {})]
+        tables += [group.get("dependencies", {}) for group in poetry.get("group", {}).values()]
+        requirements = {
+            _poetry_to_pep508(name, spec)
+            for table in tables
+            for name, spec in table.items()
+            if name != "python"
+        }
+        # The project is built in the environment, without build isolation
+        requirements.update(pyproject.get("build-system", {}).get("requires", []))
+        return sorted(requirements)
+
+    @classmethod
+    def key(cls, project_path: Path) -> str:
+        """Return the pool key of the project dependencies."""
+        content = "\n".join(cls.requirements(project_path))
+        return hashlib.sha256(content.encode()).hexdigest()[:16]
+
+    def get(self, project_path: Path) -> Path:
+        """Return the environment for the project dependencies, building it on a miss."""
+        key = self.key(project_path)
+        env_dir = self._root / key
+        # The requirements file is only written once the environment is complete
+        requirements_file = env_dir / "requirements.txt"
+        with FileLock(self._root / f"{key}.lock"):
+            if requirements_file.exists():
+                self.hits += 1
+                return env_dir
+
+            self.misses += 1
+            shutil.rmtree(env_dir, ignore_errors=True)
+            venv.create(env_dir, with_pip=True)
+            requirements = self.requirements(project_path)
+            index_options = (
+                ["--no-index", "--find-links", str(self._wheelhouse)] if self._wheelhouse else []
+            )
+            self._pip(env_dir, *index_options, *requirements)
+            requirements_file.write_text("\n".join(requirements) + "\n", encoding="utf-8")
+        return env_dir
+
+    def _pip(self, env_dir: Path, *args: str) -> None:
+        """Run ``pip install`` in the environment."""
+        python = str(self.bin_dir(env_dir) / "python")
+        install = [python, "-m", "pip", "install", "--quiet", "--disable-pip-version-check"]
+        subprocess.check_call([*install, *args])
+
+    def install_project(self, env_dir: Path, project_path: Path) -> list[Path]:
+        """Install the project in editable mode next to it, and return the paths to import it from.
+
+        The returned directories are the one where the project is installed, with its metadata and
+        scripts, and the ones of its ``.pth`` file, which Python only reads in site directories.
+        """
+        site_dir = project_path.parent / f"{project_path.name}-site"
+        if not site_dir.exists():
+            self._pip(
+                env_dir,
+                "--no-deps",
+                "--no-build-isolation",
+                "--editable",
+                str(project_path),
+                "--target",
+                str(site_dir),
+            )
+        paths = [site_dir]
+        for pth_file in site_dir.glob("*.pth"):
+            paths += [Path(line) for line in pth_file.read_text(encoding="utf-8").splitlines()]
+        return paths
+
+    @staticmethod
+    def bin_dir(env_dir: Path) -> Path:
+        """Return the directory with the executables of the environment."""
+        return env_dir / ("Scripts" if os.name == "nt" else "bin")
+
+    def env(self, project_path: Path) -> dict[str, str]:
+        """Return the environment variables that make Poetry use the pooled environment."""
+        env_dir = self.get(project_path)
+        if self._tracer is not None:
+            self._tracer.trace_environment(env_dir)
+        site_dir, *import_paths = self.install_project(env_dir, project_path)
+        env = os.environ.copy()
+        env["VIRTUAL_ENV"] = str(env_dir)
+        env["PATH"] = os.pathsep.join(
+            [str(site_dir / "bin"), str(self.bin_dir(env_dir)), env.get("PATH", "")]
+        )
+        python_path = [str(site_dir), *map(str, import_paths)]
+        if env.get("PYTHONPATH"):
+            python_path.append(env["PYTHONPATH"])
+        env["PYTHONPATH"] = os.pathsep.join(python_path)
+        # Never let Poetry create a project environment of its own
+        env["POETRY_VIRTUALENVS_CREATE"] = "false"
+        return env
+
+
+@pytest.fixture(scope="session")
+def bake_engine(request):
+    """Session-wide `BakeEngine` of the template under test.
+
+    The compiled templates are kept in the pytest cache, so later sessions do not compile them.
+    """
+    bytecode_cache = ContentBytecodeCache(request.config.cache.mkdir("jinja-bytecode"))
+    engine = BakeEngine(Path(request.config.option.template), bytecode_cache=bytecode_cache)
+    request.config.stash[BAKE_ENGINE_KEY] = engine
+    return engine
+
+
+@pytest.fixture(scope="session")
+def bake_cache(request, bake_engine, tmp_path_factory):
+    """Session-wide `BakeCache` shared by all the tests."""
+    cache = BakeCache(
+        bake_engine,
+        tmp_path_factory.mktemp("bakes"),
+        tmp_path_factory.mktemp("clones"),
+        request.config.stash.get(IMPACT_TRACER_KEY, None),
+    )
+    request.config.stash[BAKE_CACHE_KEY] = cache
+    return cache
+
+
+@pytest.fixture(scope="session")
+def venv_pool(request):
+    """Session-wide `VenvPool` stored in the pytest cache directory."""
+    wheelhouse = request.config.getoption("wheelhouse")
+    pool = VenvPool(
+        request.config.cache.mkdir("venv-pool"),
+        Path(wheelhouse).resolve() if wheelhouse else None,
+        request.config.stash.get(IMPACT_TRACER_KEY, None),
+    )
+    request.config.stash[VENV_POOL_KEY] = pool
+    return pool
+
+
+@pytest.fixture
+def sweep_context(request):
+    """Context of one combination of the option sweep."""
+    return request.param
+
+
+@pytest.fixture
+def sweep_timings(request, sweep_context):
+    """Collect the duration of each phase of a sweep test, to report them at the end."""
+    timings = {}
+    yield timings
+    request.config.stash.setdefault(SWEEP_TIMINGS_KEY, []).append((sweep_context, timings))
+
+
+def pytest_generate_tests(metafunc):
+    """Parametrize the option sweep with the combinations of the selected mode, if any."""
+    if "sweep_context" not in metafunc.fixturenames:
+        return
+    mode = metafunc.config.getoption("sweep")
+    if mode is None:
+        skip = pytest.mark.skip(reason="the option sweep only runs with --sweep")
+        metafunc.parametrize("sweep_context", [pytest.param(None, marks=skip)], indirect=True)
+        return
+    options = sweep_options(Path(metafunc.config.option.template) / "cookiecutter.json")
+    combos = SWEEP_MODES[mode](options)
+    metafunc.parametrize(
+        "sweep_context", combos, ids=[f"combo{i:04d}" for i in range(len(combos))], indirect=True
+    )
+
+
+def pytest_addoption(parser):
+    """Add the options of the template test-suite."""
+    parser.addoption(
+        "--wheelhouse",
+        action="store",
+        default=os.environ.get("BAKE_WHEELHOUSE"),
+        help="Install the dependencies of the baked projects from this directory of wheels, "
+        "without accessing the package index (default: $BAKE_WHEELHOUSE).",
+    )
+    parser.addoption(
+        "--sweep",
+        action="store",
+        choices=sorted(SWEEP_MODES),
+        default=None,
+        help="Run the option sweep, baking combinations of the template options: every pair of "
+        "option values at least once, or every combination (default: no sweep).",
+    )
+    parser.addoption(
+        "--sweep-install",
+        action="store_true",
+        default=False,
+        help="Also install the dependencies of every combination of the option sweep.",
+    )
+    parser.addoption(
+        "--record-impact",
+        action="store_true",
+        default=False,
+        help="Record the template files and cookiecutter.json keys every test depends on, in the "
+        "impact map of the pytest cache used by --changed-since. The processes of the pooled "
+        "environments are traced too.",
+    )
+    parser.addoption(
+        "--changed-since",
+        action="store",
+        default=None,
+        metavar="REF",
+        help="Only run the tests affected by the changes since the git REF, according to the "
+        "template files and cookiecutter.json keys each test depended on in the previous runs.",
+    )
+
+
+def pytest_configure(config):
+    """Trace the dependencies of every test with ``--record-impact``, to keep the impact map."""
+    if config.getoption("record_impact") and config.pluginmanager.has_plugin("cacheprovider"):
+        engine = BakeEngine(Path(config.option.template))
+        # Only the environments of the `VenvPool` are traced, never the one running the tests
+        tracer = ImpactTracer(
+            engine.template_dir, engine.project_template.name, config.cache.mkdir("impact-traces")
+        )
+        tracer.install()
+        config.stash[IMPACT_TRACER_KEY] = tracer
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_protocol(item):
+    """Record the dependencies of a test while it runs."""
+    tracer = item.config.stash.get(IMPACT_TRACER_KEY, None)
+    if tracer is None:
+        yield
+        return
+    tracer.start(item.nodeid)
+    # pytest-cookies bakes with cookiecutter, outside of the bake cache
+    if "cookies" in item.fixturenames:
+        tracer.depend_on_everything()
+    try:
+        yield
+    finally:
+        tracer.stop()
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    """Forget the dependencies of the failed tests, so that they are always selected."""
+    outcome = yield
+    tracer = item.config.stash.get(IMPACT_TRACER_KEY, None)
+    if tracer is not None and outcome.get_result().failed:
+        tracer.fail(item.nodeid)
+
+
+def pytest_collection_modifyitems(config, items):
+    """Deselect the tests that the changes since ``--changed-since`` cannot affect."""
+    base = config.getoption("changed_since")
+    if base is None or not config.pluginmanager.has_plugin("cacheprovider"):
+        return
+    impact = config.cache.get(IMPACT_CACHE_KEY, {})
+    if not impact:
+        config.stash[IMPACT_SELECTION_KEY] = "no impact map yet, running every test"
+        return
+    engine = BakeEngine(Path(config.option.template))
+    changes = changed_files(base, engine.template_dir)
+    keys = {}
+    if "cookiecutter.json" in changes:
+        old = read_at(base, "cookiecutter.json", engine.template_dir)
+        keys = changed_keys(old, engine.context_file.read_text(encoding="utf-8"))
+    affected = affected_tests(impact, changes, keys, engine)
+    if affected is None:
+        config.stash[IMPACT_SELECTION_KEY] = f"changes since {base} may affect every test"
+        return
+
+    selected = [item for item in items if item.nodeid not in impact or item.nodeid in affected]
+    deselected = [item for item in items if item not in selected]
+    if deselected:
+        config.hook.pytest_deselected(items=deselected)
+        items[:] = selected
+    config.stash[IMPACT_SELECTION_KEY] = (
+        f"{len(selected)} tests affected by {len(changes)} files changed since {base}, "
+        f"{len(deselected)} deselected"
+    )
+
+
+def _record_stats(config: pytest.Config, stats: dict[str, dict[str, int]]) -> None:
+    merged = config.stash.setdefault(STATS_KEY, {})
+    for section, counters in stats.items():
+        merged.setdefault(section, Counter()).update(counters)
+
+
+def pytest_sessionfinish(session):
+    """Collect the usage counters of the session, sending them to the controller under xdist."""
+    config = session.config
+    stats = {}
+    if (cache := config.stash.get(BAKE_CACHE_KEY, None)) is not None:
+        stats["bake cache"] = cache.stats()
+    if (engine := config.stash.get(BAKE_ENGINE_KEY, None)) is not None:
+        stats["jinja bytecode cache"] = engine.bytecode_cache.stats()
+    if (pool := config.stash.get(VENV_POOL_KEY, None)) is not None:
+        stats["venv pool"] = pool.stats()
+
+    impact = {}
+    if (tracer := config.stash.get(IMPACT_TRACER_KEY, None)) is not None:
+        impact = tracer.tests
+
+    if hasattr(config, "workeroutput"):
+        config.workeroutput["bake_stats"] = stats
+        config.workeroutput["sweep_timings"] = config.stash.get(SWEEP_TIMINGS_KEY, [])
+        config.workeroutput["impact"] = impact
+    else:
+        _record_stats(config, stats)
+        impact = {**config.stash.get(IMPACT_KEY, {}), **impact}
+        if impact:
+            config.cache.set(IMPACT_CACHE_KEY, {**config.cache.get(IMPACT_CACHE_KEY, {}), **impact})
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    """Merge the usage counters, sweep timings and impact map of a finished xdist worker."""
+    _record_stats(node.config, node.workeroutput.get("bake_stats", {}))
+    node.config.stash.setdefault(IMPACT_KEY, {}).update(node.workeroutput.get("impact", {}))
+    timings = node.workeroutput.get("sweep_timings", [])
+    node.config.stash.setdefault(SWEEP_TIMINGS_KEY, []).extend(timings)
+
+
+def _write_sweep_timings(terminalreporter, timings):
+    phases = list(dict.fromkeys(phase for _, phase_timings in timings for phase in phase_timings))
+    names = list(timings[0][0])
+    rows = sorted(timings, key=lambda row: -sum(row[1].values()))
+
+    terminalreporter.write_sep("-", "option sweep timings (s)")
+    terminalreporter.write_line(f"options: {', '.join(names)}")
+    terminalreporter.write_line(" ".join(f"{p:>8}" for p in ["total", *phases]))
+    for context, phase_timings in rows:
+        durations = [sum(phase_timings.values())] + [phase_timings.get(p, 0) for p in phases]
+        values = ", ".join(context[name] for name in names)
+        terminalreporter.write_line(" ".join(f"{d:8.2f}" for d in durations) + f"  {values}")
+
+    # Mean total time of each option value, to spot the slow options at a glance
+    totals = defaultdict(list)
+    for context, phase_timings in rows:
+        for name in names:
+            totals[name, context[name]].append(sum(phase_timings.values()))
+    terminalreporter.write_sep("-", "option sweep mean time per option value (s)")
+    for (name, value), durations in sorted(totals.items()):
+        terminalreporter.write_line(f"{sum(durations) / len(durations):8.2f}  {name}={value}")
+
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    """Report the bake, bytecode and environment caches usage, and the option sweep timings."""
+    if selection := config.stash.get(IMPACT_SELECTION_KEY, None):
+        terminalreporter.write_sep("-", "test impact")
+        terminalreporter.write_line(selection)
+    for section, counters in config.stash.get(STATS_KEY, {}).items():
+        terminalreporter.write_sep("-", section)
+        terminalreporter.write_line(", ".join(f"{k}: {v}" for k, v in counters.items()))
+    if timings := config.stash.get(SWEEP_TIMINGS_KEY, []):
+        _write_sweep_timings(terminalreporter, timings)
@@ -0,0 +1,434 @@
+"""Map the template files and ``cookiecutter.json`` keys to the tests that depend on them.
+
+`ImpactTracer` follows each test through an audit hook: the files of the baked projects it reads
+are mapped back to the template files they were rendered from. The processes started in the
+pooled environments are traced the same way, through a module that their ``.pth`` file imports,
+and write the files they read to a trace file. Running any other command inside, or on, a baked
+project makes the test depend on every template file. The keys of the ``extra_context`` the test
+bakes with are recorded too. `affected_tests` then selects the tests a change can affect.
+
+The dependencies of a test are a dictionary of ``files``, the template files it depends on,
+``keys``, the keys of the contexts it bakes with, and ``bakes``, whether it bakes the template.
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import sysconfig
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+from bake_engine import BakeEngine
+
+# Dependency of the tests that may depend on any file of the template
+EVERYTHING = "*"
+# Keys of cookiecutter.json that change nothing the tests check
+IGNORED_KEYS = {"__prompts__"}
+# Files of the repository that no test depends on, every other file may affect all of them
+IGNORED_PATHS = ("benchmarks/", "docs/", "reports/", ".github/", "tasks.py", "mkdocs.yml")
+IGNORED_SUFFIXES = (".md",)
+# Helper modules of the tests, which every test may import
+SHARED_TEST_FILES = {"tests/__init__.py", "tests/conftest.py", "tests/impact.py", "tests/sweep.py"}
+GIT = shutil.which("git") or "git"
+WRITE_FLAGS = os.O_WRONLY | os.O_RDWR | os.O_APPEND | os.O_CREAT | os.O_TRUNC
+# Environment variable with the file where the traced processes write the files they read
+TRACE_FILE_VARIABLE = "IMPACT_TRACE_FILE"
+# Module imported at startup by the processes of the pooled environments, leaving out the files of
+# the environment itself
+CHILD_HOOK_MODULE = "_impact_trace"
+CHILD_HOOK = f"""\
+import os
+import sys
+
+_PATH = os.environ.get("{TRACE_FILE_VARIABLE}")
+_PREFIXES = tuple({{sys.prefix, sys.base_prefix, sys.exec_prefix}})
+_WRITE_FLAGS = {WRITE_FLAGS}
+
+
+def _audit(event, args):
+    if event != "open" or isinstance(args[0], int):
+        return
+    path, mode, flags = args
+    if (mode or "r").strip("rbt") or flags & _WRITE_FLAGS:
+        return
+    path = os.path.abspath(os.fsdecode(path))
+    if not path.startswith(_PREFIXES):
+        _FILE.write(path + "\\n")
+
+
+if _PATH:
+    _FILE = open(_PATH, "a", encoding="utf-8", buffering=1)
+    sys.addaudithook(_audit)
+"""
+
+
+class ImpactTracer:
+    """Record the template files, and the context keys, that each test depends on.
+
+    The reads are traced with `sys.addaudithook`, which cannot be removed: `install` it once per
+    process, and it only records between `start` and `stop`. The baking itself is not traced,
+    since it reads the whole template, see `paused`.
+
+    Parameters
+    ----------
+    template_dir : Path
+        Root directory of the cookiecutter template.
+    project_template : str
+        Name of the directory of the project template, relative to ``template_dir``.
+    trace_dir : Path
+        Directory of the trace files of the traced environments.
+    """
+
+    def __init__(self, template_dir: Path, project_template: str, trace_dir: Path) -> None:
+        self.template_dir = template_dir.resolve()
+        self.project_template = project_template
+        self.tests: dict[str, dict[str, Any]] = {}
+        self._projects: dict[Path, dict[str, str]] = {}
+        self._nodeid: str | None = None
+        self._files: set[str] = set()
+        self._keys: set[str] = set()
+        self._bakes = False
+        self._paused = 0
+        self._failed: set[str] = set()
+        self._traced_envs: set[Path] = set()
+        self._trace_file = trace_dir / f"trace-{os.getpid()}.txt"
+
+    def install(self) -> None:
+        """Add the audit hook of the tracer to the current process."""
+        sys.addaudithook(self._audit)
+
+    def trace_environment(self, env_dir: Path) -> None:
+        """Trace the files read by the processes of a virtual environment, from now on.
+
+        Parameters
+        ----------
+        env_dir : Path
+            Directory of the virtual environment, of the same Python version as the tests.
+        """
+        paths = {"base": str(env_dir), "platbase": str(env_dir)}
+        site_packages = Path(sysconfig.get_path("purelib", vars=paths))
+        _write_atomically(site_packages / f"{CHILD_HOOK_MODULE}.py", CHILD_HOOK)
+        _write_atomically(
+            site_packages / f"{CHILD_HOOK_MODULE}.pth", f"import {CHILD_HOOK_MODULE}\n"
+        )
+        self._traced_envs.add(env_dir.resolve())
+
+    def add_project(self, project_dir: Path, outputs: dict[str, str]) -> None:
+        """Map the files of a baked project to the template files they were rendered from.
+
+        Parameters
+        ----------
+        project_dir : Path
+            Directory of the baked project, or of a copy of it.
+        outputs : dict[str, str]
+            Path of the output of every file of the project template, as returned by
+            `BakeEngine.outputs`.
+        """
+        self._projects[project_dir.resolve()] = {
+            output: f"{self.project_template}/{path}" for path, output in outputs.items()
+        }
+
+    def bake(self, extra_context: dict[str, Any] | None) -> None:
+        """Record that the running test bakes the template, with the keys of its context."""
+        if self._nodeid is not None:
+            self._bakes = True
+            self._keys.update(extra_context or {})
+
+    def render(self, extra_context: dict[str, Any] | None, sources: Iterable[str]) -> None:
+        """Record that the running test renders template files, with the keys of its context.
+
+        Parameters
+        ----------
+        extra_context : dict or None
+            Context of the rendering.
+        sources : Iterable[str]
+            Paths of the rendered files, relative to the project template.
+        """
+        if self._nodeid is not None:
+            self._keys.update(extra_context or {})
+            self._files.update(f"{self.project_template}/{source}" for source in sources)
+
+    def depend_on_everything(self) -> None:
+        """Make the running test depend on every file of the template."""
+        self._files.add(EVERYTHING)
+
+    @contextmanager
+    def paused(self) -> Iterator[None]:
+        """Stop tracing the reads, e.g. while the template is baked."""
+        self._paused += 1
+        try:
+            yield
+        finally:
+            self._paused -= 1
+
+    def start(self, nodeid: str) -> None:
+        """Start recording the dependencies of a test."""
+        self._nodeid = nodeid
+        self._files = set()
+        self._keys = set()
+        self._bakes = False
+        os.environ[TRACE_FILE_VARIABLE] = str(self._trace_file)
+
+    def fail(self, nodeid: str) -> None:
+        """Forget the dependencies of a failed test, which may not have read all of them."""
+        self._failed.add(nodeid)
+
+    def stop(self) -> None:
+        """Stop recording the dependencies of the running test, keeping them unless it failed."""
+        os.environ.pop(TRACE_FILE_VARIABLE, None)
+        if self._trace_file.exists():
+            for line in set(self._trace_file.read_text(encoding="utf-8").splitlines()):
+                self._read(Path(line))
+            self._trace_file.unlink()
+        if self._nodeid in self._failed:
+            self.tests.pop(self._nodeid, None)
+        elif self._nodeid is not None:
+            self.tests[self._nodeid] = {
+                "files": sorted(self._files),
+                "keys": sorted(self._keys),
+                "bakes": self._bakes,
+            }
+        self._nodeid = None
+
+    def _audit(self, event: str, args: tuple[Any, ...]) -> None:
+        if self._nodeid is None or self._paused:
+            return
+        if event == "open":
+            path, mode, flags = args
+            if isinstance(path, int) or (mode or "r").strip("rbt") or flags & WRITE_FLAGS:
+                return
+            self._read(Path(os.fsdecode(path)))
+        elif event in ("os.listdir", "os.scandir"):
+            path = args[0]
+            if path is not None and not isinstance(path, int):
+                self._list(Path(os.fsdecode(path)))
+        elif event == "subprocess.Popen":
+            self._run(args)
+
+    def _project(self, path: Path) -> tuple[Path, dict[str, str]] | None:
+        """Return the baked project a path belongs to, with its outputs, if any."""
+        path = Path.cwd() / path
+        for project_dir, outputs in self._projects.items():
+            if path.is_relative_to(project_dir):
+                return project_dir, outputs
+        return None
+
+    def _read(self, path: Path) -> None:
+        project = self._project(path)
+        if project is None:
+            self._read_template(path)
+            return
+        project_dir, outputs = project
+        relative = (Path.cwd() / path).relative_to(project_dir)
+        if relative.parent.name == "__pycache__":
+            # Imported from its bytecode, map it back to its source
+            relative = relative.parent.parent / (relative.name.split(".")[0] + ".py")
+        if (source := outputs.get(relative.as_posix())) is not None:
+            self._files.add(source)
+
+    def _read_template(self, path: Path) -> None:
+        """Record a file of the template read directly, as the context file or the hooks."""
+        path = Path.cwd() / path
+        if not path.is_relative_to(self.template_dir):
+            return
+        relative = path.relative_to(self.template_dir).as_posix()
+        if relative == "cookiecutter.json" or relative.startswith(
+            (f"{self.project_template}/", "hooks/")
+        ):
+            self._files.add(relative)
+
+    def _list(self, path: Path) -> None:
+        """Record every template file listed with a directory of a baked project."""
+        project = self._project(path)
+        if project is None:
+            return
+        project_dir, outputs = project
+        directory = (Path.cwd() / path).relative_to(project_dir)
+        for output, source in outputs.items():
+            if Path(output).parent == directory:
+                self._files.add(source)
+
+    def _run(self, args: tuple[Any, ...]) -> None:
+        """Record every file of a baked project that a command runs inside, or is given.
+
+        The commands of the traced environments record the files they read themselves.
+        """
+        _, command, cwd, env = args
+        virtual_env = (os.environ if env is None else env).get("VIRTUAL_ENV")
+        if virtual_env and Path(virtual_env).resolve() in self._traced_envs:
+            return
+        # Such as the Python of a traced environment, run without activating it
+        program = None if isinstance(command, str | bytes) else Path(os.fsdecode(command[0]))
+        if program and program.is_absolute() and program.parent.parent in self._traced_envs:
+            return
+        values = [str(cwd or Path.cwd())]
+        values += [os.fsdecode(arg) for arg in ([command] if isinstance(command, str) else command)]
+        values += list((env or {}).values())
+        for project_dir, outputs in self._projects.items():
+            if any(str(project_dir) in value for value in values):
+                self._files.update(outputs.values())
+
+
+def _write_atomically(path: Path, content: str) -> None:
+    """Write a file, unless it has the content already, without other processes reading it half."""
+    if path.is_file() and path.read_text(encoding="utf-8") == content:
+        return
+    temporary = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    temporary.write_text(content, encoding="utf-8")
+    temporary.replace(path)
+
+
+def _git(cwd: Path, *args: str) -> str:
+    return subprocess.run([GIT, *args], capture_output=True, check=True, cwd=cwd, text=True).stdout
+
+
+def changed_files(base: str, cwd: Path) -> dict[str, str]:
+    """Return the files changed since the git ``base`` ref, with their status.
+
+    Parameters
+    ----------
+    base : str
+        Git ref to compare the working tree against, e.g. ``main``.
+    cwd : Path
+        Directory of the git repository.
+
+    Returns
+    -------
+    dict[str, str]
+        Status of every changed file, ``A``, ``D`` or ``M``, by path relative to the repository.
+    """
+    changes = {}
+    for line in _git(cwd, "diff", "--name-status", "--no-renames", base).splitlines():
+        status, path = line.split("\t", 1)
+        changes[path] = status[0]
+    for path in _git(cwd, "ls-files", "--others", "--exclude-standard").splitlines():
+        changes[path] = "A"
+    return changes
+
+
+def read_at(base: str, path: str, cwd: Path) -> str:
+    """Return the content of a file at the git ``base`` ref, or an empty string if it is new."""
+    try:
+        return _git(cwd, "show", f"{base}:{path}")
+    except subprocess.CalledProcessError:
+        return ""
+
+
+def changed_keys(old: str, new: str) -> dict[str, bool]:
+    """Return the keys of ``cookiecutter.json`` whose value differs between two versions of it.
+
+    Parameters
+    ----------
+    old, new : str
+        Content of the two versions of ``cookiecutter.json``, ``old`` is empty if it is new.
+
+    Returns
+    -------
+    dict[str, bool]
+        Whether the default value changed too, by key. Adding a choice to an option changes its
+        value, but not its default, the first choice.
+    """
+    old_context = json.loads(old) if old else {}
+    new_context = json.loads(new)
+    keys = (old_context.keys() | new_context.keys()) - IGNORED_KEYS
+    return {
+        key: _default(old_context.get(key)) != _default(new_context.get(key))
+        for key in keys
+        if old_context.get(key) != new_context.get(key)
+    }
+
+
+def _default(value: Any) -> Any:
+    return value[0] if isinstance(value, list) and value else value
+
+
+def _classify(changes: dict[str, str], prefix: str) -> tuple[set[str], set[str], bool] | None:
+    """Split the changed files into test modules and template files.
+
+    Returns
+    -------
+    tuple or None
+        Changed test modules, changed template files, and whether the tree of every baked project
+        may have changed. None if any test may be affected.
+    """
+    modules = set()
+    templates = set()
+    trees = False
+    for path, status in changes.items():
+        if path.startswith(IGNORED_PATHS) or path.endswith(IGNORED_SUFFIXES):
+            continue
+        if path.startswith("tests/") and path not in SHARED_TEST_FILES:
+            modules.add(path)
+        elif path.startswith(prefix):
+            templates.add(path)
+            # Adding or removing a template file changes the tree of every baked project
+            trees = trees or status != "M"
+        elif path.startswith("hooks/"):
+            trees = True
+        elif path != "cookiecutter.json":
+            return None
+    return modules, templates, trees
+
+
+def _uses(engine: BakeEngine, path: Path, keys: set[str]) -> bool:
+    """Return whether a file of the template may use any of the keys."""
+    if not keys or not path.is_file():
+        return False
+    try:
+        used = engine.dependencies(path.read_text(encoding="utf-8"))
+    except UnicodeDecodeError:
+        return False
+    return used is None or bool(used & keys)
+
+
+def affected_tests(
+    impact: dict[str, dict[str, Any]],
+    changes: dict[str, str],
+    keys: dict[str, bool],
+    engine: BakeEngine,
+) -> set[str] | None:
+    """Return the tests of the impact map that a change may affect.
+
+    Parameters
+    ----------
+    impact : dict
+        Dependencies of every test, as recorded by `ImpactTracer`.
+    changes : dict[str, str]
+        Status of every changed file, as returned by `changed_files`.
+    keys : dict[str, bool]
+        Keys of ``cookiecutter.json`` that changed, as returned by `changed_keys`.
+    engine : BakeEngine
+        Engine of the template, to find the keys every template file uses.
+
+    Returns
+    -------
+    set[str] or None
+        Node ids of the affected tests, or None if every test may be affected. The tests missing
+        from the map, such as new tests, are not included.
+    """
+    classified = _classify(changes, f"{engine.project_template.name}/")
+    if classified is None or any(key.startswith("_") for key in keys):
+        return None
+    modules, templates, trees = classified
+    defaults = {key for key, default_changed in keys.items() if default_changed}
+    # The hooks choose the files of every project, from the keys they use
+    hooks = engine.template_dir / "hooks"
+    trees = trees or any(_uses(engine, hook, defaults) for hook in hooks.glob("*.py"))
+
+    affected = set()
+    for nodeid, dependencies in impact.items():
+        files = set(dependencies["files"])
+        if (
+            any(nodeid.startswith(f"{module}::") for module in modules)
+            or (EVERYTHING in files and bool(templates or keys or trees))
+            or (trees and dependencies["bakes"])
+            or files & templates
+            or keys.keys() & set(dependencies["keys"])
+            or any(_uses(engine, engine.template_dir / file, defaults) for file in files)
+        ):
+            affected.add(nodeid)
+    return affected
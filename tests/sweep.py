@@ -0,0 +1,89 @@
+"""Combinations of the template options to bake in the option sweep."""
+
+import itertools
+import json
+from pathlib import Path
+
+YES_NO = ["y", "n"]
+
+
+def sweep_options(context_file: Path) -> dict[str, list[str]]:
+    """Return the values of every multiple-choice and yes/no option of the template.
+
+    Parameters
+    ----------
+    context_file : Path
+        Path of the ``cookiecutter.json`` file of the template.
+
+    Returns
+    -------
+    dict[str, list[str]]
+        Values of each option, in the order they are declared.
+    """
+    context = json.loads(context_file.read_text(encoding="utf-8"))
+    options = {}
+    for name, value in context.items():
+        if name.startswith("_"):
+            continue
+        if isinstance(value, list):
+            options[name] = value
+        elif value in YES_NO:
+            options[name] = YES_NO
+    return options
+
+
+def exhaustive(options: dict[str, list[str]]) -> list[dict[str, str]]:
+    """Return every combination of the option values."""
+    names = list(options)
+    return [
+        dict(zip(names, values, strict=True)) for values in itertools.product(*options.values())
+    ]
+
+
+def pairwise(options: dict[str, list[str]]) -> list[dict[str, str]]:
+    """Return combinations of the option values covering every pair of values at least once.
+
+    The covering array is built greedily: each new combination starts from the first pair that is
+    not yet covered, and the remaining options take the value that covers most of the uncovered
+    pairs. The result is deterministic, and much smaller than the exhaustive product.
+    """
+    # Options with more values first, they determine the minimum number of combinations
+    names = sorted(options, key=lambda name: -len(options[name]))
+    uncovered = {
+        ((a, x), (b, y))
+        for a, b in itertools.combinations(names, 2)
+        for x in options[a]
+        for y in options[b]
+    }
+
+    combos = []
+    while uncovered:
+        (a, x), (b, y) = min(uncovered, key=lambda pair: _pair_order(names, options, pair))
+        combo = {a: x, b: y}
+        for name in names:
+            if name in combo:
+                continue
+            combo[name] = max(
+                options[name],
+                key=lambda value, name=name: sum(
+                    _pair(names, (other, combo[other]), (name, value)) in uncovered
+                    for other in combo
+                ),
+            )
+        uncovered -= {
+            _pair(names, (a, combo[a]), (b, combo[b])) for a, b in itertools.combinations(names, 2)
+        }
+        combos.append({name: combo[name] for name in options})
+    return combos
+
+
+def _pair(names: list[str], first: tuple[str, str], second: tuple[str, str]) -> tuple:
+    """Return the pair in the canonical order used by `pairwise`."""
+    if names.index(first[0]) > names.index(second[0]):
+        first, second = second, first
+    return first, second
+
+
+def _pair_order(names: list[str], options: dict[str, list[str]], pair: tuple) -> tuple:
+    (a, x), (b, y) = pair
+    return names.index(a), names.index(b), options[a].index(x), options[b].index(y)
@@ -1,89 +1,86 @@
 """Tests to check that the project is properly baked."""
 
+import configparser
 import importlib
 import os
+import re
 import shlex
+import shutil
 import subprocess
 import sys
-from contextlib import contextmanager
+import threading
 from datetime import datetime, timezone
 from pathlib import Path
 from unittest import mock
 
 import pytest
 from click.testing import CliRunner as ClickCliRunner
-from cookiecutter.utils import rmtree
+from cookiecutter.exceptions import FailedHookException
+from invoke.context import Context
+from invoke.runners import Result
 from typer.testing import CliRunner as TyperCliRunner
 
+from bake_engine import BakeEngine, ContentBytecodeCache
+from tests.conftest import VenvPool, _poetry_to_pep508, load_module, load_tasks
+from tests.sweep import pairwise, sweep_options
+
 if sys.version_info < (3, 11):
     from tomli import load as toml_load
+    from tomli import loads as toml_loads
 else:
     from tomllib import load as toml_load
+    from tomllib import loads as toml_loads
 
 INTERFACES = ["No command-line interface", "Click", "Typer", "Argparse"]
+PAIRWISE_CONTEXTS = pairwise(sweep_options(Path(__file__).parents[1] / "cookiecutter.json"))
 
 
-@contextmanager
-def inside_dir(dirpath):
-    """Execute code from inside the given directory.
-
-    dirpath: str
-        Path of the directory the command is being run.
-    """
-    old_path = Path.cwd()
-    try:
-        os.chdir(dirpath)
-        yield
-    finally:
-        os.chdir(old_path)
-
-
-@contextmanager
-def bake_in_temp_dir(cookies, *args, **kwargs):
-    """Delete the temporal directory that is created when executing the tests.
-
-    cookies: pytest_cookies.Cookies,
-        cookie to be baked and its temporal files will be removed
-    """
-    result = cookies.bake(*args, **kwargs)
-    try:
-        yield result
-    finally:
-        rmtree(str(result.project))
-
-
-def run_inside_dir(command, dirpath):
+def run_inside_dir(command, dirpath, env=None):
     """Run a command from inside a given directory, returning the exit status.
 
+    The working directory is only set for the command, so the tests can run in parallel.
+
     command:
         Command that will be executed
     dirpath:
         String, path of the directory the command is being run.
+    env:
+        Environment variables of the command, defaults to the current ones.
+    """
+    return subprocess.check_call(shlex.split(command), cwd=dirpath, env=env)
+
+
+def run_baked_tests(project_path, *args, doctest=False):
+    """Run pytest in a baked project, importing its package from its sources.
+
+    The ``addopts`` of the project, as its coverage, are left out. ``args`` are the test files, and
+    the options, given to pytest, and ``doctest`` also runs the examples of the modules.
     """
-    with inside_dir(dirpath):
-        return subprocess.check_call(shlex.split(command))
+    addopts = "--doctest-modules" if doctest else ""
+    command = [sys.executable, "-m", "pytest", "-p", "no:cacheprovider", "-o", f"addopts={addopts}"]
+    env = {**os.environ, "PYTHONPATH": str(project_path / "src")}
+    return subprocess.check_call([*command, *args], cwd=project_path, env=env)
 
 
 def check_output_inside_dir(command, dirpath):
     """Run a command from inside a given directory, returning the command output."""
-    with inside_dir(dirpath):
-        return subprocess.check_output(shlex.split(command))
+    return subprocess.check_output(shlex.split(command), cwd=dirpath)
 
 
-def test_year_compute_in_license_file(cookies):
+def test_year_compute_in_license_file(bake_cache):
     """Test the year in the license file."""
-    with bake_in_temp_dir(cookies) as result:
-        if result.exception is not None:
-            pytest.fail(f"Cookie baking failed: {result.exception}")
+    result = bake_cache.bake()
+    if result.exception is not None:
+        pytest.fail(f"Cookie baking failed: {result.exception}")
 
-        license_path = Path(result.project) / "LICENSE"
-        if not license_path.exists():
-            pytest.fail("LICENSE file not found in the project directory")
+    license_path = Path(result.project) / "LICENSE"
+    if not license_path.exists():
+        pytest.fail("LICENSE file not found in the project directory")
 
-        current_year = str(datetime.now(tz=timezone.utc).astimezone().year)
-        assert (
-            current_year in license_path.read_text()
-        ), f"Year {current_year} not found in LICENSE file"
+    current_year = str(datetime.now(tz=timezone.utc).astimezone().year)
+    assert (
+        current_year in license_path.read_text()
+    ), f"Year {current_year} not found in LICENSE file"
 
 
 def project_info(result):
@@ -94,63 +91,71 @@ def project_info(result):
     return project_path, project_slug, project_dir
 
 
-def test_bake_with_defaults(cookies):
+def test_bake_with_defaults(bake_cache):
     """Test the default structure and configuration of the baked project."""
-    with bake_in_temp_dir(cookies) as result:
-        assert result.project.isdir()
-        assert result.exit_code == 0
-        assert result.exception is None
+    result = bake_cache.bake()
+    assert result.project.isdir()
+    assert result.exit_code == 0
+    assert result.exception is None
 
-        found_toplevel_files = [f.basename for f in result.project.listdir()]
-        assert "pyproject.toml" in found_toplevel_files
-        assert "src" in found_toplevel_files
-        assert "tox.ini" in found_toplevel_files
-        assert "tests" in found_toplevel_files
+    found_toplevel_files = [f.basename for f in result.project.listdir()]
+    assert "pyproject.toml" in found_toplevel_files
+    assert "src" in found_toplevel_files
+    assert "tox.ini" in found_toplevel_files
+    assert "tests" in found_toplevel_files
 
-        assert result.project.join("src/python_boilerplate").isdir()
+    assert result.project.join("src/python_boilerplate").isdir()
 
 
-def test_bake_and_run_tests(cookies):
+def test_bake_and_run_tests(bake_cache, venv_pool):
     """Test the baked project by running pytest inside its directory."""
-    with bake_in_temp_dir(cookies, extra_context={"use_pytest": "y"}) as result:
+    with bake_cache.clone(extra_context={"use_pytest": "y"}) as result:
         assert result.project.isdir()
+        env = venv_pool.env(result.project_path)
         test_file_path = result.project.join("tests/test_python_boilerplate.py")
         lines = test_file_path.readlines()
         assert "import pytest" in "".join(lines)
         # Test the new pytest target
-        assert run_inside_dir("poetry run pytest", str(result.project)) == 0
+        assert run_inside_dir("poetry run pytest", str(result.project), env) == 0
+        # The project itself is installed, with its metadata
+        command = (
+            "python -c \"from importlib.metadata import version; version('python_boilerplate')\""
+        )
+        assert run_inside_dir(command, str(result.project), env) == 0
         print("test_bake_and_run_tests path", str(result.project))
 
 
-def test_bake_withspecialchars_and_run_tests(cookies):
+def test_bake_withspecialchars_and_run_tests(bake_cache, venv_pool):
     """Ensure that a `full_name` with double quotes does not break pyproject.toml."""
-    with bake_in_temp_dir(cookies, extra_context={"full_name": 'name "quote" name'}) as result:
+    with bake_cache.clone(extra_context={"full_name": 'name "quote" name'}) as result:
         assert result.project.isdir()
-        assert run_inside_dir("poetry run pytest", str(result.project)) == 0
+        env = venv_pool.env(result.project_path)
+        assert run_inside_dir("poetry run pytest", str(result.project), env) == 0
 
 
-def test_bake_with_apostrophe_and_run_tests(cookies):
+def test_bake_with_apostrophe_and_run_tests(bake_cache, venv_pool):
     """Ensure that a `full_name` with apostrophes does not break pyproject.toml."""
-    with bake_in_temp_dir(cookies, extra_context={"full_name": "O'connor"}) as result:
+    with bake_cache.clone(extra_context={"full_name": "O'connor"}) as result:
         assert result.project.isdir()
-        assert run_inside_dir("poetry run pytest", str(result.project)) == 0
+        env = venv_pool.env(result.project_path)
+        assert run_inside_dir("poetry run pytest", str(result.project), env) == 0
 
 
-def test_bake_without_author_file(cookies):
+def test_bake_without_author_file(bake_cache):
     """Ensure that the authors files are removed."""
-    with bake_in_temp_dir(cookies, extra_context={"create_author_file": "n"}) as result:
-        found_toplevel_files = [f.basename for f in result.project.listdir()]
-        assert "AUTHORS.md" not in found_toplevel_files
-        doc_files = [f.basename for f in result.project.join("docs").listdir()]
-        assert "authors.md" not in doc_files
+    result = bake_cache.bake(extra_context={"create_author_file": "n"})
+    found_toplevel_files = [f.basename for f in result.project.listdir()]
+    assert "AUTHORS.md" not in found_toplevel_files
+    doc_files = [f.basename for f in result.project.join("docs").listdir()]
+    assert "authors.md" not in doc_files
 
-        # Assert there are no spaces in the toc tree
-        # docs_index_path = result.project.join("docs/index.md")
-        # with Path.open(str(docs_index_path)) as index_file:
-        #     assert "contributing\n   history" in index_file.read()
+    # Assert there are no spaces in the toc tree
+    # docs_index_path = result.project.join("docs/index.md")
+    # with Path.open(str(docs_index_path)) as index_file:
+    #     assert "contributing\n   history" in index_file.read()
 
 
-def test_bake_selecting_license(cookies):
+def test_bake_selecting_license(bake_cache):
     """Assert that the license is properly set."""
     license_strings = {
         "MIT": "MIT License",
@@ -160,47 +165,37 @@ def test_bake_selecting_license(cookies):
         "Apache-2.0": "Licensed under the Apache License, Version 2.0",
         "GPL-3.0-only": "GNU GENERAL PUBLIC LICENSE",
     }
-    for license_name, target_string in license_strings.items():
-        context = {"open_source_license": license_name}
-        with bake_in_temp_dir(cookies, extra_context=context) as result:
-            # NOTE Path.open won't work properly for python<3.11
-            with Path.open(result.project.join("LICENSE"), encoding="utf-8") as f:
-                content = f.read()
-                assert target_string in content
-            with Path.open(result.project.join("pyproject.toml"), encoding="utf-8") as f:
-                content = f.read()
-                assert license_name in content
-            # NOTE the lines below can induce encoding errors
-            # assert target_string in result.project.join("LICENSE").read()
-            # assert license_name in result.project.join("pyproject.toml").read()
-
-
-def test_bake_not_open_source(cookies):
+    contexts = [{"open_source_license": license_name} for license_name in license_strings]
+    rendered = bake_cache.render(["LICENSE", "pyproject.toml"], contexts)
+    for (license_name, target_string), files in zip(license_strings.items(), rendered, strict=True):
+        assert target_string in files["LICENSE"]
+        assert license_name in files["pyproject.toml"]
+
+
+def test_bake_not_open_source(bake_cache):
     """Ensure that license is removed for not open source projects."""
-    with bake_in_temp_dir(
-        cookies, extra_context={"open_source_license": "Not open source"}
-    ) as result:
-        found_toplevel_files = [f.basename for f in result.project.listdir()]
-        assert "pyproject.toml" in found_toplevel_files
-        assert "LICENSE" not in found_toplevel_files
-        assert "License" not in result.project.join("README.md").read()
+    result = bake_cache.bake(extra_context={"open_source_license": "Not open source"})
+    found_toplevel_files = [f.basename for f in result.project.listdir()]
+    assert "pyproject.toml" in found_toplevel_files
+    assert "LICENSE" not in found_toplevel_files
+    assert "License" not in result.project.join("README.md").read()
 
 
-def test_not_using_pytest(cookies):
+def test_not_using_pytest(bake_cache):
     """Ensure that pytest is not used when 'use_pytest' == 'n'."""
-    with bake_in_temp_dir(cookies, extra_context={"use_pytest": "n"}) as result:
-        assert result.project.isdir()
-        test_file_path = result.project.join("tests/test_python_boilerplate.py")
-        lines = test_file_path.readlines()
-        assert "import unittest" in "".join(lines)
-        assert "import pytest" not in "".join(lines)
+    result = bake_cache.bake(extra_context={"use_pytest": "n"})
+    assert result.project.isdir()
+    test_file_path = result.project.join("tests/test_python_boilerplate.py")
+    lines = test_file_path.readlines()
+    assert "import unittest" in "".join(lines)
+    assert "import pytest" not in "".join(lines)
 
 
 @pytest.mark.parametrize("interface", INTERFACES)
-def test_bake_with_console_script_files(cookies, interface):
+def test_bake_with_console_script_files(bake_cache, interface):
     """Ensure that the cli is properly set."""
     context = {"command_line_interface": interface}
-    result = cookies.bake(extra_context=context)
+    result = bake_cache.bake(extra_context=context)
     project_path, project_slug, project_dir = project_info(result)
     found_project_files = os.listdir(project_dir)
 
@@ -216,10 +211,10 @@ def test_bake_with_console_script_files(cookies, interface):
         assert "[tool.poetry.scripts]" in file_content
 
 
-def test_bake_with_console_script_cli(cookies):
+def test_bake_with_console_script_cli(bake_cache):
     """Test the baked project's command line interface using Click."""
     context = {"command_line_interface": "Click"}
-    result = cookies.bake(extra_context=context)
+    result = bake_cache.bake(extra_context=context)
     project_path, project_slug, project_dir = project_info(result)
     module_path = Path(project_dir) / "cli.py"
     module_name = f"{project_slug}.cli"
@@ -236,10 +231,10 @@ def test_bake_with_console_script_cli(cookies):
     assert "Show this message" in help_result.output
 
 
-def test_bake_with_typer_console_script_cli(cookies):
+def test_bake_with_typer_console_script_cli(bake_cache):
     """Test the baked project's command line interface using Typer."""
     context = {"command_line_interface": "Typer"}
-    result = cookies.bake(extra_context=context)
+    result = bake_cache.bake(extra_context=context)
     project_path, project_slug, project_dir = project_info(result)
     module_path = Path(project_dir) / "cli.py"
     module_name = f"{project_slug}.cli"
@@ -256,10 +251,10 @@ def test_bake_with_typer_console_script_cli(cookies):
     assert "Show this message" in help_result.output
 
 
-def test_bake_with_argparse_console_script_cli(cookies, capsys):
+def test_bake_with_argparse_console_script_cli(bake_cache, capsys):
     """Test the baked project's command line interface using argparse."""
     context = {"command_line_interface": "Argparse"}
-    result = cookies.bake(extra_context=context)
+    result = bake_cache.bake(extra_context=context)
     project_path, project_slug, project_dir = project_info(result)
     module_path = project_dir / "cli.py"
     module_name = f"{project_slug}.cli"
@@ -287,30 +282,529 @@ def test_bake_with_argparse_console_script_cli(cookies, capsys):
         assert "show this help message" in out
 
 
+@pytest.mark.parametrize(
+    ("context", "paths", "absent"),
+    [
+        pytest.param({}, ["tests/test_cli_startup.py"], {}, id="cli_lazy_imports"),
+        pytest.param(
+            {},
+            ["benchmarks"],
+            {"pyproject.toml": "pytest-benchmark", "tasks.py": "def bench("},
+            id="with_benchmarks",
+        ),
+        pytest.param(
+            {},
+            ["src/python_boilerplate/instrumentation.py", "tests/test_instrumentation.py"],
+            {},
+            id="with_instrumentation",
+        ),
+        pytest.param(
+            {},
+            ["src/python_boilerplate/concurrency.py", "tests/test_concurrency.py"],
+            {},
+            id="with_concurrency",
+        ),
+        pytest.param(
+            {},
+            ["src/python_boilerplate/streaming.py", "tests/test_streaming.py"],
+            {},
+            id="with_streaming",
+        ),
+        pytest.param(
+            {},
+            ["build_extensions.py", "src/python_boilerplate/speedups.py"],
+            {"pyproject.toml": "[tool.poetry.build]"},
+            id="compiled_extensions",
+        ),
+        pytest.param(
+            {"with_pydantic_typing": "n"},
+            ["src/python_boilerplate/models.py", "tests/test_models.py"],
+            {},
+            id="with_pydantic_typing",
+        ),
+        pytest.param(
+            {},
+            ["src/python_boilerplate/numeric.py"],
+            {"pyproject.toml": "numpy = "},
+            id="numeric_stack",
+        ),
+    ],
+)
+def test_bake_without_option(bake_cache, context, paths, absent):
+    """Ensure that the files, and settings, of an option are left out when it is turned off.
+
+    The options are off by default, but for Pydantic, whatever the command-line interface.
+    """
+    for interface in INTERFACES:
+        extra_context = {**context, "command_line_interface": interface}
+        project_path = bake_cache.bake(extra_context=extra_context).project_path
+        for path in paths:
+            assert not (project_path / path).exists(), path
+        for path, text in absent.items():
+            assert text not in (project_path / path).read_text(), path
+
+
+@pytest.mark.parametrize("interface", INTERFACES[1:])
+def test_bake_with_lazy_cli_imports(bake_cache, interface):
+    """Ensure that the lazy console script starts without importing its framework."""
+    context = {"command_line_interface": interface, "cli_lazy_imports": "y"}
+    with bake_cache.clone(extra_context=context) as result:
+        project_path = result.project_path
+        project_slug = project_path.name
+        with Path.open(project_path / "pyproject.toml", "rb") as f:
+            scripts = toml_load(f)["tool"]["poetry"]["scripts"]
+        assert scripts == {project_slug: f"{project_slug}.cli:run"}
+
+        env = {**os.environ, "PYTHONPATH": str(project_path / "src")}
+        version = subprocess.run(
+            [sys.executable, "-X", "importtime", "-m", f"{project_slug}.cli", "--version"],
+            capture_output=True,
+            check=True,
+            cwd=project_path,
+            env=env,
+            text=True,
+        )
+        assert version.stdout.strip() == "0.1.0"
+        assert f"| {interface.lower()}\n" not in version.stderr
+
+        assert run_baked_tests(project_path, "tests/test_cli_startup.py") == 0
+
+
+@pytest.mark.parametrize("interface", ["No command-line interface", "Typer"])
+def test_bake_with_lazy_package_imports(bake_cache, interface):
+    """Ensure that importing the baked package does not import its submodules."""
+    with bake_cache.clone(extra_context={"command_line_interface": interface}) as result:
+        project_path = result.project_path
+        project_slug = project_path.name
+        assert (project_path / "src" / project_slug / "__init__.pyi").is_file()
+
+        env = {**os.environ, "PYTHONPATH": str(project_path / "src")}
+        code = f"import {project_slug}; print(*{project_slug}.__all__)"
+        output = subprocess.check_output([sys.executable, "-c", code], env=env, text=True)
+        expected = ["models", project_slug]
+        if not interface.startswith("No"):
+            expected.insert(0, "cli")
+        assert output.split() == expected
+
+        assert run_baked_tests(project_path, "tests/test_lazy_imports.py") == 0
+
+
+def test_bake_with_benchmarks(bake_cache):
+    """Ensure that the benchmarks are baked on request, and kept out of the tests."""
+    with bake_cache.clone(extra_context={"with_benchmarks": "y"}) as result:
+        project_path = result.project_path
+        assert (project_path / "benchmarks" / f"test_{project_path.name}.py").is_file()
+        pyproject = (project_path / "pyproject.toml").read_text()
+        assert 'pytest-benchmark = ">=4.0.0"' in pyproject
+        assert 'testpaths = ["src/python_boilerplate", "tests"]' in pyproject
+        assert "def bench(" in (project_path / "tasks.py").read_text()
+        assert ".benchmarks/" in (project_path / ".gitignore").read_text().splitlines()
+
+        pytest.importorskip("pytest_benchmark")
+        assert run_baked_tests(project_path, "benchmarks", "--benchmark-only") == 0
+        # Without a saved run of this machine, pytest-benchmark fails the comparison
+        compare = ["--benchmark-compare", "--benchmark-compare-fail=mean:10%"]
+        with pytest.raises(subprocess.CalledProcessError):
+            run_baked_tests(project_path, f"benchmarks/test_{project_path.name}.py", *compare)
+
+
+@pytest.mark.parametrize(
+    ("interface", "lazy"), [("No command-line interface", "n"), ("Click", "n"), ("Typer", "y")]
+)
+def test_bake_with_instrumentation(bake_cache, interface, lazy):
+    """Ensure that the instrumentation module is baked on request, and wired into the CLI."""
+    context = {
+        "command_line_interface": interface,
+        "cli_lazy_imports": lazy,
+        "with_instrumentation": "y",
+    }
+    with bake_cache.clone(extra_context=context) as result:
+        project_path = result.project_path
+        init = (project_path / "src" / "python_boilerplate" / "__init__.py").read_text()
+        assert '"instrumentation"' in init
+
+        module = "src/python_boilerplate/instrumentation.py"
+        assert (
+            run_baked_tests(project_path, module, "tests/test_instrumentation.py", doctest=True)
+            == 0
+        )
+
+
+def test_bake_with_concurrency(bake_cache):
+    """Ensure that the concurrency module is baked on request, and runs the workers at a time."""
+    with bake_cache.clone(extra_context={"with_concurrency": "y"}) as result:
+        project_path = result.project_path
+        init = (project_path / "src" / "python_boilerplate" / "__init__.py").read_text()
+        assert '"concurrency"' in init
+
+        module = "src/python_boilerplate/concurrency.py"
+        assert run_baked_tests(project_path, module, "tests/test_concurrency.py", doctest=True) == 0
+
+
+@pytest.mark.parametrize(
+    ("interface", "lazy"), [("No command-line interface", "n"), ("Argparse", "n"), ("Typer", "y")]
+)
+def test_bake_with_streaming(bake_cache, interface, lazy):
+    """Ensure that the streaming module is baked on request, and wired into the CLI."""
+    context = {
+        "command_line_interface": interface,
+        "cli_lazy_imports": lazy,
+        "with_streaming": "y",
+    }
+    with bake_cache.clone(extra_context=context) as result:
+        project_path = result.project_path
+        init = (project_path / "src" / "python_boilerplate" / "__init__.py").read_text()
+        assert '"streaming"' in init
+
+        module = "src/python_boilerplate/streaming.py"
+        assert run_baked_tests(project_path, module, "tests/test_streaming.py", doctest=True) == 0
+
+
+@pytest.mark.parametrize("compiler", ["mypyc", "Cython"])
+def test_bake_with_compiled_extensions(bake_cache, compiler):
+    """Ensure that the compiled extensions are configured on request, with the release workflow."""
+    context = {"compiled_extensions": compiler, "with_benchmarks": "y"}
+    with bake_cache.clone(extra_context=context) as result:
+        project_path = result.project_path
+        assert (project_path / "benchmarks" / "test_speedups.py").exists()
+        pyproject = (project_path / "pyproject.toml").read_text()
+        assert 'script = "build_extensions.py"' in pyproject
+        workflow = project_path / ".github" / "workflows" / "python-publish.yml"
+        assert "pypa/cibuildwheel" in workflow.read_text()
+
+        # Without the compiler, or a C compiler, the tests run the pure Python fallback
+        env = {**os.environ, "PYTHONPATH": str(project_path / "src")}
+        assert run_inside_dir("python build_extensions.py", project_path, env) == 0
+        assert run_baked_tests(project_path, "tests/test_speedups.py") == 0
+
+    # The private repositories get the wheels of every platform too
+    private = {
+        **context,
+        "private_package_repository_name": "private",
+        "private_package_repository_url": "https://pypi.example.com/simple/",
+    }
+    [files] = bake_cache.render([".github/workflows/python-publish.yml"], [private])
+    workflow = files[".github/workflows/python-publish.yml"]
+    assert "pypa/cibuildwheel" in workflow
+    assert "    - build\n    - build-wheels\n" in workflow.partition("publish-private:")[2]
+    assert "poetry publish --repository private" in workflow
+
+
+def test_bake_with_pydantic_models(bake_cache):
+    """Ensure that the models validated in bulk are added with Pydantic only."""
+    with bake_cache.clone(extra_context={"with_benchmarks": "y"}) as result:
+        project_path = result.project_path
+        assert (project_path / "benchmarks" / "test_models.py").exists()
+        init = (project_path / "src" / "python_boilerplate" / "__init__.py").read_text()
+        assert '"models"' in init
+
+        pytest.importorskip("pydantic")
+        assert run_baked_tests(project_path, "tests/test_models.py") == 0
+
+
+def test_bake_with_numeric_stack(bake_cache):
+    """Ensure that NumPy and the numeric module are added on request, with their property tests."""
+    context = {"numeric_stack": "y", "with_benchmarks": "y"}
+    with bake_cache.clone(extra_context=context) as result:
+        project_path = result.project_path
+        assert (project_path / "benchmarks" / "test_numeric.py").exists()
+        pyproject = (project_path / "pyproject.toml").read_text()
+        assert 'numpy = ">=1.26"' in pyproject
+        assert 'hypothesis = ">=6.90"' in pyproject
+        init = (project_path / "src" / "python_boilerplate" / "__init__.py").read_text()
+        assert '"numeric"' in init
+
+        pytest.importorskip("numpy")
+        pytest.importorskip("hypothesis")
+        assert run_baked_tests(project_path, "tests/test_numeric.py") == 0
+
+
+@pytest.mark.parametrize(
+    ("formatter", "checkers"),
+    [("Black", ["ruff", "black", "mypy"]), ("Ruff-format", ["ruff", "ruff format", "mypy"])],
+)
+def test_bake_with_parallel_lint(bake_cache, capsys, formatter, checkers):
+    """Ensure that ``invoke lint`` runs every checker, and reports the time of each one."""
+    with bake_cache.clone(extra_context={"formatter": formatter}) as result:
+        tasks = load_tasks(result.project_path)
+        commands = []
+
+        def run(c, command, ignore_failure=False, **kwargs):
+            commands.append(command)
+            return Result(stdout=f"{command}\n", exited=int(command.startswith("mypy")))
+
+        with mock.patch.object(tasks, "_run", run):
+            tasks.lint(Context())
+            assert len(commands) == len(checkers)
+            assert "mypy --junit-xml reports/mypy.xml ." in commands
+            tasks.lint(Context(), check=False, daemon=True)
+        assert "dmypy run -- ." in commands
+        assert "black --check" not in " ".join(commands[3:])
+        output = capsys.readouterr().out
+        for checker in checkers:
+            assert re.search(rf"^ *{checker} +[0-9.]+s  (passed|failed)$", output, re.MULTILINE)
+        assert re.search(r"^ *mypy +[0-9.]+s  failed$", output, re.MULTILINE)
+
+
+def test_bake_with_incremental_docs(bake_cache, capsys):
+    """Ensure that ``invoke docs`` only builds the documentation again when its sources changed."""
+    with bake_cache.clone() as result:
+        project_path = result.project_path
+        assert "- docs_hooks.py" in (project_path / "mkdocs.yml").read_text()
+        tasks = load_tasks(project_path)
+        commands = []
+
+        def run(c, command, ignore_failure=False):
+            commands.append(command)
+            if importlib.util.find_spec("material") and importlib.util.find_spec("mkdocstrings"):
+                subprocess.run(
+                    [sys.executable, "-m", *shlex.split(command)], cwd=project_path, check=True
+                )
+            tasks.DOCS_INDEX.parent.mkdir(exist_ok=True)
+            tasks.DOCS_INDEX.touch()
+
+        with mock.patch.object(tasks, "_run", run):
+            tasks.docs(Context(), launch=False)
+            tasks.docs(Context(), launch=False)
+            assert "up to date" in capsys.readouterr().out
+            tasks.docs(Context(), launch=False, clean=True)
+            (project_path / "src" / project_path.name / "__init__.py").write_text("")
+            tasks.docs(Context(), launch=False)
+        assert commands == ["mkdocs build", "mkdocs build", "mkdocs build --dirty"]
+
+
+def test_docs_hooks_rebuild_api_pages(bake_cache, tmp_path):
+    """Ensure that the MkDocs hook makes ``--dirty`` rebuild the API pages older than the code."""
+    files_module = pytest.importorskip("mkdocs.structure.files")
+    config_module = pytest.importorskip("mkdocs.config.defaults")
+    project_path = bake_cache.bake().project_path
+    package_time = max(path.stat().st_mtime for path in project_path.joinpath("src").rglob("*.py"))
+
+    docs_dir, site_dir = tmp_path / "docs", tmp_path / "site"
+    docs_dir.mkdir()
+    docs_dir.joinpath("api.md").write_text(f"::: {project_path.name}\n", encoding="utf-8")
+    docs_dir.joinpath("usage.md").write_text("# Usage\n", encoding="utf-8")
+    config = config_module.MkDocsConfig()
+    config.load_dict(
+        {"site_name": "Test", "docs_dir": str(docs_dir), "site_dir": str(site_dir)}
+        | {"use_directory_urls": False, "hooks": [str(project_path / "docs_hooks.py")]}
+    )
+    assert config.validate() == ([], [])
+
+    def build(output_age):
+        """Return the pages, built ``output_age`` seconds before the last change of the package."""
+        files = files_module.Files(
+            [
+                files_module.File(name, str(docs_dir), str(site_dir), use_directory_urls=False)
+                for name in ["api.md", "usage.md"]
+            ]
+        )
+        for file in files:
+            os.utime(file.abs_src_path, (package_time - 20, package_time - 20))
+            output = Path(file.abs_dest_path)
+            output.parent.mkdir(parents=True, exist_ok=True)
+            output.touch()
+            os.utime(output, (package_time - output_age, package_time - output_age))
+        return {file.src_uri: file for file in config.plugins.on_files(files, config=config)}
+
+    stale = build(output_age=10)
+    assert stale["api.md"].generated_by
+    assert stale["api.md"].is_modified()
+    assert stale["api.md"].edit_uri == "api.md"
+    assert stale["api.md"].content_string == f"::: {project_path.name}\n"
+    assert not stale["usage.md"].is_modified()
+    fresh = build(output_age=-10)
+    assert not fresh["api.md"].generated_by
+    assert not fresh["api.md"].is_modified()
+
+
+def test_bake_with_parallel_tests(bake_cache):
+    """Ensure that ``invoke test --workers`` runs pytest-xdist, which reports every worker."""
+    with bake_cache.clone() as result:
+        project_path = result.project_path
+        tasks = load_tasks(project_path)
+        commands = []
+        with mock.patch.object(tasks, "_run", lambda c, command: commands.append(command)):
+            tasks.test(Context(), workers=2)
+            tasks.test(Context())
+        assert commands[0].startswith("pytest --numprocesses 2 ")
+        assert "--cov " in commands[0]
+        assert commands[1] == "tox -e py311"
+
+        # The unittest projects run their tests with pytest-xdist too, without the benchmarks
+        context = {"use_pytest": "n", "with_benchmarks": "y"}
+        [files] = bake_cache.render(["pyproject.toml"], [context])
+        assert toml_loads(files["pyproject.toml"])["tool"]["pytest"]["ini_options"] == {
+            "testpaths": ["tests"]
+        }
+        unittest_project = bake_cache.bake(extra_context=context).project_path
+        assert not (unittest_project / "tests" / "conftest.py").exists()
+
+        pytest.importorskip("xdist")
+        env = {**os.environ, "PYTHONPATH": str(project_path / "src")}
+        command = [sys.executable, "-m", "pytest", "-p", "no:cacheprovider", "-o", "addopts="]
+        output = subprocess.run(
+            [*command, "--numprocesses", "2", "tests"],
+            cwd=project_path,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        assert "pytest-xdist worker times" in output
+        assert "gw0: " in output
+
+
+def test_bake_with_direct_tool_runs(bake_cache, tmp_path):
+    """Ensure that the tasks run the tools from the project environment, without ``poetry run``."""
+    with bake_cache.clone() as result:
+        # Print the commands run by `invoke test`, and the PATH they run with
+        script = (
+            "from unittest import mock\n"
+            "from invoke.context import Context\n"
+            "import tasks\n"
+            "def run(c, command, **kwargs):\n"
+            "    print(command, kwargs.get('env', {}).get('PATH', ''))\n"
+            "with mock.patch.object(Context, 'run', run):\n"
+            "    tasks.test(Context())\n"
+        )
+
+        def run_tasks(env):
+            return subprocess.run(
+                [sys.executable, "-c", script],
+                cwd=result.project_path,
+                env=env,
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout.splitlines()
+
+        env = {**os.environ, "VIRTUAL_ENV": str(tmp_path)}
+        assert run_tasks(env) == [
+            f"tox -e py311 {tmp_path / 'bin'}{os.pathsep}{env['PATH']}",
+            f"Ran 1 commands from {tmp_path} without `poetry run`",
+        ]
+        # Without an environment, nor Poetry to find it, the commands still run with Poetry
+        env = {key: value for key, value in os.environ.items() if key != "VIRTUAL_ENV"}
+        assert run_tasks({**env, "PATH": ""}) == ["poetry run tox -e py311 "]
+
+
+# Hold the install lock of the ``tox_install.py`` given as first argument until killed
+LOCK_HOLDER = """
+import pathlib, sys, time
+from tests.conftest import load_module
+tox_install = load_module(pathlib.Path(sys.argv[1]))
+with tox_install.install_lock(pathlib.Path(sys.argv[2])):
+    print("locked", flush=True)
+    time.sleep(60)
+"""
+
+
+@pytest.mark.parametrize("compiler", ["No", "mypyc"])
+def test_bake_with_cached_tox_environments(bake_cache, tmp_path, compiler):
+    """Ensure that tox runs in parallel, and reinstalls an environment only on changes."""
+    with bake_cache.clone(extra_context={"compiled_extensions": compiler}) as result:
+        project_path = result.project_path
+        tox = configparser.ConfigParser(interpolation=None)
+        tox.read(project_path / "tox.ini", encoding="utf-8")
+        assert "tox_install.py {envdir}" in tox["testenv"]["commands_pre"]
+        assert "POETRY_CACHE_DIR" in tox["testenv"]["setenv"]
+        assert tox["testenv:report"]["depends"] == "py310, py311"
+
+        module_path = project_path / "tox_install.py"
+        tox_install = load_module(module_path)
+        args = ["-v"]
+        installed = tox_install.install_hash(args)
+        (tmp_path / tox_install.HASH_FILE_NAME).write_text(installed, encoding="utf-8")
+        assert not tox_install.install(tmp_path, args)
+        assert tox_install.install_hash(["--only", "main"]) != installed
+        (project_path / "poetry.lock").write_text("# locked\n", encoding="utf-8")
+        assert tox_install.install_hash(args) != installed
+        speedups = project_path / "src" / project_path.name / "speedups.py"
+        if speedups.exists():
+            locked = tox_install.install_hash(args)
+            speedups.write_text("", encoding="utf-8")
+            assert tox_install.install_hash(args) != locked
+
+        # The environments installing in parallel wait for the one holding the lock, which is
+        # released when its process is killed
+        lock_file = tmp_path / tox_install.LOCK_FILE_NAME
+        holder = subprocess.Popen(
+            [sys.executable, "-c", LOCK_HOLDER, str(module_path), str(lock_file)],
+            cwd=Path(__file__).parents[1],
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        try:
+            assert holder.stdout.readline() == "locked\n"
+            locked = threading.Event()
+
+            def wait_for_lock():
+                with tox_install.install_lock(lock_file):
+                    locked.set()
+
+            waiter = threading.Thread(target=wait_for_lock)
+            waiter.start()
+            assert not locked.wait(1)
+        finally:
+            holder.kill()
+            holder.communicate()
+        waiter.join(10)
+        assert locked.is_set()
+        assert lock_file.exists()
+        assert "coverage combine" in tox["testenv:clean"]["commands"]
+
+
+def test_bake_with_profiling_tasks(bake_cache):
+    """Ensure that the profiling tasks write their reports for the baked package."""
+    with bake_cache.clone(extra_context={"command_line_interface": "Click"}) as result:
+        project_path = result.project_path
+        project_slug = project_path.name
+        tasks = load_tasks(project_path)
+
+        # Run the commands with this Python instead of the Poetry environment
+        env = {"PYTHONPATH": str(project_path / "src")}
+
+        def run(c, command, ignore_failure=False, **kwargs):
+            args = shlex.split(command)
+            args[0] = sys.executable
+            return subprocess.run(args, check=True, env=env, capture_output=True, text=True)
+
+        limit = 5
+        with mock.patch.object(tasks, "_run", run):
+            tasks.profile(Context(), args="--help", limit=limit)
+            tasks.importtime(Context(), module=f"{project_slug}.cli")
+            tasks.memprofile(Context(), args="--help", limit=limit)
+
+        assert "Ordered by: cumulative time" in tasks.PROFILE_REPORT.read_text()
+        import_tree = tasks.IMPORTTIME_REPORT.read_text().splitlines()
+        assert import_tree[0].endswith(f"  {project_slug}.cli")
+        assert any(line.endswith(f"    {project_slug}") for line in import_tree)
+        assert len(tasks.MEMPROFILE_REPORT.read_text().splitlines()) == limit
+        # The memory profiler is a script of the project, not written by the task
+        assert not list(tasks.REPORTS_DIR.glob("*.py"))
+
+
 @pytest.mark.parametrize(
     ("formatter", "expected"), [("Black", "black --check"), ("Ruff-format", "ruff"), ("No", None)]
 )
-def test_formatter(cookies, formatter, expected):
+def test_formatter(bake_cache, formatter, expected):
     """Ensure that the chosen formater is properly set."""
     formatter_to_dependency = {"Black": "black", "Ruff-format": "ruff", "No": None}
 
-    with bake_in_temp_dir(cookies, extra_context={"formatter": formatter}) as result:
-        assert result.project.isdir()
-        pyproject_path = result.project.join("pyproject.toml")
-        with Path.open(pyproject_path, "rb") as f:
-            pyproject_content = toml_load(f)
+    [files] = bake_cache.render(["pyproject.toml", "tasks.py"], [{"formatter": formatter}])
+    pyproject_content = toml_loads(files["pyproject.toml"])
 
-        dependency = formatter_to_dependency[formatter]
-        assert (
-            dependency in pyproject_content["tool"]["poetry"]["group"]["dev"]["dependencies"]
-        ) is (expected is not None)
-        tasks_path = result.project.join("tasks.py")
-        tasks_content = tasks_path.read()
-        if expected is not None:
-            assert expected in tasks_content
-        else:
-            assert "black --check" not in tasks_content
-            assert "ruff format" not in tasks_content
+    dependency = formatter_to_dependency[formatter]
+    assert (
+        dependency in pyproject_content["tool"]["poetry"]["group"]["dev"]["dependencies"]
+    ) is (expected is not None)
+    tasks_content = files["tasks.py"]
+    if expected is not None:
+        assert expected in tasks_content
+    else:
+        assert "black --check" not in tasks_content
+        assert "ruff format" not in tasks_content
 
 
 @pytest.mark.parametrize(
@@ -320,9 +814,176 @@ def test_formatter(cookies, formatter, expected):
         "poetry run invoke docs --no-launch",
     ],
 )
-def test_bake_and_run_and_invoke(cookies, command):
+def test_bake_and_run_and_invoke(bake_cache, venv_pool, command):
     """Run the unit tests of a newly-generated project using invoke's tasks."""
-    with bake_in_temp_dir(cookies) as result:
+    with bake_cache.clone() as result:
         assert result.project.isdir()
-        return_code = run_inside_dir(command, str(result.project))
+        env = venv_pool.env(result.project_path)
+        return_code = run_inside_dir(command, str(result.project), env)
         assert return_code == 0, f"'{command}' failed with return code {return_code}"
+
+
+def test_bake_cache_shares_and_clones(bake_cache):
+    """Ensure that a context is baked once, and that clones do not alter the shared project."""
+    context = {"project_name": "Cached Project"}
+    first = bake_cache.bake(extra_context=context)
+    hits = bake_cache.hits
+    assert bake_cache.bake(extra_context=dict(reversed(context.items()))) is first
+    assert bake_cache.hits == hits + 1
+
+    with bake_cache.clone(extra_context=context) as clone:
+        assert clone.project_path != first.project_path
+        assert clone.project_path.name == first.project_path.name
+        clone.project_path.joinpath("README.md").write_text("modified")
+    assert first.project_path.joinpath("README.md").read_text() != "modified"
+    assert not clone.project_path.exists()
+
+
+def test_bake_cache_keeps_failed_bakes(bake_cache):
+    """Ensure that a failed bake is cached as a result, and that other errors are raised."""
+    context = {"project_slug": "1-invalid"}
+    failed = bake_cache.bake(extra_context=context)
+    assert isinstance(failed.exception, FailedHookException)
+    assert failed.exit_code == -1
+    assert bake_cache.bake(extra_context=context) is failed
+
+    error = RuntimeError("bug of the cache")
+    with (
+        mock.patch.object(BakeEngine, "bake", side_effect=error),
+        pytest.raises(RuntimeError, match="bug of the cache"),
+    ):
+        bake_cache.bake(extra_context={"project_name": "Not Cached"})
+
+
+def test_venv_pool_key(bake_cache):
+    """Ensure that the environments are shared only by projects with the same dependencies."""
+    default = VenvPool.key(bake_cache.bake().project_path)
+    quoted = VenvPool.key(bake_cache.bake(extra_context={"full_name": "O'connor"}).project_path)
+    no_formatter = VenvPool.key(bake_cache.bake(extra_context={"formatter": "No"}).project_path)
+    assert default == quoted
+    assert default != no_formatter
+    assert "tox-gh-actions>=3,<4" in VenvPool.requirements(bake_cache.bake().project_path)
+    assert "poetry-core>=1.0.0" in VenvPool.requirements(bake_cache.bake().project_path)
+
+
+@pytest.mark.parametrize(
+    ("spec", "requirement"),
+    [
+        ("^3", "tox-gh-actions>=3,<4"),
+        ("^0.2.1", "tox-gh-actions>=0.2.1,<0.3"),
+        ("^1.0.0rc1", "tox-gh-actions>=1.0.0rc1,<2"),
+        ("~1.2", "tox-gh-actions>=1.2,<1.3"),
+        (
+            {"version": "^2", "markers": "python_version<'3.11'"},
+            "tox-gh-actions>=2,<3; python_version<'3.11'",
+        ),
+    ],
+)
+def test_poetry_to_pep508(spec, requirement):
+    """Ensure that the Poetry specifications are converted to the requirements pip installs."""
+    assert _poetry_to_pep508("tox-gh-actions", spec) == requirement
+
+
+@pytest.mark.parametrize(
+    "spec",
+    [{"git": "https://github.com/tox-dev/tox-gh.git"}, {"path": "../tox-gh"}, [{"version": "^3"}]],
+)
+def test_poetry_to_pep508_not_from_an_index(spec):
+    """Ensure that the dependencies the pool cannot install fail, instead of being left out."""
+    with pytest.raises(ValueError, match="not supported"):
+        _poetry_to_pep508("tox-gh-actions", spec)
+
+
+@pytest.mark.parametrize(
+    "context",
+    [{}, *PAIRWISE_CONTEXTS],
+    ids=["default", *(f"combo{i:04d}" for i in range(len(PAIRWISE_CONTEXTS)))],
+)
+def test_bake_engine_matches_cookiecutter(cookies, bake_cache, context):
+    """Ensure that the in-process engine bakes the same project as cookiecutter.
+
+    The contexts cover every pair of values of the multiple-choice and yes/no options, as the
+    option sweep does.
+    """
+    expected = cookies.bake(extra_context=context).project_path
+    baked = bake_cache.bake(extra_context=context).project_path
+    expected_files = sorted(p.relative_to(expected) for p in expected.rglob("*"))
+    assert sorted(p.relative_to(baked) for p in baked.rglob("*")) == expected_files
+    for path in expected_files:
+        if (expected / path).is_file():
+            assert (baked / path).read_bytes() == (expected / path).read_bytes(), path
+
+
+def test_bake_engine_renders_outputs(bake_cache, bake_engine):
+    """Ensure that rendering a few files gives the content of the baked files, without hooks."""
+    contexts = [None, {"open_source_license": "Not open source", "formatter": "No"}]
+    paths = ["LICENSE", "pyproject.toml", "src/python_boilerplate/__init__.py"]
+    for files, context in zip(bake_engine.render_outputs(paths, contexts), contexts, strict=True):
+        project_path = bake_cache.bake(extra_context=context).project_path
+        for path, content in files.items():
+            if (project_path / path).exists():
+                assert (project_path / path).read_text(encoding="utf-8") == content
+    # The hook removes the license of the projects that are not open source
+    assert not (project_path / "LICENSE").exists()
+    with pytest.raises(ValueError, match=r"README\.rst"):
+        bake_engine.render_outputs(["README.rst"], [None])
+
+
+def test_bake_engine_rebake_rewrites_only_changed_files(request, tmp_path):
+    """Ensure that re-baking only rewrites the files affected by a change of the template."""
+    template = Path(request.config.option.template)
+    template_copy = tmp_path / "template"
+    for path in template.glob("*"):
+        if path.name in ("cookiecutter.json", "hooks", "templates") or "{{" in path.name:
+            copy = shutil.copytree if path.is_dir() else shutil.copy
+            copy(path, template_copy / path.name)
+    engine = BakeEngine(template_copy)
+    output_dir = tmp_path / "output"
+    project_dir, _ = engine.rebake(output_dir=output_dir)
+    (project_dir / ".mypy_cache").mkdir()
+    mtimes = {path: path.stat().st_mtime_ns for path in project_dir.rglob("*") if path.is_file()}
+
+    _, written = engine.rebake({"version": "9.9.9"}, output_dir)
+    assert project_dir / "pyproject.toml" in written
+    assert project_dir / "README.md" not in written
+    changed = set(written)
+    readme = next(template_copy.glob("*/README.md"))
+    readme.write_text(readme.read_text(encoding="utf-8") + "\nEdited\n", encoding="utf-8")
+    _, written = engine.rebake({"version": "9.9.9"}, output_dir)
+    assert written == [project_dir / "README.md"]
+    changed.update(written)
+    _, written = engine.rebake({"version": "9.9.9", "command_line_interface": "Typer"}, output_dir)
+    assert project_dir / "src" / project_dir.name / "cli.py" in written
+
+    changed.update(written)
+    for path, mtime in mtimes.items():
+        if path not in changed:
+            assert path.stat().st_mtime_ns == mtime, path
+    assert (project_dir / ".mypy_cache").is_dir()
+
+    expected = engine.bake(
+        {"version": "9.9.9", "command_line_interface": "Typer"}, tmp_path / "fresh"
+    )
+    for path in expected.rglob("*"):
+        if path.is_file():
+            assert (project_dir / path.relative_to(expected)).read_bytes() == path.read_bytes()
+
+
+def test_bytecode_cache_shared_and_evicted(request, tmp_path):
+    """Ensure that compiled templates are reused by a new engine, and evicted when too large."""
+    template = Path(request.config.option.template)
+    cache = ContentBytecodeCache(tmp_path / "cache")
+    BakeEngine(template, bytecode_cache=cache).bake(output_dir=tmp_path / "first")
+    assert cache.hits == 0
+    assert cache.writes == cache.misses > 0
+    entries, size = cache.usage()
+    assert entries == cache.writes
+
+    shared = ContentBytecodeCache(tmp_path / "cache")
+    BakeEngine(template, bytecode_cache=shared).bake(output_dir=tmp_path / "second")
+    assert shared.stats() == {"hits": entries, "misses": 0, "writes": 0, "evictions": 0}
+
+    small = ContentBytecodeCache(tmp_path / "cache", max_size=size // 2)
+    small.evict()
+    assert small.evictions > 0
+    assert small.usage()[1] <= size // 2
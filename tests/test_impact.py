@@ -0,0 +1,89 @@
+"""Tests of the impact map, which selects the tests affected by a change of the template."""
+
+import json
+from pathlib import Path
+
+from bake_engine import BakeEngine
+from tests.conftest import BakeCache
+from tests.impact import EVERYTHING, ImpactTracer, affected_tests, changed_keys
+
+PROJECT = "{{cookiecutter.project_slug}}"
+
+
+def test_impact_tracer_maps_reads_to_template(bake_engine, tmp_path):
+    """Ensure that reading a baked file records the template file it was rendered from."""
+    tracer = ImpactTracer(bake_engine.template_dir, PROJECT, tmp_path)
+    tracer.install()
+    cache = BakeCache(bake_engine, tmp_path / "bakes", tmp_path / "clones", tracer)
+
+    tracer.start("read")
+    project_path = cache.bake(extra_context={"formatter": "Black"}).project_path
+    (project_path / "tox.ini").read_text(encoding="utf-8")
+    with cache.clone(extra_context={"formatter": "Black"}) as clone:
+        (clone.project_path / "src" / project_path.name / "__init__.py").read_bytes()
+    tracer.stop()
+    assert tracer.tests["read"] == {
+        "files": [
+            f"{PROJECT}/src/{{{{cookiecutter.project_slug}}}}/__init__.py",
+            f"{PROJECT}/tox.ini",
+        ],
+        "keys": ["formatter"],
+        "bakes": True,
+    }
+
+    tracer.start("failed")
+    (project_path / "README.md").read_text(encoding="utf-8")
+    tracer.fail("failed")
+    tracer.stop()
+    assert "failed" not in tracer.tests
+
+
+def test_changed_keys():
+    """Ensure that adding a choice to an option does not count as a change of its default."""
+    old = {"formatter": ["Black", "No"], "version": "0.1.0", "__prompts__": {}}
+    new = {"formatter": ["Black", "No", "Ruff"], "version": "0.2.0", "__prompts__": {"a": "b"}}
+    assert changed_keys(json.dumps(old), json.dumps(new)) == {"formatter": False, "version": True}
+    assert changed_keys("", json.dumps({"version": "0.1.0"})) == {"version": True}
+
+
+def test_affected_tests(request):
+    """Ensure that only the tests depending on the changed files or keys are selected."""
+    engine = BakeEngine(Path(request.config.option.template))
+    module = "tests/test_bake_project.py"
+    impact = {
+        f"{module}::test_tox": {"files": [f"{PROJECT}/tox.ini"], "keys": [], "bakes": True},
+        f"{module}::test_docs": {"files": [f"{PROJECT}/mkdocs.yml"], "keys": [], "bakes": True},
+        f"{module}::test_license": {
+            "files": [f"{PROJECT}/LICENSE"],
+            "keys": ["open_source_license"],
+            "bakes": True,
+        },
+        "tests/test_option_sweep.py::test_sweep": {
+            "files": [EVERYTHING],
+            "keys": [],
+            "bakes": True,
+        },
+        "tests/test_option_sweep.py::test_pairs": {"files": [], "keys": [], "bakes": False},
+    }
+
+    def affected(changes, keys=None):
+        return affected_tests(impact, changes, keys or {}, engine)
+
+    assert affected({f"{PROJECT}/tox.ini": "M", "README.md": "M"}) == {
+        f"{module}::test_tox",
+        "tests/test_option_sweep.py::test_sweep",
+    }
+    assert affected({"tests/test_option_sweep.py": "M"}) == {
+        "tests/test_option_sweep.py::test_sweep",
+        "tests/test_option_sweep.py::test_pairs",
+    }
+    # The license file uses the full name, and the options only the test baking with it
+    assert affected({"cookiecutter.json": "M"}, {"full_name": True}) >= {f"{module}::test_license"}
+    assert f"{module}::test_license" in affected({}, {"open_source_license": False})
+    assert f"{module}::test_tox" not in affected({}, {"open_source_license": False})
+    # Adding a file changes every baked project
+    assert affected({f"{PROJECT}/new.txt": "A"}) == set(impact) - {
+        "tests/test_option_sweep.py::test_pairs"
+    }
+    assert affected({"bake_engine.py": "M"}) is None
+    assert affected({}, {"_copy_without_render": True}) is None
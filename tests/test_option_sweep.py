@@ -0,0 +1,74 @@
+"""Bake combinations of the template options and check that the projects are consistent.
+
+The sweep only runs when asked for: ``--sweep=pairwise`` bakes combinations covering every pair of
+option values, ``--sweep=exhaustive`` bakes all of them (preferably with ``--numprocesses=auto``).
+"""
+
+import configparser
+import itertools
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from tests.sweep import exhaustive, pairwise, sweep_options
+
+if sys.version_info < (3, 11):
+    from tomli import load as toml_load
+else:
+    from tomllib import load as toml_load
+
+CONTEXT_FILE = Path(__file__).parents[1] / "cookiecutter.json"
+
+# Import every module named on the command line
+IMPORT_MODULES = "import importlib, sys; [importlib.import_module(name) for name in sys.argv[1:]]"
+
+
+def test_pairwise_covers_every_pair():
+    """Ensure that the pairwise combinations cover every pair of values, with fewer bakes."""
+    options = sweep_options(CONTEXT_FILE)
+    combos = pairwise(options)
+    covered = {
+        ((a, combo[a]), (b, combo[b]))
+        for combo in combos
+        for a, b in itertools.permutations(combo, 2)
+    }
+    for a, b in itertools.combinations(options, 2):
+        for x, y in itertools.product(options[a], options[b]):
+            assert ((a, x), (b, y)) in covered
+    assert len(combos) < len(exhaustive(options)) / 100
+
+
+def test_option_sweep(request, cookies, sweep_context, sweep_timings):
+    """Bake a combination of options, and check that its files parse and its modules import."""
+    start = time.perf_counter()
+    result = cookies.bake(extra_context=sweep_context)
+    sweep_timings["bake"] = time.perf_counter() - start
+    assert result.exception is None, result.exception
+    project_path = result.project_path
+    project_slug = project_path.name
+
+    start = time.perf_counter()
+    with Path.open(project_path / "pyproject.toml", "rb") as f:
+        toml_load(f)
+    configparser.ConfigParser().read(project_path / "tox.ini", encoding="utf-8")
+    sweep_timings["parse"] = time.perf_counter() - start
+
+    python = sys.executable
+    if request.config.getoption("sweep_install"):
+        start = time.perf_counter()
+        venv_pool = request.getfixturevalue("venv_pool")
+        python = str(venv_pool.bin_dir(venv_pool.get(project_path)) / "python")
+        sweep_timings["install"] = time.perf_counter() - start
+
+    package_path = project_path / "src" / project_slug
+    modules = [project_slug, *(f"{project_slug}.{path.stem}" for path in package_path.glob("*.py"))]
+    modules.remove(f"{project_slug}.__init__")
+    start = time.perf_counter()
+    subprocess.check_call(
+        [python, "-c", IMPORT_MODULES, *sorted(modules)],
+        cwd=project_path,
+        env={**os.environ, "PYTHONPATH": str(project_path / "src")},
+    )
+    sweep_timings["import"] = time.perf_counter() - start
@@ -0,0 +1 @@
+"""Benchmarks of {{ cookiecutter.project_slug }}."""
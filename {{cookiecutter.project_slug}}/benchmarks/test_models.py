@@ -0,0 +1,59 @@
+"""Benchmarks of the `{{ cookiecutter.project_slug }}.models` module, in bulk and one by one.
+
+The benchmarks are not part of the unit tests, run them with ``invoke bench``.
+"""
+
+import json
+from typing import Any
+
+import pytest
+from pytest_benchmark.fixture import BenchmarkFixture
+
+from {{ cookiecutter.project_slug }} import models
+
+# Number of records validated by every round, and number of rounds, which take seconds each
+RECORDS = 1_000_000
+ROUNDS = 3
+
+
+@pytest.fixture(scope="module")
+def items() -> list[dict[str, Any]]:
+    """Fields of the records, the same for every benchmark."""
+    return [
+        {"id": i, "name": f"record {i}", "score": i / RECORDS, "tags": ["sample"]}
+        for i in range(RECORDS)
+    ]
+
+
+def _validate_naively(items: list[dict[str, Any]]) -> list[models.Record]:
+    """Validate the records one by one, the pattern that bulk validation replaces."""
+    return [models.Record(**item) for item in items]
+
+
+@pytest.mark.benchmark(group="records", min_rounds=ROUNDS, max_time=0)
+def test_validate_naively(benchmark: BenchmarkFixture, items: list[dict[str, Any]]) -> None:
+    """Benchmark the validation of the records one by one."""
+    records = benchmark(_validate_naively, items)
+    assert len(records) == RECORDS
+
+
+@pytest.mark.benchmark(group="records", min_rounds=ROUNDS, max_time=0)
+def test_validate_records(benchmark: BenchmarkFixture, items: list[dict[str, Any]]) -> None:
+    """Benchmark the validation of the records in bulk, with a cached adapter."""
+    records = benchmark(models.validate_records, items)
+    assert len(records) == RECORDS
+
+
+@pytest.mark.benchmark(group="records", min_rounds=ROUNDS, max_time=0)
+def test_validate_records_json(benchmark: BenchmarkFixture, items: list[dict[str, Any]]) -> None:
+    """Benchmark the parsing and validation of the records in bulk, from JSON."""
+    data = json.dumps(items).encode()
+    records = benchmark(models.validate_records_json, data)
+    assert len(records) == RECORDS
+
+
+@pytest.mark.benchmark(group="records", min_rounds=ROUNDS, max_time=0)
+def test_construct_records(benchmark: BenchmarkFixture, items: list[dict[str, Any]]) -> None:
+    """Benchmark the construction of the records without validation."""
+    records = benchmark(models.construct_records, items)
+    assert len(records) == RECORDS
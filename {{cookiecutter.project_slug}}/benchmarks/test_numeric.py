@@ -0,0 +1,43 @@
+"""Benchmarks of the `{{ cookiecutter.project_slug }}.numeric` module, vectorized and pure Python.
+
+The benchmarks are not part of the unit tests, run them with ``invoke bench``.
+"""
+
+import numpy as np
+import pytest
+from pytest_benchmark.fixture import BenchmarkFixture
+
+from {{ cookiecutter.project_slug }} import numeric
+
+# Number of points, and their dimension
+POINTS = 300
+DIMENSION = 3
+BATCH_SIZE = 64
+
+
+@pytest.fixture(scope="module")
+def points() -> list[list[float]]:
+    """Random points, the same for every benchmark."""
+    coordinates = np.random.default_rng(0).random((POINTS, DIMENSION))
+    return [[float(coordinate) for coordinate in point] for point in coordinates]
+
+
+@pytest.mark.benchmark(group="pairwise_distances")
+def test_pairwise_distances_reference(
+    benchmark: BenchmarkFixture, points: list[list[float]]
+) -> None:
+    """Benchmark the pure Python reference."""
+    assert len(benchmark(numeric.pairwise_distances_reference, points)) == POINTS
+
+
+@pytest.mark.benchmark(group="pairwise_distances")
+def test_pairwise_distances(benchmark: BenchmarkFixture, points: list[list[float]]) -> None:
+    """Benchmark the vectorized distances, computed at once."""
+    assert benchmark(numeric.pairwise_distances, points).shape == (POINTS, POINTS)
+
+
+@pytest.mark.benchmark(group="pairwise_distances")
+def test_pairwise_distances_batched(benchmark: BenchmarkFixture, points: list[list[float]]) -> None:
+    """Benchmark the vectorized distances, computed by batches."""
+    result = benchmark(numeric.pairwise_distances, points, BATCH_SIZE)
+    assert result.shape == (POINTS, POINTS)
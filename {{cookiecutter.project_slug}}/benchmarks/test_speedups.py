@@ -0,0 +1,42 @@
+"""Benchmarks of the `{{ cookiecutter.project_slug }}.speedups` module, compiled and interpreted.
+
+The benchmarks are not part of the unit tests, run them with ``invoke bench``.
+"""
+
+import importlib.util
+from pathlib import Path
+from types import ModuleType
+
+import pytest
+from pytest_benchmark.fixture import BenchmarkFixture
+
+from {{ cookiecutter.project_slug }} import speedups
+
+# Number of prime numbers lower than LIMIT
+LIMIT = 20_000
+PRIMES = 2262
+
+
+def _interpreted() -> ModuleType:
+    """Load the Python source of the module, even when its compiled extension is imported."""
+    path = Path(speedups.__file__).with_name("speedups.py")
+    spec = importlib.util.spec_from_file_location(f"{speedups.__name__}_interpreted", path)
+    assert spec is not None
+    assert spec.loader is not None
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.mark.benchmark(group="count_primes")
+def test_count_primes_interpreted(benchmark: BenchmarkFixture) -> None:
+    """Benchmark the Python source of the module."""
+    assert benchmark(_interpreted().count_primes, LIMIT) == PRIMES
+
+
+@pytest.mark.benchmark(group="count_primes")
+def test_count_primes_compiled(benchmark: BenchmarkFixture) -> None:
+    """Benchmark the compiled extension of the module."""
+    if Path(speedups.__file__).suffix == ".py":
+        pytest.skip("The module is not compiled, run 'invoke build-extensions' first")
+    assert benchmark(speedups.count_primes, LIMIT) == PRIMES
@@ -0,0 +1,23 @@
+"""Benchmarks of the `{{ cookiecutter.project_slug }}` main module.
+
+The benchmarks are not part of the unit tests, run them with ``invoke bench``.
+"""
+
+import importlib
+import sys
+from types import ModuleType
+
+from pytest_benchmark.fixture import BenchmarkFixture
+
+MAIN_MODULE = "{{ cookiecutter.project_slug }}.{{ cookiecutter.project_slug }}"
+
+
+def _import_main_module() -> ModuleType:
+    sys.modules.pop(MAIN_MODULE, None)
+    return importlib.import_module(MAIN_MODULE)
+
+
+def test_import_main_module(benchmark: BenchmarkFixture) -> None:
+    """Benchmark importing the main module, add a benchmark like this for every hot function."""
+    module = benchmark(_import_main_module)
+    assert module.__name__ == MAIN_MODULE
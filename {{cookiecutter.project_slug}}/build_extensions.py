@@ -0,0 +1,65 @@
+"""Compile the modules listed in ``COMPILED_MODULES`` into C extensions, with {{ cookiecutter.compiled_extensions }}.
+
+Poetry runs this script when it builds a wheel or installs the package, see ``[tool.poetry.build]``
+in pyproject.toml. The extensions are built next to the modules, and Python imports them instead
+of the modules. If they cannot be compiled, as without {{ cookiecutter.compiled_extensions }} or a C compiler, the package is left
+in pure Python, except under cibuildwheel, which must not publish pure Python wheels tagged for a
+platform. Run ``invoke clean-build`` to remove the extensions, after changing the modules.
+"""
+
+import os
+import sys
+
+from setuptools import Distribution
+from setuptools.command.build_ext import build_ext
+from setuptools.errors import BaseError, CCompilerError, CompileError
+
+COMPILED_MODULES = ["src/{{ cookiecutter.project_slug }}/speedups.py"]
+
+
+def build() -> None:
+    """Compile the modules, and copy the extensions next to them.
+
+    Raise `ImportError` if {{ cookiecutter.compiled_extensions }} is not installed, and a
+    `CompileError` if it cannot translate the modules to C.
+    """
+    {%- if cookiecutter.compiled_extensions == "Cython" %}
+    from Cython.Build import cythonize
+    from Cython.Compiler.Errors import CompileError as CythonCompileError
+
+    try:
+        extensions = cythonize(COMPILED_MODULES, compiler_directives={"language_level": "3"})
+    except CythonCompileError as error:
+        raise CompileError(str(error)) from error
+    {%- else %}
+    from mypyc.build import mypycify
+
+    try:
+        # Leave out the configuration of mypy, whose plugins are not installed in the build
+        # environment
+        extensions = mypycify(["--config-file=", *COMPILED_MODULES], opt_level="3")
+    except SystemExit as error:
+        # mypyc exits after reporting the type errors of the modules
+        msg = f"mypyc cannot compile the modules (exit status {error.code})"
+        raise CompileError(msg) from error
+    {%- endif %}
+    distribution = Distribution(
+        {
+            "name": "{{ cookiecutter.project_slug }}",
+            "ext_modules": extensions,
+            "package_dir": {"": "src"},
+        }
+    )
+    command = build_ext(distribution)
+    command.inplace = True
+    command.ensure_finalized()
+    command.run()
+
+
+if __name__ == "__main__":
+    try:
+        build()
+    except (ImportError, BaseError, CCompilerError) as error:
+        if os.environ.get("CIBUILDWHEEL"):
+            raise
+        sys.stderr.write(f"The extensions are not compiled, falling back to pure Python: {error}\n")
@@ -0,0 +1,36 @@
+"""Hooks of MkDocs, rebuilding the API reference when the package changes.
+
+The hooks are listed by ``hooks`` in mkdocs.yml. ``invoke docs`` and ``invoke servedocs`` build with
+``--dirty``, which only rebuilds the pages whose Markdown file changed since their last build, so
+that mkdocstrings only extracts the API of the package, with griffe, when a rebuilt page documents
+it. A change of the package leaves the Markdown files unchanged: the pages with ``:::``
+identifiers are replaced by generated pages, which are always built, when a module of the package
+is newer than their output.
+"""
+
+import re
+from pathlib import Path
+
+from mkdocs.config.defaults import MkDocsConfig
+from mkdocs.structure.files import File, Files
+
+SOURCE_DIR = Path(__file__).parent.joinpath("src")
+# Identifiers of the objects documented by mkdocstrings, as ``::: package.module``
+API_IDENTIFIER = re.compile(r"^:::", re.MULTILINE)
+
+
+def on_files(files: Files, config: MkDocsConfig) -> Files:
+    """Rebuild the pages documenting the API, when the package is newer than them."""
+    newest = max((path.stat().st_mtime for path in SOURCE_DIR.rglob("*.py")), default=0.0)
+    for file in files.documentation_pages():
+        output = Path(file.abs_dest_path)
+        if output.is_file() and output.stat().st_mtime >= newest:
+            continue
+        content = file.content_string
+        if API_IDENTIFIER.search(content):
+            page = File.generated(config, file.src_uri, content=content, inclusion=file.inclusion)
+            # The page is still edited in its Markdown file
+            page.edit_uri = file.edit_uri
+            files.remove(file)
+            files.append(page)
+    return files
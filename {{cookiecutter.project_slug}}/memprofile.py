@@ -0,0 +1,35 @@
+"""Run a module as a script, with snapshots of the memory it allocates, for ``invoke memprofile``.
+
+The snapshots are taken with tracemalloc before and after the module runs, and dumped to files that
+the task compares. The module runs as with ``python -m``, and its exit does not stop the script.
+
+Usage: ``python memprofile.py START_SNAPSHOT END_SNAPSHOT MODULE [ARGS...]``
+"""
+
+import runpy
+import sys
+import tracemalloc
+from contextlib import suppress
+
+# Frames kept for each allocation, to group them by the line of the project that caused them
+TRACEBACK_LIMIT = 25
+
+
+def profile(start: str, end: str, module: str, args: list[str]) -> int:
+    """Run ``module`` with ``args``, dumping the snapshots to ``start`` and ``end``.
+
+    Return the peak size of the memory blocks traced while the module ran, in bytes.
+    """
+    sys.argv = [module, *args]
+    tracemalloc.start(TRACEBACK_LIMIT)
+    tracemalloc.take_snapshot().dump(start)
+    with suppress(SystemExit):
+        runpy.run_module(module, run_name="__main__", alter_sys=True)
+    tracemalloc.take_snapshot().dump(end)
+    return tracemalloc.get_traced_memory()[1]
+
+
+if __name__ == "__main__":
+    start, end, module, *args = sys.argv[1:]
+    peak = profile(start, end, module, args)
+    sys.stdout.write(f"Peak traced memory: {peak / 1024:.1f} KiB\n")
@@ -1,5 +1,36 @@
-"""Top-level package for {{ cookiecutter.project_name }}."""
+{%- from "submodules.jinja" import submodules with context -%}
+"""Top-level package for {{ cookiecutter.project_name }}.
+
+The submodules listed in ``__all__`` are imported when they are first accessed, following PEP 562,
+so that ``import {{ cookiecutter.project_slug }}`` stays fast however large the package grows. Add
+new public submodules to ``__all__``, and to ``__init__.pyi`` so that type checkers and IDEs know
+about them.
+"""
+
+import importlib
+from types import ModuleType
 
 __author__ = """{{ cookiecutter.full_name }}"""
 __email__ = "{{ cookiecutter.email }}"
 __version__ = "{{ cookiecutter.version }}"
+
+__all__: list[str] = [
+{%- for submodule in submodules %}
+    "{{ submodule }}",
+{%- endfor %}
+]
+
+
+def __getattr__(name: str) -> ModuleType:
+    """Import a submodule listed in ``__all__`` when it is first accessed."""
+    if name in __all__:
+        # Importing the submodule also sets it as an attribute of the package, so this function
+        # is only called on its first access
+        return importlib.import_module(f"{__name__}.{name}")
+    msg = f"module {__name__!r} has no attribute {name!r}"
+    raise AttributeError(msg)
+
+
+def __dir__() -> list[str]:
+    """List the attributes of the package, including the submodules not imported yet."""
+    return sorted({*globals(), *__all__})
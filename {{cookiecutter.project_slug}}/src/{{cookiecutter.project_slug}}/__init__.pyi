@@ -0,0 +1,16 @@
+{%- from "submodules.jinja" import submodules with context -%}
+# Type information of the package, whose submodules are imported lazily by __init__.py
+{%- for submodule in submodules %}
+from {{ cookiecutter.project_slug }} import {{ submodule }} as {{ submodule }}
+{%- endfor %}
+
+__author__: str
+__email__: str
+__version__: str
+__all__: list[str] = [
+{%- for submodule in submodules %}
+    "{{ submodule }}",
+{%- endfor %}
+]
+
+def __dir__() -> list[str]: ...
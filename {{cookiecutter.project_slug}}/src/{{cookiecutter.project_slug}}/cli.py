@@ -1,56 +1,294 @@
+{%- set command_line = cookiecutter.command_line_interface|lower -%}
+{%- set lazy = cookiecutter.cli_lazy_imports == 'y' -%}
+{%- set instrumentation = cookiecutter.with_instrumentation == 'y' -%}
+{%- set streaming = cookiecutter.with_streaming == 'y' -%}
+{%- set modules = (["instrumentation"] if instrumentation else []) + (["streaming"] if streaming else []) -%}
+{#- Arguments of `_run_command` after the echo function, given the names of the parsed options -#}
+{%- set options = (", profile_stats=" ~ ("args." if command_line == "argparse" else "") ~ "profile_stats" if instrumentation else "") ~ (", stream=" ~ ("args." if command_line == "argparse" else "") ~ "stream" if streaming else "") -%}
+{%- if lazy -%}
+"""Console script for {{cookiecutter.project_slug}}.
+
+Only the standard library is imported when this module is loaded: {% if command_line == 'click' %}Click{% elif command_line == 'typer' %}Typer{% else %}argparse{% endif %}, and the
+modules doing the actual work, are imported when a command runs, and ``--version`` is answered
+without importing them, so that the script starts quickly.
+"""
+{%- else -%}
 """Console script for {{cookiecutter.project_slug}}."""
+{%- endif %}
 
-{%- if cookiecutter.command_line_interface|lower == 'argparse' %}
+{% if command_line == 'argparse' and not lazy -%}
 import argparse
-{%- endif %}
+{% endif -%}
+{% if instrumentation -%}
+import atexit
+{% endif -%}
+{% if command_line != 'typer' or lazy -%}
 import sys
-{%- if cookiecutter.command_line_interface|lower == 'click' %}
-import click
+{% endif -%}
+from collections.abc import Callable
+{%- if lazy and command_line != 'argparse' %}
+from functools import cache
+from typing import {% if command_line == 'typer' %}TYPE_CHECKING, Annotated, Any{% else %}TYPE_CHECKING, Any{% endif %}
+
+if TYPE_CHECKING:
+    import {{ command_line }}
+{%- elif command_line == 'typer' and (instrumentation or streaming) %}
+from typing import Annotated
+{%- endif %}
+{%- if not lazy and command_line != 'argparse' %}
+
+import {{ command_line }}
+{%- endif %}
+{%- if not lazy and modules %}
+
+from {{cookiecutter.project_slug}} import {{ modules|join(", ") }}
 {%- endif %}
-{%- if cookiecutter.command_line_interface|lower == 'typer' %}
-import typer
+{%- if instrumentation %}
+
+PROFILE_STATS_HELP = (
+    "Write the statistics of the instrumented code to this file, as JSON if it ends with "
+    "'.json', else in the Prometheus text format."
+)
+{%- endif %}
+{%- if streaming %}
+
+STREAM_HELP = (
+    "Process the standard input line by line, and write the results to the standard output."
+)
+{%- endif %}
+
+
+def _run_command(
+    echo: Callable[[str], object],
+    {%- if command_line == 'argparse' %}
+    args: list[str],
+    {%- endif %}
+    {%- if instrumentation %}
+    profile_stats: str | None = None,
+    {%- endif %}
+    {%- if streaming %}
+    stream: bool = False,
+    {%- endif %}
+) -> None:
+    """Run the command of the console script, once the framework parsed its arguments."""
+    {%- if lazy and modules %}
+    # Import the modules doing the actual work here, and not at the top of the module
+    from {{cookiecutter.project_slug}} import {{ modules|join(", ") }}
+{% endif %}
+    {%- if instrumentation %}
+    if profile_stats:
+        instrumentation.enable()
+        atexit.register(instrumentation.write, profile_stats)
+    with instrumentation.measure("{{cookiecutter.project_slug}}.cli.main"):
+    {%- endif %}
+    {%- filter indent(4 if instrumentation else 0) %}
+    {%- if streaming %}
+    if stream:
+        streaming.run()
+        return
+    {%- endif %}
+    {%- if command_line == 'argparse' %}
+    echo("Arguments: " + str(args))
+    {%- endif %}
+    echo("Replace this message by putting your code into {{cookiecutter.project_slug}}.cli.main")
+    {%- if command_line == 'click' %}
+    echo("See click documentation at https://click.palletsprojects.com/")
+    {%- elif command_line == 'typer' %}
+    echo("See Typer documentation at https://typer.tiangolo.com/")
+    {%- endif %}
+    {%- endfilter %}
+{%- if lazy %}
+
+
+def _version() -> str:
+    from {{cookiecutter.project_slug}} import __version__
+
+    return __version__
 {%- endif %}
+{%- if command_line == 'click' %}
+{%- if lazy %}
 
-{%- if cookiecutter.command_line_interface|lower == 'click' %}
+
+@cache
+def _main() -> "click.Command":
+    """Build the command-line interface."""
+    import click
+
+    {% else %}
+
+
+{% endif %}
+{%- filter indent(4 if lazy else 0) -%}
 @click.command()
-def main(args=None):
+{%- if lazy %}
+@click.version_option(package_name="{{cookiecutter.project_slug}}", message="%(version)s")
+{%- endif %}
+{%- if instrumentation %}
+@click.option("--profile-stats", metavar="PATH", help=PROFILE_STATS_HELP)
+{%- endif %}
+{%- if streaming %}
+@click.option("--stream", is_flag=True, help=STREAM_HELP)
+{%- endif %}
+def main(
+    args: list[str] | None = None,
+    {%- if instrumentation %}
+    profile_stats: str | None = None,
+    {%- endif %}
+    {%- if streaming %}
+    stream: bool = False,
+    {%- endif %}
+) -> int:
     """Console script for {{cookiecutter.project_slug}}."""
-    click.echo("Replace this message by putting your code into "
-               "{{cookiecutter.project_slug}}.cli.main")
-    click.echo("See click documentation at https://click.palletsprojects.com/")
+    _run_command(click.echo{{ options }})
     return 0
+{%- endfilter %}
+{%- if lazy %}
+
+    return main
+
+
+def __getattr__(name: str) -> Any:
+    """Build the command-line interface when ``main`` is first accessed."""
+    if name == "main":
+        return _main()
+    msg = f"module {__name__!r} has no attribute {name!r}"
+    raise AttributeError(msg)
+
+
+def run() -> None:
+    """Run the console script, answering ``--version`` without importing Click."""
+    if sys.argv[1:] == ["--version"]:
+        sys.stdout.write(f"{_version()}\n")
+        return
+    _main()()
 {%- endif %}
+{%- elif command_line == 'typer' %}
+{%- if lazy %}
+
+
+@cache
+def _app() -> "typer.Typer":
+    """Build the command-line interface."""
+    import typer
+
+    app = typer.Typer()
+
+    def version_callback(value: bool) -> bool:
+        if value:
+            typer.echo(_version())
+            raise typer.Exit
+        # Typer passes the value returned by the callback on as the value of the option
+        return value
+
+    @app.command()
+    def main(
+        version: Annotated[
+            bool,
+            typer.Option(
+                "--version",
+                callback=version_callback,
+                is_eager=True,
+                help="Show the version and exit.",
+            ),
+        ] = False,
+        {%- if instrumentation %}
+        profile_stats: Annotated[
+            str, typer.Option(metavar="PATH", help=PROFILE_STATS_HELP, show_default=False)
+        ] = "",
+        {%- endif %}
+        {%- if streaming %}
+        stream: Annotated[bool, typer.Option("--stream", help=STREAM_HELP)] = False,
+        {%- endif %}
+    ) -> None:
+        """Console script for {{cookiecutter.project_slug}}."""
+        _run_command(typer.echo{{ options }})
+
+    return app
+
+
+def __getattr__(name: str) -> Any:
+    """Build the command-line interface when ``app`` is first accessed."""
+    if name == "app":
+        return _app()
+    msg = f"module {__name__!r} has no attribute {name!r}"
+    raise AttributeError(msg)
+
+
+def run() -> None:
+    """Run the console script, answering ``--version`` without importing Typer."""
+    if sys.argv[1:] == ["--version"]:
+        sys.stdout.write(f"{_version()}\n")
+        return
+    _app()()
+{%- else %}
+
 
-{%- if cookiecutter.command_line_interface|lower == 'typer' %}
 app = typer.Typer()
 
+
 @app.command()
-def main(args=None) -> None:
+def main(
+    args=None,
+    {%- if instrumentation %}
+    profile_stats: Annotated[
+        str, typer.Option(metavar="PATH", help=PROFILE_STATS_HELP, show_default=False)
+    ] = "",
+    {%- endif %}
+    {%- if streaming %}
+    stream: Annotated[bool, typer.Option("--stream", help=STREAM_HELP)] = False,
+    {%- endif %}
+) -> None:
     """Console script for {{cookiecutter.project_slug}}."""
-    typer.echo("Replace this message by putting your code into "
-               "{{cookiecutter.project_slug}}.cli.main")
-    typer.echo("See Typer documentation at https://typer.tiangolo.com/")
-    return None
-
+    _run_command(typer.echo{{ options }})
 {%- endif %}
+{%- else %}
 
 
-{%- if cookiecutter.command_line_interface|lower == 'argparse' %}
-def main():
+def main() -> int:
     """Console script for {{cookiecutter.project_slug}}."""
+    {%- if lazy %}
+    import argparse
+{% endif %}
     parser = argparse.ArgumentParser()
-    parser.add_argument('_', nargs='*')
+    parser.add_argument("_", nargs="*")
+    {%- if lazy %}
+    parser.add_argument("--version", action="store_true", help="show the version and exit")
+    {%- endif %}
+    {%- if instrumentation %}
+    parser.add_argument("--profile-stats", metavar="PATH", help=PROFILE_STATS_HELP)
+    {%- endif %}
+    {%- if streaming %}
+    parser.add_argument("--stream", action="store_true", help=STREAM_HELP)
+    {%- endif %}
     args = parser.parse_args()
-
-    print("Arguments: " + str(args._))
-    print("Replace this message by putting your code into "
-          "{{cookiecutter.project_slug}}.cli.main")
+    {%- if lazy %}
+    if args.version:
+        sys.stdout.write(f"{_version()}\n")
+        return 0
+    {%- endif %}
+    _run_command(print, args._{{ options }})
     return 0
+{%- if lazy %}
+
+
+def run() -> int:
+    """Run the console script, answering ``--version`` without importing argparse."""
+    if sys.argv[1:] == ["--version"]:
+        sys.stdout.write(f"{_version()}\n")
+        return 0
+    return main()
+{%- endif %}
 {%- endif %}
 
 
 if __name__ == "__main__":
-    {%- if not cookiecutter.command_line_interface|lower == 'typer' %}
+    {%- if lazy %}
+    {%- if command_line == 'argparse' %}
+    sys.exit(run())  # pragma: no cover
+    {%- else %}
+    run()  # pragma: no cover
+    {%- endif %}
+    {%- elif command_line != 'typer' %}
     sys.exit(main())  # pragma: no cover
     {%- else %}
     app()
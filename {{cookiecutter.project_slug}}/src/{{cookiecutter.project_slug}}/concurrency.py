@@ -0,0 +1,147 @@
+"""Concurrent execution of the commands of {{ cookiecutter.project_name }}.
+
+`run_async` awaits a coroutine function on many items with at most ``workers`` of them running at
+a time, which suits bulk I/O. `run_processes` calls a function on many items in a pool of worker
+processes, which suits CPU-bound work. Both return the results in the order of the items, and
+cancel the pending work on Ctrl+C (SIGINT) before raising `KeyboardInterrupt`, which Click, Typer
+and argparse scripts report as an aborted command.
+
+Examples
+--------
+>>> async def double(x: int) -> int:
+...     return 2 * x
+>>> run_async(double, range(5), workers=2)
+[0, 2, 4, 6, 8]
+"""
+
+import asyncio
+import signal
+from collections.abc import Awaitable, Callable, Coroutine, Iterable
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Coroutines running at a time in run_async, by default
+ASYNC_WORKERS = 16
+
+
+async def map_bounded(
+    func: Callable[[T], Awaitable[R]], items: Iterable[T], workers: int = ASYNC_WORKERS
+) -> list[R]:
+    """Await ``func`` on every item, with at most ``workers`` calls running at a time.
+
+    The items are consumed lazily, as the workers become free, so that ``items`` can be a
+    generator of any length. If a call raises an exception, the other calls are cancelled.
+
+    Parameters
+    ----------
+    func : Callable
+        Coroutine function to await on every item.
+    items : Iterable
+        Items to process.
+    workers : int, optional
+        Maximum number of calls running at a time.
+
+    Returns
+    -------
+    list
+        Results of the calls, in the order of the items.
+    """
+    if workers < 1:
+        msg = f"The number of workers must be positive, not {workers}"
+        raise ValueError(msg)
+    # The workers share the iterator, each taking the next item when its call ends
+    iterator = enumerate(items)
+    results: dict[int, R] = {}
+
+    async def worker() -> None:
+        for index, item in iterator:
+            results[index] = await func(item)
+
+    tasks = [asyncio.ensure_future(worker()) for _ in range(workers)]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        # Cancel the other workers on an error, or when this coroutine is cancelled
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    return [results[index] for index in range(len(results))]
+
+
+async def _cancel_on_sigint(coroutine: Coroutine[Any, Any, R]) -> R:
+    """Await a coroutine, cancelling it on SIGINT and then raising `KeyboardInterrupt`."""
+    loop = asyncio.get_running_loop()
+    task = asyncio.current_task()
+    interrupted = False
+
+    def interrupt() -> None:
+        nonlocal interrupted
+        interrupted = True
+        if task is not None:
+            task.cancel()
+
+    try:
+        loop.add_signal_handler(signal.SIGINT, interrupt)
+    except (NotImplementedError, RuntimeError):
+        # Signal handlers are not supported on Windows, or outside of the main thread
+        return await coroutine
+    try:
+        return await coroutine
+    except asyncio.CancelledError:
+        if interrupted:
+            raise KeyboardInterrupt from None
+        raise
+    finally:
+        loop.remove_signal_handler(signal.SIGINT)
+
+
+def run_async(
+    func: Callable[[T], Awaitable[R]], items: Iterable[T], workers: int = ASYNC_WORKERS
+) -> list[R]:
+    """Await ``func`` on every item in a new event loop, see `map_bounded`.
+
+    On SIGINT, the running calls are cancelled, and `KeyboardInterrupt` is raised once they have
+    handled their cancellation.
+    """
+    return asyncio.run(_cancel_on_sigint(map_bounded(func, items, workers)))
+
+
+def _ignore_sigint() -> None:
+    """Leave the handling of SIGINT to the parent process, in the worker processes."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def run_processes(
+    func: Callable[[T], R], items: Iterable[T], workers: int | None = None, chunksize: int = 1
+) -> list[R]:
+    """Call ``func`` on every item in a pool of worker processes.
+
+    On SIGINT, the calls not started yet are cancelled, and `KeyboardInterrupt` is raised once
+    the running calls end.
+
+    Parameters
+    ----------
+    func : Callable
+        Function to call on every item, which must be importable by the worker processes, like the
+        functions defined at the top level of a module.
+    items : Iterable
+        Items to process, which must be picklable.
+    workers : int, optional
+        Number of worker processes, the number of processors by default.
+    chunksize : int, optional
+        Number of items sent at once to a worker process, larger values speed up short calls.
+
+    Returns
+    -------
+    list
+        Results of the calls, in the order of the items.
+    """
+    with ProcessPoolExecutor(workers, initializer=_ignore_sigint) as executor:
+        try:
+            return list(executor.map(func, items, chunksize=chunksize))
+        except KeyboardInterrupt:
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
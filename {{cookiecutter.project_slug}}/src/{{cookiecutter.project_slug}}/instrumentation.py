@@ -0,0 +1,274 @@
+"""Instrumentation of the hot paths of {{ cookiecutter.project_name }}.
+
+Decorate a function with `instrument`, or wrap a block of code in `measure`, to record its number
+of calls, a histogram of its latency and the memory blocks it allocates. Nothing is recorded until
+`enable` is called, or while `recording`: until then, the wrappers only check a global flag, so
+they can be left in production code.
+
+The statistics are exported as JSON or in the Prometheus text format, to a file with `write`, or
+to a Prometheus Pushgateway with `push`.
+
+Examples
+--------
+>>> @instrument
+... def add(a: int, b: int) -> int:
+...     return a + b
+>>> with recording():
+...     add(1, 2)
+3
+>>> snapshot()[f"{__name__}.add"]["calls"]
+1
+>>> reset()
+"""
+
+import json
+import sys
+import threading
+from bisect import bisect_left
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from functools import wraps
+from http import HTTPStatus
+from http.client import HTTPConnection, HTTPSConnection
+from pathlib import Path
+from time import perf_counter
+from types import TracebackType
+from typing import Any, ParamSpec, TypeVar, overload
+from urllib.parse import urlsplit
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+# Upper bounds of the latency histogram buckets, in seconds, the last bucket being unbounded
+LATENCY_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)
+PROMETHEUS_PREFIX = "{{ cookiecutter.project_slug }}"
+
+
+@dataclass
+class Stats:
+    """Statistics of an instrumented function or block of code."""
+
+    calls: int = 0
+    seconds: float = 0.0
+    # Net number of memory blocks allocated by the calls, as counted by sys.getallocatedblocks
+    allocated_blocks: int = 0
+    # Number of calls in each latency bucket, not cumulative
+    buckets: list[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS) + 1))
+
+    def add(self, seconds: float, allocated_blocks: int) -> None:
+        """Add a call to the statistics."""
+        self.calls += 1
+        self.seconds += seconds
+        self.allocated_blocks += allocated_blocks
+        self.buckets[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+
+
+_enabled = False
+_stats: dict[str, Stats] = {}
+_lock = threading.Lock()
+
+
+def enable() -> None:
+    """Start recording the statistics."""
+    global _enabled  # noqa: PLW0603
+    _enabled = True
+
+
+def disable() -> None:
+    """Stop recording the statistics, keeping those recorded."""
+    global _enabled  # noqa: PLW0603
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    """Return whether the statistics are being recorded."""
+    return _enabled
+
+
+def reset() -> None:
+    """Forget the statistics recorded."""
+    with _lock:
+        _stats.clear()
+
+
+def record(name: str, seconds: float, allocated_blocks: int = 0) -> None:
+    """Record a call of the function or block of code ``name``."""
+    with _lock:
+        if name not in _stats:
+            _stats[name] = Stats()
+        _stats[name].add(seconds, allocated_blocks)
+
+
+class _Measure:
+    """Context manager recording the statistics of a block of code, while enabled."""
+
+    __slots__ = ("_blocks", "_start", "name")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._start = 0.0
+        self._blocks = 0
+
+    def __enter__(self) -> None:
+        if _enabled:
+            self._blocks = sys.getallocatedblocks()
+            self._start = perf_counter()
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        if _enabled and self._start:
+            seconds = perf_counter() - self._start
+            record(self.name, seconds, sys.getallocatedblocks() - self._blocks)
+        self._start = 0.0
+
+
+def measure(name: str) -> _Measure:
+    """Return a context manager recording the statistics of a block of code, while enabled.
+
+    Parameters
+    ----------
+    name : str
+        Name of the block of code in the statistics.
+    """
+    return _Measure(name)
+
+
+@overload
+def instrument(func: Callable[P, R], /) -> Callable[P, R]: ...
+
+
+@overload
+def instrument(*, name: str | None = None) -> Callable[[Callable[P, R]], Callable[P, R]]: ...
+
+
+def instrument(
+    func: Callable[P, R] | None = None, /, *, name: str | None = None
+) -> Callable[P, R] | Callable[[Callable[P, R]], Callable[P, R]]:
+    """Decorate a function to record the statistics of its calls, while enabled.
+
+    Parameters
+    ----------
+    func : Callable
+        Function to instrument, when used as ``@instrument``.
+    name : str, optional
+        Name of the function in the statistics, its qualified name by default.
+    """
+
+    def decorator(func: Callable[P, R]) -> Callable[P, R]:
+        key = name or f"{func.__module__}.{func.__qualname__}"
+
+        @wraps(func)
+        def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            if not _enabled:
+                return func(*args, **kwargs)
+            blocks = sys.getallocatedblocks()
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(key, perf_counter() - start, sys.getallocatedblocks() - blocks)
+
+        return wrapper
+
+    return decorator if func is None else decorator(func)
+
+
+def snapshot() -> dict[str, dict[str, Any]]:
+    """Return a copy of the statistics recorded, by function or block of code."""
+    with _lock:
+        return {name: asdict(stats) for name, stats in sorted(_stats.items())}
+
+
+def to_json() -> str:
+    """Return the statistics recorded as JSON."""
+    return json.dumps({"latency_buckets": LATENCY_BUCKETS, "stats": snapshot()}, indent=2)
+
+
+def _labels(name: str, **labels: str) -> str:
+    """Format the labels of a Prometheus sample of the function or block of code ``name``."""
+    escaped = name.replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+    pairs = [f'function="{escaped}"', *(f'{key}="{value}"' for key, value in labels.items())]
+    return "{" + ",".join(pairs) + "}"
+
+
+def to_prometheus() -> str:
+    """Return the statistics recorded in the Prometheus text exposition format."""
+    stats = snapshot()
+    calls = f"{PROMETHEUS_PREFIX}_calls_total"
+    latency = f"{PROMETHEUS_PREFIX}_latency_seconds"
+    blocks = f"{PROMETHEUS_PREFIX}_allocated_blocks"
+    lines = [f"# HELP {calls} Number of calls.", f"# TYPE {calls} counter"]
+    lines += [f"{calls}{_labels(name)} {s['calls']}" for name, s in stats.items()]
+    lines += [f"# HELP {latency} Latency of the calls.", f"# TYPE {latency} histogram"]
+    for name, s in stats.items():
+        cumulative = 0
+        for bound, count in zip([*LATENCY_BUCKETS, "+Inf"], s["buckets"], strict=True):
+            cumulative += count
+            lines.append(f"{latency}_bucket{_labels(name, le=str(bound))} {cumulative}")
+        lines.append(f"{latency}_sum{_labels(name)} {s['seconds']}")
+        lines.append(f"{latency}_count{_labels(name)} {s['calls']}")
+    lines += [f"# HELP {blocks} Net number of memory blocks allocated.", f"# TYPE {blocks} gauge"]
+    lines += [f"{blocks}{_labels(name)} {s['allocated_blocks']}" for name, s in stats.items()]
+    return "\n".join(lines) + "\n"
+
+
+def write(path: str | Path) -> None:
+    """Write the statistics recorded to a file, as JSON if its suffix is ``.json``.
+
+    Any other suffix, like ``.prom`` or ``.txt``, writes them in the Prometheus text format, which
+    the textfile collector of the Prometheus node exporter reads.
+    """
+    path = Path(path)
+    path.write_text(to_json() if path.suffix == ".json" else to_prometheus(), encoding="utf-8")
+
+
+def push(url: str, job: str = PROMETHEUS_PREFIX, timeout: float = 10) -> None:
+    """Push the statistics recorded to a Prometheus Pushgateway.
+
+    Parameters
+    ----------
+    url : str
+        URL of the Pushgateway, like ``http://localhost:9091``.
+    job : str, optional
+        Job label of the statistics.
+    timeout : float, optional
+        Timeout of the request, in seconds.
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https"):
+        msg = f"The URL of the Pushgateway must be http or https, not {url!r}"
+        raise ValueError(msg)
+    connection_class = HTTPSConnection if parts.scheme == "https" else HTTPConnection
+    connection = connection_class(parts.netloc, timeout=timeout)
+    try:
+        connection.request(
+            "POST",
+            f"{parts.path.rstrip('/')}/metrics/job/{job}",
+            body=to_prometheus().encode(),
+            headers={"Content-Type": "text/plain; version=0.0.4"},
+        )
+        response = connection.getresponse()
+        if response.status >= HTTPStatus.BAD_REQUEST:
+            msg = f"The Pushgateway answered {response.status} {response.reason}"
+            raise OSError(msg)
+    finally:
+        connection.close()
+
+
+@contextmanager
+def recording(path: str | Path | None = None) -> Iterator[None]:
+    """Record the statistics while the block runs, writing them to ``path`` at its end, if given."""
+    was_enabled = _enabled
+    enable()
+    try:
+        yield
+    finally:
+        if not was_enabled:
+            disable()
+        if path:
+            write(path)
@@ -0,0 +1,120 @@
+"""Data models of {{ cookiecutter.project_name }}, validated in bulk with Pydantic.
+
+Validating records one by one, with ``Record(**item)`` or `Record.model_validate`, crosses from
+Python into the Rust core of Pydantic once per record. `validate_records` validates a whole batch
+in a single call of a `pydantic.TypeAdapter`, and `validate_records_json` parses and validates raw
+JSON without building the intermediate dictionaries. Building an adapter compiles a validator,
+which is slow, so the adapters are built once and cached by `adapter`. Trusted data, such as rows
+read back from our own storage, can skip the validation with `construct_records`. Run
+``invoke bench`` to compare them on a million records.
+
+Examples
+--------
+>>> validate_records([{"id": 1, "name": "first", "score": "0.5"}])
+[Record(id=1, name='first', score=0.5, tags=[])]
+"""
+
+import functools
+from collections.abc import Iterable, Mapping
+from typing import Any, TypeVar
+
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
+
+T = TypeVar("T")
+
+
+class Record(BaseModel):
+    """Sample record, replace its fields with the ones of the package."""
+
+    # Reject the unknown fields, rather than silently dropping them
+    model_config = ConfigDict(extra="forbid")
+
+    id: int
+    name: str
+    score: float
+    tags: list[str] = Field(default_factory=list)
+
+
+@functools.cache
+def adapter(type_: type[T]) -> TypeAdapter[T]:
+    """Return the adapter validating ``type_``, built on the first call only.
+
+    Parameters
+    ----------
+    type_ : type
+        Type to validate, such as ``list[Record]``.
+
+    Returns
+    -------
+    pydantic.TypeAdapter
+        Adapter validating Python objects and JSON data to ``type_``.
+    """
+    return TypeAdapter(type_)
+
+
+def _records_adapter() -> TypeAdapter[list[Record]]:
+    """Return the cached adapter validating lists of records."""
+    return adapter(list[Record])
+
+
+def validate_records(items: Iterable[Mapping[str, Any]]) -> list[Record]:
+    """Validate a batch of records in a single call.
+
+    Parameters
+    ----------
+    items : Iterable
+        Fields of the records, as mappings.
+
+    Returns
+    -------
+    list
+        Validated records.
+
+    Raises
+    ------
+    pydantic.ValidationError
+        If records are invalid, with their index in the location of the errors.
+    """
+    return _records_adapter().validate_python(list(items))
+
+
+def validate_records_json(data: str | bytes) -> list[Record]:
+    """Parse and validate a JSON array of records in a single call.
+
+    Parameters
+    ----------
+    data : str or bytes
+        JSON array of the fields of the records.
+
+    Returns
+    -------
+    list
+        Validated records.
+
+    Raises
+    ------
+    pydantic.ValidationError
+        If the JSON data or records are invalid.
+    """
+    return _records_adapter().validate_json(data)
+
+
+def construct_records(items: Iterable[Mapping[str, Any]]) -> list[Record]:
+    """Build records without validating them, for trusted data only.
+
+    The fields are neither converted nor checked, so that invalid data gives invalid records
+    instead of an error: use `validate_records` for any data coming from outside the package.
+    Skipping the validation pays off for fields with costly validators, whereas the Rust core of
+    Pydantic validates plain fields, as the sample ones, faster than they are constructed in Python.
+
+    Parameters
+    ----------
+    items : Iterable
+        Fields of the records, as mappings of valid values.
+
+    Returns
+    -------
+    list
+        Records, not validated.
+    """
+    return [Record.model_construct(**item) for item in items]
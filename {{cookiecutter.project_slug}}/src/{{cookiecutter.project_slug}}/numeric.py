@@ -0,0 +1,80 @@
+"""Numeric computations of {{ cookiecutter.project_name }}, vectorized with NumPy.
+
+Every computation comes in two flavours: a vectorized one working on whole NumPy arrays, which
+runs in compiled loops, and a naive pure Python reference, which is slow but obviously correct,
+and against which the tests check the vectorized one. The vectorized computations can also run by
+batches, so that their intermediate arrays fit in memory whatever the size of the input.
+
+Examples
+--------
+>>> pairwise_distances([[0.0, 0.0], [3.0, 4.0]])
+array([[0., 5.],
+       [5., 0.]])
+"""
+
+import math
+from collections.abc import Sequence
+
+import numpy as np
+import numpy.typing as npt
+
+
+def distances(points: npt.ArrayLike, others: npt.ArrayLike) -> npt.NDArray[np.float64]:
+    """Compute the Euclidean distances between points, vectorized.
+
+    Parameters
+    ----------
+    points : array_like
+        Points, of shape ``(n, d)``.
+    others : array_like
+        Other points, of shape ``(m, d)``.
+
+    Returns
+    -------
+    numpy.ndarray
+        Distances between every point and every other point, of shape ``(n, m)``.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    others = np.asarray(others, dtype=np.float64)
+    # Broadcast the points against the other points into differences of shape (n, m, d)
+    differences = points[:, np.newaxis, :] - others[np.newaxis, :, :]
+    squares: npt.NDArray[np.float64] = np.einsum("ijk,ijk->ij", differences, differences)
+    return np.sqrt(squares)
+
+
+def pairwise_distances(
+    points: npt.ArrayLike, batch_size: int | None = None
+) -> npt.NDArray[np.float64]:
+    """Compute the Euclidean distances between every pair of points, vectorized.
+
+    Parameters
+    ----------
+    points : array_like
+        Points, of shape ``(n, d)``.
+    batch_size : int, optional
+        Number of rows of the distances computed at once, which bounds the memory used by the
+        intermediate arrays to ``batch_size * n * d`` numbers. All of them by default.
+
+    Returns
+    -------
+    numpy.ndarray
+        Distances between every pair of points, of shape ``(n, n)``.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    if batch_size is None:
+        return distances(points, points)
+    if batch_size < 1:
+        msg = f"The batch size must be positive, not {batch_size}"
+        raise ValueError(msg)
+    result = np.empty((len(points), len(points)))
+    for start in range(0, len(points), batch_size):
+        result[start : start + batch_size] = distances(points[start : start + batch_size], points)
+    return result
+
+
+def pairwise_distances_reference(points: Sequence[Sequence[float]]) -> list[list[float]]:
+    """Compute the Euclidean distances between every pair of points, in pure Python.
+
+    This is the reference implementation of `pairwise_distances`, see it for the parameters.
+    """
+    return [[math.dist(point, other) for other in points] for point in points]
@@ -0,0 +1,36 @@
+"""Hot loops of {{ cookiecutter.project_name }}, compiled into a C extension.
+
+When the package is built or installed, ``build_extensions.py`` compiles this module with
+{{ cookiecutter.compiled_extensions }}, and Python imports the extension instead of it. Without the extension, as when
+there is no C compiler, this module is imported as is, so it must remain plain, fully typed
+Python. Move the hot functions of the package here, or add their modules to ``COMPILED_MODULES``
+in ``build_extensions.py``.
+
+pytest does not collect the doctests of this module, which it cannot find in the extension: test
+it in ``tests/test_speedups.py``.
+"""
+
+
+def count_primes(limit: int) -> int:
+    """Count the prime numbers lower than ``limit``, by trial division.
+
+    Parameters
+    ----------
+    limit : int
+        Upper bound, excluded, of the numbers.
+
+    Returns
+    -------
+    int
+        Number of prime numbers lower than ``limit``.
+    """
+    count = 0
+    for number in range(2, limit):
+        divisor = 2
+        while divisor * divisor <= number:
+            if number % divisor == 0:
+                break
+            divisor += 1
+        else:
+            count += 1
+    return count
@@ -0,0 +1,177 @@
+r"""Streaming of the records of the standard input of {{ cookiecutter.project_name }}.
+
+The records are read lazily by chunks of the input, go through a pipeline of generator stages,
+and are written back in bulk, so that the memory used does not depend on the size of the input.
+The output gathered so far is written as soon as the input has nothing more to read, so that the
+records of a slow producer, as ``tail -f``, come out without waiting for a full buffer.
+As each stage only asks for a record when the next one needs it, a slow reader of the output
+blocks the writes, which in turn stops the reads: the whole pipeline works at the pace of its
+slowest end.
+
+The records are bytes, without their separator, so that they are only decoded by the stages
+that need it.
+
+Examples
+--------
+>>> import io
+>>> def upper(records):
+...     for record in records:
+...         yield record.upper()
+>>> output = io.BytesIO()
+>>> write_records(pipeline(read_records(io.BytesIO(b"a\n\nb\n")), process, upper), output)
+2
+>>> output.getvalue()
+b'A\nB\n'
+"""
+
+import os
+import sys
+from collections.abc import Callable, Iterable, Iterator
+from typing import BinaryIO
+
+# Size in bytes of the chunks read from the input, and of the writes to the output
+CHUNK_SIZE = 64 * 1024
+BUFFER_SIZE = 64 * 1024
+
+Stage = Callable[[Iterable[bytes]], Iterable[bytes]]
+
+
+def read_records(
+    stream: BinaryIO,
+    separator: bytes = b"\n",
+    chunk_size: int = CHUNK_SIZE,
+    on_wait: Callable[[], object] | None = None,
+) -> Iterator[bytes]:
+    """Yield the records of a binary stream, reading it by chunks of the bytes available.
+
+    Parameters
+    ----------
+    stream : BinaryIO
+        Stream to read.
+    separator : bytes, optional
+        End of every record, the last record of the stream may lack it.
+    chunk_size : int, optional
+        Most bytes read at once.
+    on_wait : Callable, optional
+        Called before reading again when the last read was short, as the next one may wait for
+        the stream.
+
+    Yields
+    ------
+    bytes
+        Records of the stream, without their separator.
+    """
+    # Unlike ``read``, ``read1`` returns the bytes available instead of waiting for ``chunk_size``
+    read = getattr(stream, "read1", stream.read)
+    overlap = len(separator) - 1
+    # Pieces of the record continuing in the next chunk, joined once its separator is read
+    pieces: list[bytes] = []
+    while chunk := read(chunk_size):
+        short = len(chunk) < chunk_size
+        if pieces and overlap:
+            # A separator may start at the end of the previous chunk
+            last = pieces.pop()
+            pieces.append(last[:-overlap])
+            chunk = last[-overlap:] + chunk
+        *records, last = chunk.split(separator)
+        if records:
+            records[0] = b"".join([*pieces, records[0]])
+            pieces.clear()
+        pieces.append(last)
+        yield from records
+        if short and on_wait is not None:
+            on_wait()
+    if rest := b"".join(pieces):
+        yield rest
+
+
+def pipeline(records: Iterable[bytes], *stages: Stage) -> Iterable[bytes]:
+    """Chain generator stages, each of them taking the records yielded by the previous one."""
+    for stage in stages:
+        records = stage(records)
+    return records
+
+
+def process(records: Iterable[bytes]) -> Iterator[bytes]:
+    """Process the records, replace this sample stage, which drops the blank ones, by your own."""
+    for record in records:
+        if record.strip():
+            yield record
+
+
+def write_records(
+    records: Iterable[bytes],
+    stream: BinaryIO,
+    separator: bytes = b"\n",
+    buffer_size: int = BUFFER_SIZE,
+    buffer: bytearray | None = None,
+) -> int:
+    """Write records to a binary stream, gathering them into writes of ``buffer_size`` bytes.
+
+    Parameters
+    ----------
+    records : Iterable
+        Records to write.
+    stream : BinaryIO
+        Stream to write to.
+    separator : bytes, optional
+        Bytes written after every record.
+    buffer_size : int, optional
+        Number of bytes gathered before writing them.
+    buffer : bytearray, optional
+        Buffer gathering the bytes, that the caller may write out earlier, see `run`.
+
+    Returns
+    -------
+    int
+        Number of records written.
+    """
+    buffer = bytearray() if buffer is None else buffer
+    count = 0
+    for record in records:
+        buffer += record
+        buffer += separator
+        count += 1
+        if len(buffer) >= buffer_size:
+            stream.write(buffer)
+            buffer.clear()
+    stream.write(buffer)
+    stream.flush()
+    return count
+
+
+def run(
+    source: BinaryIO | None = None,
+    sink: BinaryIO | None = None,
+    stages: Iterable[Stage] = (process,),
+) -> None:
+    """Stream the lines of ``source`` through ``stages`` to ``sink``.
+
+    Parameters
+    ----------
+    source : BinaryIO, optional
+        Stream to read, the standard input by default.
+    sink : BinaryIO, optional
+        Stream to write to, the standard output by default.
+    stages : Iterable, optional
+        Generator stages processing the lines.
+    """
+    source = sys.stdin.buffer if source is None else source
+    sink = sys.stdout.buffer if sink is None else sink
+    buffer = bytearray()
+
+    def flush() -> None:
+        # The input has nothing more to read for now: write the output of what it had
+        sink.write(buffer)
+        buffer.clear()
+        sink.flush()
+
+    try:
+        records = read_records(source, on_wait=flush)
+        write_records(pipeline(records, *stages), sink, buffer=buffer)
+    except BrokenPipeError:
+        # The reader of the output exited early, as `head` does: discard the rest of the output,
+        # instead of failing again when the interpreter flushes it at exit
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sink.fileno())
+        os.close(devnull)
@@ -4,12 +4,22 @@ Tasks for maintaining the {{ cookiecutter.project_name }} package.
 Execute 'invoke --list' for guidance on using Invoke
 """
 
+import atexit
+import functools
+import hashlib
 import logging
 import os
 import platform
+import pstats
 import shutil
+import subprocess
+import sys
+import time
+import tracemalloc
 import webbrowser
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Any
 
 from invoke.context import Context
 from invoke.exceptions import Failure
@@ -26,17 +36,85 @@ COVERAGE_FILE = ROOT_DIR.joinpath(".coverage")
 COVERAGE_DIR = ROOT_DIR.joinpath("htmlcov")
 COVERAGE_REPORT = COVERAGE_DIR.joinpath("index.html")
 DOCS_DIR = ROOT_DIR.joinpath("docs")
-DOCS_BUILD_DIR = DOCS_DIR.joinpath("site")
+DOCS_BUILD_DIR = ROOT_DIR.joinpath("site")
 DOCS_INDEX = DOCS_BUILD_DIR.joinpath("index.html")
+DOCS_HASH_FILE = DOCS_BUILD_DIR.joinpath(".sources.sha256")
+REPORTS_DIR = ROOT_DIR.joinpath("reports")
+SLOWEST_TESTS = 10
+PROFILE_FILE = REPORTS_DIR.joinpath("profile.prof")
+PROFILE_REPORT = REPORTS_DIR.joinpath("profile.txt")
+IMPORTTIME_FILE = REPORTS_DIR.joinpath("importtime.log")
+IMPORTTIME_REPORT = REPORTS_DIR.joinpath("importtime.txt")
+MEMPROFILE_RUNNER = ROOT_DIR.joinpath("memprofile.py")
+MEMPROFILE_START = REPORTS_DIR.joinpath("memprofile-start.tracemalloc")
+MEMPROFILE_END = REPORTS_DIR.joinpath("memprofile-end.tracemalloc")
+MEMPROFILE_REPORT = REPORTS_DIR.joinpath("memprofile.txt")
+{%- if cookiecutter.with_benchmarks == "y" %}
+BENCHMARKS_DIR = ROOT_DIR.joinpath("benchmarks")
+BENCHMARKS_STORAGE = ROOT_DIR.joinpath(".benchmarks")
+BENCHMARKS_REPORT = REPORTS_DIR.joinpath("benchmarks.json")
+PYTHON_DIRS = [str(d) for d in [SOURCE_DIR, TEST_DIR, BENCHMARKS_DIR]]
+{%- else %}
 PYTHON_DIRS = [str(d) for d in [SOURCE_DIR, TEST_DIR]]
+{%- endif %}
+# Commands run from the virtual environment of the project, without `poetry run`
+DIRECT_RUNS: list[str] = []
 
 
 def _delete_file(file: Path) -> None:
     file.unlink(missing_ok=True)
 
-def _run(c: Context, command: str, ignore_failure: bool = False) -> Result | None:
+
+@functools.cache
+def _venv() -> tuple[Path, float] | None:
+    """Return the virtual environment of the project, with the time Poetry took to find it.
+
+    The environment is resolved once per invoke session, so that the commands run the tools it
+    installed directly, instead of starting Poetry with ``poetry run`` for every one of them.
+    Returns None when the project has no environment yet.
+    """
+    if virtual_env := os.environ.get("VIRTUAL_ENV"):
+        return Path(virtual_env), 0.0
+    poetry = shutil.which("poetry")
+    if poetry is None:
+        return None
+    start = time.perf_counter()
+    command = [poetry, "env", "info", "--path"]
+    process = subprocess.run({% if cookiecutter.development_environment == "strict" %}  # noqa: S603{% endif %}
+        command, capture_output=True, text=True, check=False, cwd=ROOT_DIR
+    )
+    if process.returncode != 0 or not process.stdout.strip():
+        return None
+    return Path(process.stdout.strip()), time.perf_counter() - start
+
+
+@atexit.register
+def _report_direct_runs() -> None:
+    """Report the commands run without ``poetry run``, and the time that saved."""
+    if not DIRECT_RUNS or (venv := _venv()) is None:
+        return
+    env_dir, poetry_time = venv
+    message = f"Ran {len(DIRECT_RUNS)} commands from {env_dir} without `poetry run`"
+    if poetry_time:
+        # Finding the environment took as long as starting one `poetry run`
+        message += f", saving about {poetry_time * (len(DIRECT_RUNS) - 1):.1f}s"
+    sys.stdout.write(f"{message}\n")
+
+
+def _run(c: Context, command: str, ignore_failure: bool = False, **kwargs: Any) -> Result | None:
+    kwargs.setdefault("pty", platform.system() != "Windows")
+    venv = _venv()
+    if venv is None:
+        command = f"poetry run {command}"
+    else:
+        # Put the environment first in the PATH, as `poetry run` does
+        env_dir = venv[0]
+        bin_dir = env_dir.joinpath("Scripts" if platform.system() == "Windows" else "bin")
+        path = os.pathsep.join([str(bin_dir), os.environ.get("PATH", "")])
+        kwargs["env"] = {**kwargs.get("env", {}), "VIRTUAL_ENV": str(env_dir), "PATH": path}
+        DIRECT_RUNS.append(command)
     try:
-        return c.run(f"poetry run {command}", pty=platform.system() != "Windows")
+        return c.run(command, **kwargs)
     except Failure:
         if ignore_failure:
             return None
@@ -44,53 +122,122 @@ def _run(c: Context, command: str, ignore_failure: bool = False) -> Result | Non
 
 
 # Lint, formatting, type checking
-@task
-def type_check(c: Context, ignore_failure: bool = False) -> None:
+def _type_check_command(daemon: bool = False) -> str:
+    if daemon:
+        # The daemon keeps the types of the unchanged modules in memory, but has no JUnit report
+        return "dmypy run -- ."
+    return "mypy --junit-xml reports/mypy.xml ."
+
+
+def _ruff_check_command(check: bool = True) -> str:
+    check_str = "--no-fix" if check else ""
+    return "ruff check {} {}".format(check_str, " ".join(PYTHON_DIRS))
+{%- if cookiecutter.formatter|lower == 'black' %}
+
+
+def _black_command(check: bool = True) -> str:
+    black = "black --check" if check else "black"
+    return "{} {}".format(black, " ".join(PYTHON_DIRS))
+{%- elif cookiecutter.formatter|lower == 'ruff-format' %}
+
+
+def _ruff_format_command(check: bool = True) -> str:
+    check_str = "--check" if check else ""
+    return "ruff format {} {}".format(check_str, " ".join(PYTHON_DIRS))
+{%- endif %}
+
+
+def _lint_commands(check: bool, daemon: bool) -> dict[str, str]:
+    """Return the command of every checker run by ``lint``, by name."""
+    commands = {"ruff": _ruff_check_command(check)}
+    {%- if cookiecutter.formatter|lower == 'black' %}
+    commands["black"] = _black_command(check)
+    {%- elif cookiecutter.formatter|lower == 'ruff-format' %}
+    commands["ruff format"] = _ruff_format_command(check)
+    {%- endif %}
+    commands["mypy"] = _type_check_command(daemon)
+    return commands
+
+
+def _timed_run(c: Context, command: str) -> tuple[Result | None, float]:
+    """Run a command, capturing its output, and return its result with its duration."""
+    start = time.perf_counter()
+    result = _run(c, command, hide=True, warn=True, pty=False)
+    return result, time.perf_counter() - start
+
+
+@task(help={"daemon": "Use the mypy daemon, which stays running to check again faster"})
+def type_check(c: Context, ignore_failure: bool = False, daemon: bool = False) -> None:
     """Type checking with mypy."""
-    _run(c, "mypy --junit-xml reports/mypy.xml .", ignore_failure)
+    _run(c, _type_check_command(daemon), ignore_failure)
 
 
 @task(help={"check": "Only checks without making changes (bool)"})
 def lint_ruff(c: Context, check: bool = True, ignore_failure: bool = False) -> None:
     """Check style with Ruff."""
-    check_str = "--no-fix" if check else ""
-    _run(c, "ruff check {} {}".format(check_str, " ".join(PYTHON_DIRS)), ignore_failure)
+    _run(c, _ruff_check_command(check), ignore_failure)
 {%- if cookiecutter.formatter|lower == 'black' %}
 
 
 @task(help={"check": "Only checks without making changes"})
-def format_black(c: Context, check = True, ignore_failure: bool = False) -> None:
+def format_black(c: Context, check: bool = True, ignore_failure: bool = False) -> None:
     """Check style with black."""
-    check_str = "--check" if check else ""
-    _run(c, "black --check {} {}".format(check_str, " ".join(PYTHON_DIRS)), ignore_failure)
+    _run(c, _black_command(check), ignore_failure)
 {%- elif cookiecutter.formatter|lower == 'ruff-format' %}
 
 
 @task(help={"check": "Only checks without making changes (bool)"})
 def format_ruff(c: Context, check: bool = True, ignore_failure: bool = False) -> None:
     """Check style with Ruff Formatter."""
-    check_str = "--check" if check else ""
-    _run(c, "ruff format {} {}".format(check_str, " ".join(PYTHON_DIRS)), ignore_failure)
+    _run(c, _ruff_format_command(check), ignore_failure)
 {%- endif %}
 
 
-@task(help={"check": "Only checks, without making changes"})
-def lint(c: Context, check: bool = True) -> None:
-    """Run all linting/formatting."""
-    lint_ruff(c, check, True)
-    {%- if cookiecutter.formatter|lower == 'black' %}
-    format_black(c, check, True)
-    {%- elif cookiecutter.formatter|lower == 'ruff-format' %}
-    format_ruff(c, check, True)
-    {%- endif %}
-    type_check(c, True)
+@task(
+    help={
+        "check": "Only checks, without making changes",
+        "sequential": "Run the checkers one after the other",
+        "daemon": "Use the mypy daemon, which stays running to check again faster",
+    }
+)
+def lint(c: Context, check: bool = True, sequential: bool = False, daemon: bool = False) -> None:
+    """Run all linting/formatting, the checkers in parallel, and report the time of each."""
+    commands = _lint_commands(check, daemon)
+    # Without check, the checkers fix the files that the others read
+    workers = 1 if sequential or not check else len(commands)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(workers) as executor:
+        runs = executor.map(functools.partial(_timed_run, c), commands.values())
+        results = dict(zip(commands, runs, strict=True))
+    total = time.perf_counter() - start
+
+    summary = []
+    for name, (result, seconds) in results.items():
+        status = "passed" if result is not None and result.ok else "failed"
+        if result is not None:
+            sys.stdout.write(result.stdout + result.stderr)
+        summary.append(f"{name:>12} {seconds:7.2f}s  {status}\n")
+    sys.stdout.write("".join(["\nLint timings:\n", *summary, f"{'total':>12} {total:7.2f}s\n"]))
 
 
 # Tests
-@task(help={"tox_env": "Environment name to run the test"})
-def test(c: Context, tox_env: str = "py311") -> None:
-    """Run tests with tox."""
-    _run(c, f"tox -e {tox_env}")
+@task(
+    help={
+        "tox_env": "Environment name to run the test",
+        "workers": "Run the tests in N processes with pytest-xdist, without tox",
+    }
+)
+def test(c: Context, tox_env: str = "py311", workers: int = 0) -> None:
+    """Run tests with tox, or in parallel processes with pytest-xdist."""
+    if workers:
+        # pytest-cov combines the coverage data of the workers, reported with the slowest tests
+        _run(
+            c,
+            f"pytest --numprocesses {workers} --dist worksteal --cov --cov-report=term"
+            f" --durations={SLOWEST_TESTS}",
+        )
+    else:
+        _run(c, f"tox -e {tox_env}")
 
 
 @task
@@ -99,10 +246,10 @@ def test_pytest(c: Context) -> None:
     _run(c, "pytest")
 
 
-@task
-def test_all(c: Context) -> None:
-    """Run tests on every Python version with tox."""
-    _run(c, "tox")
+@task(help={"sequential": "Run the environments one after the other"})
+def test_all(c: Context, sequential: bool = False) -> None:
+    """Run tests on every Python version with tox, the environments in parallel."""
+    _run(c, "tox" if sequential else "tox run-parallel")
 
 
 @task(help={"publish": "Publish the result via coveralls"})
@@ -121,6 +268,143 @@ def coverage(c: Context, publish: bool = False) -> None:
         # Build a local report
         _run(c, "coverage html")
         webbrowser.open(COVERAGE_REPORT.as_uri())
+{%- if cookiecutter.with_benchmarks == "y" %}
+
+
+# Benchmarks
+@task(
+    help={
+        "save_baseline": "Save the results as the baseline of the later comparisons",
+        "compare": "Compare against the last saved baseline, failing on regressions",
+        "threshold": "Increase of the mean time, in percent, considered a regression",
+    }
+)
+def bench(
+    c: Context, save_baseline: bool = False, compare: bool = False, threshold: int = 10
+) -> None:
+    """Run the benchmarks, apart from the unit tests."""
+    # The benchmarks are not in the pytest testpaths, so that the unit tests stay fast
+    options = [
+        f"--benchmark-storage={BENCHMARKS_STORAGE.as_uri()}",
+        f"--benchmark-json={BENCHMARKS_REPORT}",
+        "--junitxml=reports/benchmarks.xml",
+    ]
+    if save_baseline:
+        options.append("--benchmark-save=baseline")
+    if compare:
+        # pytest-benchmark fails when this machine has no saved run to compare against
+        options.append("--benchmark-compare")
+        options.append(f"--benchmark-compare-fail=mean:{threshold}%")
+    _run(c, "pytest {} --benchmark-only {}".format(BENCHMARKS_DIR, " ".join(options)))
+{%- endif %}
+
+
+# Profiling
+def _profile_target(test: str, args: str) -> str:
+    """Return the arguments of ``python`` to run the CLI, or the tests, for profiling."""
+    if test:
+        return f"-m pytest {test} {args}"
+    {%- if cookiecutter.command_line_interface|lower != "no command-line interface" %}
+    return f"-m {{ cookiecutter.project_slug }}.cli {args}"
+    {%- else %}
+    return f"-m pytest {TEST_DIR} {args}"
+    {%- endif %}
+
+
+# Module, cumulative import time in microseconds, and the modules it imports
+ImportNode = tuple[str, int, list["ImportNode"]]
+
+
+def _import_tree(log: str) -> list[ImportNode]:
+    """Parse the output of ``-X importtime`` into a tree of (module, cumulative time, imports).
+
+    Python logs each module after its own imports, which are indented one level further.
+    """
+    pending: dict[int, list[ImportNode]] = {}
+    for line in log.splitlines():
+        if not line.startswith("import time:") or line.endswith("imported package"):
+            continue
+        _, cumulative, module = line.removeprefix("import time:").split("|")
+        level = (len(module) - len(module.lstrip())) // 2
+        imports = pending.pop(level + 1, [])
+        pending.setdefault(level, []).append((module.strip(), int(cumulative), imports))
+    return pending.get(0, [])
+
+
+def _format_import_tree(nodes: list[ImportNode], level: int = 0) -> list[str]:
+    """Format the import tree, the slowest imports first at each level."""
+    lines = []
+    for module, cumulative, imports in sorted(nodes, key=lambda node: -node[1]):
+        lines.append(f"{cumulative:>10} us  {'  ' * level}{module}")
+        lines.extend(_format_import_tree(imports, level + 1))
+    return lines
+
+
+@task(
+    help={
+        "test": "Test to profile instead of the CLI, as a pytest node id or path",
+        "args": "Arguments of the CLI, or of pytest",
+        "sort": "Key to sort the statistics, like 'cumulative', 'tottime' or 'calls'",
+        "limit": "Number of functions in the report",
+    }
+)
+def profile(
+    c: Context, test: str = "", args: str = "", sort: str = "cumulative", limit: int = 30
+) -> None:
+    """Profile the CLI, or a test, with cProfile."""
+    REPORTS_DIR.mkdir(exist_ok=True)
+    _run(c, f"python -m cProfile -o {PROFILE_FILE} {_profile_target(test, args)}")
+    with PROFILE_REPORT.open("w") as report:
+        stats = pstats.Stats(str(PROFILE_FILE), stream=report)
+        stats.strip_dirs().sort_stats(sort).print_stats(limit)
+    sys.stdout.write(f"Profile statistics written to {PROFILE_REPORT}\n")
+
+
+@task(
+    help={
+        "module": "Module to import",
+        "limit": "Number of lines of the tree to show, the full tree is written to the report",
+    }
+)
+def importtime(c: Context, module: str = "{{ cookiecutter.project_slug }}", limit: int = 30) -> None:
+    """Rank the time to import a module, and each of its imports, as a tree."""
+    REPORTS_DIR.mkdir(exist_ok=True)
+    # Python logs the import times to its standard error, which the pseudo-terminal would merge
+    result = _run(c, f'python -X importtime -c "import {module}"', hide="err", pty=False)
+    log = result.stderr if result is not None else ""
+    IMPORTTIME_FILE.write_text(log)
+    nodes = _import_tree(log)
+    # Skip the modules imported by the startup of Python, which come before the package
+    package = module.partition(".")[0]
+    for index, (name, _, _) in enumerate(nodes):
+        if name.partition(".")[0] == package:
+            nodes = nodes[index:]
+            break
+    lines = _format_import_tree(nodes)
+    IMPORTTIME_REPORT.write_text("\n".join(lines) + "\n")
+    sys.stdout.write("\n".join(lines[:limit]) + "\n")
+    sys.stdout.write(f"Import time tree written to {IMPORTTIME_REPORT}\n")
+
+
+@task(
+    help={
+        "test": "Test to profile instead of the CLI, as a pytest node id or path",
+        "args": "Arguments of the CLI, or of pytest",
+        "limit": "Number of allocation sites in the report",
+    }
+)
+def memprofile(c: Context, test: str = "", args: str = "", limit: int = 20) -> None:
+    """Diff the memory allocated by the CLI, or a test, with tracemalloc snapshots."""
+    REPORTS_DIR.mkdir(exist_ok=True)
+    target = _profile_target(test, args).removeprefix("-m ")
+    _run(c, f"python {MEMPROFILE_RUNNER} {MEMPROFILE_START} {MEMPROFILE_END} {target}")
+    statistics = tracemalloc.Snapshot.load(str(MEMPROFILE_END)).compare_to(
+        tracemalloc.Snapshot.load(str(MEMPROFILE_START)), "lineno"
+    )
+    lines = [str(statistic) for statistic in statistics[:limit]]
+    MEMPROFILE_REPORT.write_text("\n".join(lines) + "\n")
+    sys.stdout.write("\n".join(lines) + "\n")
+    sys.stdout.write(f"Memory allocation differences written to {MEMPROFILE_REPORT}\n")
 {%- if cookiecutter.development_environment == "strict" %}
 
 
@@ -142,13 +426,40 @@ def lab(c: Context) -> None:
 
 
 # Documentation
-@task(help={"launch": "Launch documentation in the web browser"})
-def docs(c: Context, launch: bool = True) -> None:
-    """Generate documentation."""
-    # Remove old documentation files
-    clean_docs(c)
-    # Generate documentation
-    _run(c, "mkdocs build")
+def _docs_hash() -> str:
+    """Return the hash of the files the documentation is built from, the package included."""
+    sources = [ROOT_DIR.joinpath("mkdocs.yml"), ROOT_DIR.joinpath("docs_hooks.py")]
+    # The pages include the Markdown files of the root, and document the package
+    sources += [*ROOT_DIR.glob("*.md"), *DOCS_DIR.rglob("*"), *SOURCE_DIR.rglob("*.py")]
+    digest = hashlib.sha256()
+    for path in sorted(path for path in sources if path.is_file()):
+        digest.update(path.relative_to(ROOT_DIR).as_posix().encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+@task(
+    help={
+        "launch": "Launch documentation in the web browser",
+        "clean": "Remove the documentation, and build all of it again",
+    }
+)
+def docs(c: Context, launch: bool = True, clean: bool = False) -> None:
+    """Generate documentation, rebuilding only the pages whose sources changed."""
+    sources_hash = _docs_hash()
+    built_hash = DOCS_HASH_FILE.read_text() if DOCS_HASH_FILE.is_file() else None
+    if clean or not DOCS_INDEX.is_file():
+        # Remove old documentation files
+        clean_docs(c)
+        # Generate documentation
+        _run(c, "mkdocs build")
+        DOCS_HASH_FILE.write_text(sources_hash)
+    elif built_hash != sources_hash:
+        # The hooks of docs_hooks.py rebuild the API pages when the package changed
+        _run(c, "mkdocs build --dirty")
+        DOCS_HASH_FILE.write_text(sources_hash)
+    else:
+        sys.stdout.write(f"The documentation is up to date in {DOCS_BUILD_DIR}\n")
     if launch:
         webbrowser.open(DOCS_INDEX.as_uri())
 
@@ -161,8 +472,8 @@ def deploy_docs(c: Context) -> None:
 
 @task
 def servedocs(c: Context) -> None:
-    """Serve the docs with live reloading."""
-    _run(c, "mkdocs serve")
+    """Serve the docs with live reloading, rebuilding only the changed pages."""
+    _run(c, "mkdocs serve --dirty")
 
 
 # Clean
@@ -177,6 +488,12 @@ def clean_build(c: Context) -> None:
                 shutil.rmtree(filename, ignore_errors=True)
             else:
                 filename.unlink(missing_ok=True)
+    {%- if cookiecutter.compiled_extensions != "No" %}
+    # The compiled extensions would be imported instead of the modules, even once changed
+    for pattern in ["*.so", "*.pyd"{% if cookiecutter.compiled_extensions == "Cython" %}, "*.c"{% endif %}]:
+        for filename in SOURCE_DIR.glob(pattern):
+            filename.unlink(missing_ok=True)
+    {%- endif %}
 
 
 @task
@@ -197,6 +514,8 @@ def clean_python(c: Context) -> None:
 def clean_tests(c: Context) -> None:
     """Clean up files from testing."""
     _delete_file(COVERAGE_FILE)
+    for coverage_file in REPORTS_DIR.glob(".coverage*"):
+        _delete_file(coverage_file)
     shutil.rmtree(TOX_DIR, ignore_errors=True)
     shutil.rmtree(COVERAGE_DIR, ignore_errors=True)
 
@@ -224,6 +543,14 @@ def pre_release_check(c: Context) -> None:
 def dist(c: Context) -> None:
     """Build source and wheel packages."""
     _run(c, "poetry build")
+{%- if cookiecutter.compiled_extensions != "No" %}
+
+
+@task
+def build_extensions(c: Context) -> None:
+    """Compile the hot modules into C extensions, next to them."""
+    _run(c, "python build_extensions.py")
+{%- endif %}
 
 
 @task(dist)
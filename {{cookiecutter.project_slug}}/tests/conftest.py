@@ -0,0 +1,35 @@
+"""Configuration of the tests, reporting the time spent by every pytest-xdist worker.
+
+``invoke test --workers N`` runs the tests in N processes with pytest-xdist. The time every
+worker spent running tests is reported at the end of the run, to spot an unbalanced distribution,
+such as a module of slow tests keeping one worker busy after the others finished.
+"""
+
+from collections import Counter, defaultdict
+
+import pytest
+
+# Time spent running tests, and number of tests run, by every worker
+WORKER_TIMES: defaultdict[str, float] = defaultdict(float)
+WORKER_TESTS: Counter[str] = Counter()
+
+
+def pytest_runtest_logreport(report: pytest.TestReport) -> None:
+    """Add the duration of every phase of a test to the worker that ran it."""
+    # pytest-xdist sets the node of the worker on the reports it forwards to the controller
+    node = getattr(report, "node", None)
+    if node is None:
+        return
+    worker = str(node.gateway.id)
+    WORKER_TIMES[worker] += report.duration
+    if report.when == "call":
+        WORKER_TESTS[worker] += 1
+
+
+def pytest_terminal_summary(terminalreporter: pytest.TerminalReporter) -> None:
+    """Report the time spent by every worker, the busiest first."""
+    if not WORKER_TIMES:
+        return
+    terminalreporter.write_sep("=", "pytest-xdist worker times")
+    for worker, seconds in sorted(WORKER_TIMES.items(), key=lambda item: -item[1]):
+        terminalreporter.write_line(f"{worker}: {seconds:.2f}s for {WORKER_TESTS[worker]} tests")
@@ -0,0 +1,22 @@
+"""Helpers shared by the tests of the `{{ cookiecutter.project_slug }}` package."""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any
+
+import {{ cookiecutter.project_slug }}
+
+
+def run_python(*args: str, **kwargs: Any) -> subprocess.CompletedProcess[Any]:
+    """Run a new interpreter, which imports the package from where the tests import it.
+
+    The keyword arguments are passed on to `subprocess.run`, which captures the output as text
+    unless ``text=False`` is given.
+    """
+    package_dir = Path({{ cookiecutter.project_slug }}.__file__).parent
+    pythonpath = [str(package_dir.parent), os.environ.get("PYTHONPATH", "")]
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(pythonpath)}
+    options = {"capture_output": True, "text": True, **kwargs}
+    return subprocess.run([sys.executable, *args], check=True, env=env, **options)
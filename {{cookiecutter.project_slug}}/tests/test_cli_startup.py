@@ -0,0 +1,76 @@
+{%- set command_line = cookiecutter.command_line_interface|lower -%}
+"""Startup time of the `{{ cookiecutter.project_slug }}` console script."""
+
+import sys
+{%- if cookiecutter.use_pytest != "y" %}
+import unittest
+{%- endif %}
+
+import {{ cookiecutter.project_slug }}
+
+from tests.helpers import run_python
+
+# Modules that must only be imported when a command runs
+{%- if command_line == "typer" %}
+DEFERRED_MODULES = ["typer", "click", "rich"]
+{%- elif command_line == "click" %}
+DEFERRED_MODULES = ["click"]
+{%- else %}
+DEFERRED_MODULES = ["argparse"]
+{%- endif %}
+
+
+def _imports(*args: str) -> tuple[str, set[str]]:
+    """Run Python with ``-X importtime``, returning its output and the modules it imported."""
+    result = run_python("-X", "importtime", *args)
+    modules = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or line.endswith("imported package"):
+            continue
+        modules.add(line.rsplit("|", 1)[1].strip())
+    return result.stdout, modules
+
+
+def _cli_imports() -> set[str]:
+    """Return the top-level modules imported by the console script, besides the startup ones."""
+    _, startup = _imports("-c", "pass")
+    _, modules = _imports("-c", "import {{ cookiecutter.project_slug }}.cli")
+    return {module.split(".")[0] for module in modules - startup}
+{%- if cookiecutter.use_pytest == "y" %}
+
+
+def test_cli_import_defers_dependencies() -> None:
+    """Importing the console script must not import its heavy dependencies."""
+    assert not set(DEFERRED_MODULES) & _cli_imports()
+
+
+def test_cli_import_is_standard_library() -> None:
+    """Importing the console script must only import the standard library and the package."""
+    assert _cli_imports() <= {*sys.stdlib_module_names, "{{ cookiecutter.project_slug }}"}
+
+
+def test_cli_version_defers_dependencies() -> None:
+    """``--version`` must be answered without importing the heavy dependencies."""
+    output, modules = _imports("-m", "{{ cookiecutter.project_slug }}.cli", "--version")
+    assert output.strip() == {{ cookiecutter.project_slug }}.__version__
+    assert not set(DEFERRED_MODULES) & modules
+{%- else %}
+
+
+class TestCliStartup(unittest.TestCase):
+    """Startup time of the `{{ cookiecutter.project_slug }}` console script."""
+
+    def test_cli_import_defers_dependencies(self) -> None:
+        """Importing the console script must not import its heavy dependencies."""
+        assert not set(DEFERRED_MODULES) & _cli_imports()
+
+    def test_cli_import_is_standard_library(self) -> None:
+        """Importing the console script must only import the standard library and the package."""
+        assert _cli_imports() <= {*sys.stdlib_module_names, "{{ cookiecutter.project_slug }}"}
+
+    def test_cli_version_defers_dependencies(self) -> None:
+        """``--version`` must be answered without importing the heavy dependencies."""
+        output, modules = _imports("-m", "{{ cookiecutter.project_slug }}.cli", "--version")
+        assert output.strip() == {{ cookiecutter.project_slug }}.__version__
+        assert not set(DEFERRED_MODULES) & modules
+{%- endif %}
@@ -0,0 +1,177 @@
+"""Tests for the `{{ cookiecutter.project_slug }}.concurrency` module."""
+
+import _thread
+import asyncio
+import itertools
+import sys
+{%- if cookiecutter.use_pytest != "y" %}
+import tempfile
+{%- endif %}
+import threading
+import time
+{%- if cookiecutter.use_pytest != "y" %}
+import unittest
+{%- endif %}
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+{%- if cookiecutter.use_pytest == "y" %}
+
+import pytest
+{%- endif %}
+
+from {{ cookiecutter.project_slug }} import concurrency
+
+# Number of items, and time to process each of them in seconds
+ITEMS = 20
+DELAY = 0.05
+WORKERS = 4
+
+
+class _Running:
+    """Coroutine function counting its calls, and the most of them running at a time."""
+
+    def __init__(self) -> None:
+        self.started = 0
+        self.running = 0
+        self.peak = 0
+
+    async def __call__(self, item: int) -> int:
+        self.started += 1
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await asyncio.sleep(DELAY)
+        finally:
+            self.running -= 1
+        return item
+
+
+def _sleep(item: int) -> tuple[float, float]:
+    """Sleep, and return when the call started and ended, on a clock shared by the processes."""
+    start = time.monotonic()
+    time.sleep(DELAY)
+    return start, time.monotonic()
+
+
+def _mark_and_sleep(path: str) -> None:
+    """Create the file at ``path`` when the call starts, to count the calls across processes."""
+    Path(path).touch()
+    time.sleep(DELAY)
+
+
+def _peak(intervals: Iterable[tuple[float, float]]) -> int:
+    """Return the most intervals overlapping at a time."""
+    # An interval ending when another starts does not overlap it, so the ends are sorted first
+    changes = sorted(itertools.chain(*(((start, 1), (end, -1)) for start, end in intervals)))
+    return max(itertools.accumulate(change for _, change in changes))
+
+
+@contextmanager
+def _interrupted_after(seconds: float) -> Iterator[None]:
+    """Interrupt the main thread after a delay, as Ctrl+C does, unless the block ended before.
+
+    Only the main thread of this process is interrupted, not the worker processes, nor the other
+    processes of the console.
+    """
+    timer = threading.Timer(seconds, _thread.interrupt_main)
+    timer.start()
+    try:
+        yield
+    finally:
+        timer.cancel()
+{%- if cookiecutter.use_pytest == "y" %}
+
+
+def test_run_async_keeps_order() -> None:
+    """The results must be in the order of the items, whatever the number of workers."""
+    assert concurrency.run_async(_Running(), range(ITEMS), workers=3) == list(range(ITEMS))
+
+
+@pytest.mark.parametrize("workers", [1, WORKERS, ITEMS])
+def test_run_async_runs_workers_at_a_time(workers: int) -> None:
+    """As many calls as workers must run at a time, and no more."""
+    running = _Running()
+    concurrency.run_async(running, range(ITEMS), workers=workers)
+    assert running.peak == workers
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="SIGINT handlers of asyncio need Unix")
+def test_run_async_cancelled_on_sigint() -> None:
+    """SIGINT must cancel the pending calls, and raise KeyboardInterrupt."""
+    running = _Running()
+    with pytest.raises(KeyboardInterrupt), _interrupted_after(DELAY):
+        concurrency.run_async(running, range(ITEMS), workers=1)
+    assert running.started < ITEMS
+    assert running.running == 0
+
+
+@pytest.mark.parametrize("workers", [1, WORKERS])
+def test_run_processes_runs_workers_at_a_time(workers: int) -> None:
+    """The calls must run in up to as many processes at a time as workers."""
+    intervals = concurrency.run_processes(_sleep, range(ITEMS), workers=workers)
+    assert min(workers, 2) <= _peak(intervals) <= workers
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="Waiting on a lock cannot be interrupted")
+def test_run_processes_cancelled_on_sigint(tmp_path: Path) -> None:
+    """SIGINT must cancel the calls not started yet, and raise KeyboardInterrupt."""
+    paths = [str(tmp_path / str(item)) for item in range(ITEMS)]
+    with pytest.raises(KeyboardInterrupt), _interrupted_after(DELAY):
+        concurrency.run_processes(_mark_and_sleep, paths, workers=1)
+    assert len(list(tmp_path.iterdir())) < ITEMS
+{%- else %}
+
+
+class TestConcurrency(unittest.TestCase):
+    """Tests for the `{{ cookiecutter.project_slug }}.concurrency` module."""
+
+    def test_run_async_keeps_order(self) -> None:
+        """The results must be in the order of the items, whatever the number of workers."""
+        results = concurrency.run_async(_Running(), range(ITEMS), workers=3)
+        assert results == list(range(ITEMS))
+
+    def test_run_async_runs_workers_at_a_time(self) -> None:
+        """As many calls as workers must run at a time, and no more."""
+        for workers in [1, WORKERS, ITEMS]:
+            with self.subTest(workers=workers):
+                running = _Running()
+                concurrency.run_async(running, range(ITEMS), workers=workers)
+                assert running.peak == workers
+
+    @unittest.skipIf(sys.platform == "win32", "SIGINT handlers of asyncio need Unix")
+    def test_run_async_cancelled_on_sigint(self) -> None:
+        """SIGINT must cancel the pending calls, and raise KeyboardInterrupt."""
+        running = _Running()
+        try:
+            with _interrupted_after(DELAY):
+                concurrency.run_async(running, range(ITEMS), workers=1)
+        except KeyboardInterrupt:
+            pass
+        else:
+            self.fail("KeyboardInterrupt not raised")
+        assert running.started < ITEMS
+        assert running.running == 0
+
+    def test_run_processes_runs_workers_at_a_time(self) -> None:
+        """The calls must run in up to as many processes at a time as workers."""
+        for workers in [1, WORKERS]:
+            with self.subTest(workers=workers):
+                intervals = concurrency.run_processes(_sleep, range(ITEMS), workers=workers)
+                assert min(workers, 2) <= _peak(intervals) <= workers
+
+    @unittest.skipIf(sys.platform == "win32", "Waiting on a lock cannot be interrupted")
+    def test_run_processes_cancelled_on_sigint(self) -> None:
+        """SIGINT must cancel the calls not started yet, and raise KeyboardInterrupt."""
+        with tempfile.TemporaryDirectory() as directory:
+            paths = [str(Path(directory, str(item))) for item in range(ITEMS)]
+            try:
+                with _interrupted_after(DELAY):
+                    concurrency.run_processes(_mark_and_sleep, paths, workers=1)
+            except KeyboardInterrupt:
+                pass
+            else:
+                self.fail("KeyboardInterrupt not raised")
+            assert len(list(Path(directory).iterdir())) < ITEMS
+{%- endif %}
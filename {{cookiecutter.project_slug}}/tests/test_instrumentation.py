@@ -0,0 +1,139 @@
+{%- set command_line = cookiecutter.command_line_interface|lower -%}
+"""Tests for the `{{ cookiecutter.project_slug }}.instrumentation` module."""
+
+import json
+{%- if cookiecutter.use_pytest != "y" %}
+import tempfile
+import unittest
+{%- endif %}
+from pathlib import Path
+
+{%- if cookiecutter.use_pytest == "y" %}
+
+import pytest
+{%- endif %}
+
+from {{ cookiecutter.project_slug }} import instrumentation
+{%- if command_line != "no command-line interface" %}
+
+from tests.helpers import run_python
+{%- endif %}
+
+NUMBERS = [1, 2, 3]
+PROMETHEUS_SAMPLES = [
+    '{{ cookiecutter.project_slug }}_calls_total{function="block"} 1',
+    '{{ cookiecutter.project_slug }}_latency_seconds_bucket{function="block",le="+Inf"} 1',
+    '{{ cookiecutter.project_slug }}_latency_seconds_count{function="block"} 1',
+]
+
+
+@instrumentation.instrument
+def _square(x: int) -> int:
+    return x * x
+
+
+def _record_squares() -> None:
+    """Record the calls of ``_square``, and a block of code."""
+    with instrumentation.recording():
+        for number in NUMBERS:
+            _square(number)
+        with instrumentation.measure("block"):
+            sorted(NUMBERS)
+{%- if cookiecutter.use_pytest == "y" %}
+
+
+@pytest.fixture(autouse=True)
+def _reset() -> None:
+    """Start every test without statistics."""
+    instrumentation.reset()
+
+
+def test_nothing_recorded_while_disabled() -> None:
+    """The instrumented code must not record anything until enabled."""
+    _square(2)
+    with instrumentation.measure("block"):
+        sorted(NUMBERS)
+    assert not instrumentation.is_enabled()
+    assert instrumentation.snapshot() == {}
+
+
+def test_calls_and_latency_recorded() -> None:
+    """The calls of the functions and blocks of code must be counted, and their latency."""
+    _record_squares()
+    assert not instrumentation.is_enabled()
+    stats = instrumentation.snapshot()
+    assert stats[f"{__name__}._square"]["calls"] == len(NUMBERS)
+    assert sum(stats[f"{__name__}._square"]["buckets"]) == len(NUMBERS)
+    assert stats["block"]["calls"] == 1
+    assert stats["block"]["seconds"] > 0
+
+
+def test_export(tmp_path: Path) -> None:
+    """The statistics must be exported as JSON, and in the Prometheus text format."""
+    _record_squares()
+    instrumentation.write(tmp_path / "stats.json")
+    stats = json.loads((tmp_path / "stats.json").read_text())["stats"]
+    assert stats == instrumentation.snapshot()
+    instrumentation.write(tmp_path / "stats.prom")
+    metrics = (tmp_path / "stats.prom").read_text().splitlines()
+    assert set(PROMETHEUS_SAMPLES) <= set(metrics)
+{%- if command_line != "no command-line interface" %}
+
+
+def test_cli_profile_stats(tmp_path: Path) -> None:
+    """``--profile-stats`` must write the statistics of the command."""
+    path = tmp_path / "stats.json"
+    run_python("-m", "{{ cookiecutter.project_slug }}.cli", "--profile-stats", str(path))
+    stats = json.loads(path.read_text())["stats"]
+    assert stats["{{ cookiecutter.project_slug }}.cli.main"]["calls"] == 1
+{%- endif %}
+{%- else %}
+
+
+class TestInstrumentation(unittest.TestCase):
+    """Tests for the `{{ cookiecutter.project_slug }}.instrumentation` module."""
+
+    def setUp(self) -> None:
+        """Start every test without statistics."""
+        instrumentation.reset()
+
+    def test_nothing_recorded_while_disabled(self) -> None:
+        """The instrumented code must not record anything until enabled."""
+        _square(2)
+        with instrumentation.measure("block"):
+            sorted(NUMBERS)
+        assert not instrumentation.is_enabled()
+        assert instrumentation.snapshot() == {}
+
+    def test_calls_and_latency_recorded(self) -> None:
+        """The calls of the functions and blocks of code must be counted, and their latency."""
+        _record_squares()
+        assert not instrumentation.is_enabled()
+        stats = instrumentation.snapshot()
+        assert stats[f"{__name__}._square"]["calls"] == len(NUMBERS)
+        assert sum(stats[f"{__name__}._square"]["buckets"]) == len(NUMBERS)
+        assert stats["block"]["calls"] == 1
+        assert stats["block"]["seconds"] > 0
+
+    def test_export(self) -> None:
+        """The statistics must be exported as JSON, and in the Prometheus text format."""
+        _record_squares()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            tmp_path = Path(tmp_dir)
+            instrumentation.write(tmp_path / "stats.json")
+            stats = json.loads((tmp_path / "stats.json").read_text())["stats"]
+            assert stats == instrumentation.snapshot()
+            instrumentation.write(tmp_path / "stats.prom")
+            metrics = (tmp_path / "stats.prom").read_text().splitlines()
+        assert set(PROMETHEUS_SAMPLES) <= set(metrics)
+{%- if command_line != "no command-line interface" %}
+
+    def test_cli_profile_stats(self) -> None:
+        """``--profile-stats`` must write the statistics of the command."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = Path(tmp_dir) / "stats.json"
+            run_python("-m", "{{ cookiecutter.project_slug }}.cli", "--profile-stats", str(path))
+            stats = json.loads(path.read_text())["stats"]
+        assert stats["{{ cookiecutter.project_slug }}.cli.main"]["calls"] == 1
+{%- endif %}
+{%- endif %}
@@ -0,0 +1,53 @@
+"""Lazy loading of the submodules of the `{{ cookiecutter.project_slug }}` package."""
+
+{% if cookiecutter.use_pytest != "y" -%}
+import unittest
+
+{% endif -%}
+import {{ cookiecutter.project_slug }}
+
+from tests.helpers import run_python
+
+# Print the submodules of the package imported by `import {{ cookiecutter.project_slug }}`
+EAGER_IMPORTS = """
+import sys
+import {{ cookiecutter.project_slug }}
+print(*sorted(m for m in sys.modules if m.startswith("{{ cookiecutter.project_slug }}.")))
+"""
+
+
+def _eager_submodules() -> list[str]:
+    """Return the submodules imported together with the package, in a new interpreter."""
+    output: str = run_python("-c", EAGER_IMPORTS).stdout
+    return output.split()
+{%- if cookiecutter.use_pytest == "y" %}
+
+
+def test_import_is_lazy() -> None:
+    """Importing the package must not import any of its submodules."""
+    assert _eager_submodules() == []
+
+
+def test_submodules_are_loaded_on_access() -> None:
+    """Every name of ``__all__`` must be importable, and listed by ``dir()``."""
+    for name in {{ cookiecutter.project_slug }}.__all__:
+        module = getattr({{ cookiecutter.project_slug }}, name)
+        assert module.__name__ == f"{{ cookiecutter.project_slug }}.{name}"
+        assert name in dir({{ cookiecutter.project_slug }})
+{%- else %}
+
+
+class TestLazyImports(unittest.TestCase):
+    """Lazy loading of the submodules of the `{{ cookiecutter.project_slug }}` package."""
+
+    def test_import_is_lazy(self) -> None:
+        """Importing the package must not import any of its submodules."""
+        assert _eager_submodules() == []
+
+    def test_submodules_are_loaded_on_access(self) -> None:
+        """Every name of ``__all__`` must be importable, and listed by ``dir()``."""
+        for name in {{ cookiecutter.project_slug }}.__all__:
+            module = getattr({{ cookiecutter.project_slug }}, name)
+            assert module.__name__ == f"{{ cookiecutter.project_slug }}.{name}"
+            assert name in dir({{ cookiecutter.project_slug }})
+{%- endif %}
@@ -0,0 +1,76 @@
+"""Tests for the `{{ cookiecutter.project_slug }}.models` module."""
+
+import json
+{%- if cookiecutter.use_pytest != "y" %}
+import unittest
+{%- endif %}
+from typing import Any
+
+{% if cookiecutter.use_pytest == "y" -%}
+import pytest
+{% endif -%}
+from pydantic import ValidationError
+
+from {{ cookiecutter.project_slug }} import models
+
+ITEMS: list[dict[str, Any]] = [
+    {"id": 1, "name": "first", "score": 0.5},
+    {"id": "2", "name": "second", "score": "1.5", "tags": ["a", "b"]},
+]
+{%- if cookiecutter.use_pytest == "y" %}
+
+
+def test_validate_records_matches_models() -> None:
+    """Validating in bulk must give the same records as validating one by one."""
+    expected = [models.Record.model_validate(item) for item in ITEMS]
+    assert models.validate_records(ITEMS) == expected
+    assert models.validate_records_json(json.dumps(ITEMS)) == expected
+
+
+def test_validate_records_locates_errors() -> None:
+    """The errors must be located by the index of the invalid record."""
+    with pytest.raises(ValidationError) as error:
+        models.validate_records([ITEMS[0], {"id": "x", "name": "third", "score": 0}])
+    assert error.value.errors()[0]["loc"] == (1, "id")
+
+
+def test_adapter_cached() -> None:
+    """The adapters must be built once per type."""
+    assert models.adapter(list[models.Record]) is models.adapter(list[models.Record])
+
+
+def test_construct_records() -> None:
+    """Trusted records must be built as given, without conversion."""
+    records = models.construct_records(ITEMS[:1])
+    assert records == [models.Record(id=1, name="first", score=0.5)]
+{%- else %}
+
+
+class TestModels(unittest.TestCase):
+    """Tests for the `{{ cookiecutter.project_slug }}.models` module."""
+
+    def test_validate_records_matches_models(self) -> None:
+        """Validating in bulk must give the same records as validating one by one."""
+        expected = [models.Record.model_validate(item) for item in ITEMS]
+        assert models.validate_records(ITEMS) == expected
+        assert models.validate_records_json(json.dumps(ITEMS)) == expected
+
+    def test_validate_records_locates_errors(self) -> None:
+        """The errors must be located by the index of the invalid record."""
+        try:
+            models.validate_records([ITEMS[0], {"id": "x", "name": "third", "score": 0}])
+        except ValidationError as error:
+            errors = error.errors()
+        else:
+            self.fail("ValidationError not raised")
+        assert errors[0]["loc"] == (1, "id")
+
+    def test_adapter_cached(self) -> None:
+        """The adapters must be built once per type."""
+        assert models.adapter(list[models.Record]) is models.adapter(list[models.Record])
+
+    def test_construct_records(self) -> None:
+        """Trusted records must be built as given, without conversion."""
+        records = models.construct_records(ITEMS[:1])
+        assert records == [models.Record(id=1, name="first", score=0.5)]
+{%- endif %}
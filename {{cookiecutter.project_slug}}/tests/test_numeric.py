@@ -0,0 +1,91 @@
+"""Property tests for the `{{ cookiecutter.project_slug }}.numeric` module."""
+{%- if cookiecutter.use_pytest != "y" %}
+
+import unittest
+{%- endif %}
+
+import numpy as np
+{%- if cookiecutter.use_pytest == "y" %}
+import pytest
+{%- endif %}
+from hypothesis import given
+from hypothesis import strategies as st
+
+from {{ cookiecutter.project_slug }} import numeric
+
+# Coordinates bounded so that the squared distances stay far from overflowing
+COORDINATES = st.floats(min_value=-1e6, max_value=1e6, allow_nan=False)
+
+
+@st.composite
+def _points(draw: st.DrawFn) -> list[list[float]]:
+    """Draw from 1 to 20 points, of the same dimension from 1 to 5."""
+    dimension = draw(st.integers(min_value=1, max_value=5))
+    point = st.lists(COORDINATES, min_size=dimension, max_size=dimension)
+    return draw(st.lists(point, min_size=1, max_size=20))
+{%- if cookiecutter.use_pytest == "y" %}
+
+
+@given(_points())
+def test_pairwise_distances_match_reference(points: list[list[float]]) -> None:
+    """The vectorized distances must match the pure Python ones."""
+    expected = numeric.pairwise_distances_reference(points)
+    np.testing.assert_allclose(numeric.pairwise_distances(points), expected, rtol=1e-9, atol=1e-6)
+
+
+@given(_points(), st.integers(min_value=1, max_value=25))
+def test_batches_match_whole(points: list[list[float]], batch_size: int) -> None:
+    """The distances computed by batches must match the ones computed at once."""
+    whole = numeric.pairwise_distances(points)
+    np.testing.assert_allclose(numeric.pairwise_distances(points, batch_size), whole, rtol=1e-12)
+
+
+@given(_points())
+def test_pairwise_distances_are_symmetric(points: list[list[float]]) -> None:
+    """The distances must be symmetric, and zero from every point to itself."""
+    result = numeric.pairwise_distances(points)
+    np.testing.assert_array_equal(result, result.T)
+    np.testing.assert_array_equal(np.diag(result), 0)
+
+
+def test_invalid_batch_size() -> None:
+    """A batch size lower than 1 must be rejected."""
+    with pytest.raises(ValueError, match="batch size"):
+        numeric.pairwise_distances([[0.0]], batch_size=0)
+{%- else %}
+
+
+class TestNumeric(unittest.TestCase):
+    """Property tests for the `{{ cookiecutter.project_slug }}.numeric` module."""
+
+    @given(_points())
+    def test_pairwise_distances_match_reference(self, points: list[list[float]]) -> None:
+        """The vectorized distances must match the pure Python ones."""
+        expected = numeric.pairwise_distances_reference(points)
+        result = numeric.pairwise_distances(points)
+        np.testing.assert_allclose(result, expected, rtol=1e-9, atol=1e-6)
+
+    @given(_points(), st.integers(min_value=1, max_value=25))
+    def test_batches_match_whole(self, points: list[list[float]], batch_size: int) -> None:
+        """The distances computed by batches must match the ones computed at once."""
+        whole = numeric.pairwise_distances(points)
+        batches = numeric.pairwise_distances(points, batch_size)
+        np.testing.assert_allclose(batches, whole, rtol=1e-12)
+
+    @given(_points())
+    def test_pairwise_distances_are_symmetric(self, points: list[list[float]]) -> None:
+        """The distances must be symmetric, and zero from every point to itself."""
+        result = numeric.pairwise_distances(points)
+        np.testing.assert_array_equal(result, result.T)
+        np.testing.assert_array_equal(np.diag(result), 0)
+
+    def test_invalid_batch_size(self) -> None:
+        """A batch size lower than 1 must be rejected."""
+        try:
+            numeric.pairwise_distances([[0.0]], batch_size=0)
+        except ValueError as error:
+            message = str(error)
+        else:
+            self.fail("ValueError not raised")
+        assert "batch size" in message
+{%- endif %}
@@ -0,0 +1,46 @@
+"""Tests for the `{{ cookiecutter.project_slug }}.speedups` module."""
+
+import importlib.util
+{%- if cookiecutter.use_pytest != "y" %}
+import unittest
+{%- endif %}
+from pathlib import Path
+from types import ModuleType
+
+from {{ cookiecutter.project_slug }} import speedups
+
+# Number of prime numbers lower than some limits
+PRIMES = {0: 0, 2: 0, 3: 1, 10: 4, 100: 25, 1000: 168}
+
+
+def _interpreted() -> ModuleType:
+    """Load the Python source of the module, even when its compiled extension is imported."""
+    path = Path(speedups.__file__).with_name("speedups.py")
+    spec = importlib.util.spec_from_file_location(f"{speedups.__name__}_interpreted", path)
+    assert spec is not None
+    assert spec.loader is not None
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+{%- if cookiecutter.use_pytest == "y" %}
+
+
+def test_count_primes() -> None:
+    """The module must give the same results, compiled or not."""
+    interpreted = _interpreted()
+    for limit, primes in PRIMES.items():
+        assert speedups.count_primes(limit) == primes
+        assert interpreted.count_primes(limit) == primes
+{%- else %}
+
+
+class TestSpeedups(unittest.TestCase):
+    """Tests for the `{{ cookiecutter.project_slug }}.speedups` module."""
+
+    def test_count_primes(self) -> None:
+        """The module must give the same results, compiled or not."""
+        interpreted = _interpreted()
+        for limit, primes in PRIMES.items():
+            assert speedups.count_primes(limit) == primes
+            assert interpreted.count_primes(limit) == primes
+{%- endif %}
@@ -0,0 +1,145 @@
+{%- set command_line = cookiecutter.command_line_interface|lower -%}
+"""Tests for the `{{ cookiecutter.project_slug }}.streaming` module."""
+
+import io
+import os
+{%- if cookiecutter.use_pytest != "y" %}
+import tempfile
+{%- endif %}
+import tracemalloc
+{%- if cookiecutter.use_pytest != "y" %}
+import unittest
+{%- endif %}
+from pathlib import Path
+
+from {{ cookiecutter.project_slug }} import streaming
+{%- if command_line != "no command-line interface" %}
+
+from tests.helpers import run_python
+{%- endif %}
+
+INPUT = b"first\n\nsecond\nthird"
+OUTPUT = b"first\nsecond\nthird\n"
+# Line of the inputs of the memory tests, and their number of lines, 1 MB and 10 MB
+LINE = b"0123456789" * 10 + b"\n"
+SMALL = 10_000
+LARGE = 100_000
+# Maximum growth of the memory used, from the small to the large input
+MEMORY_GROWTH = 1.5
+
+
+class _SlowInput(io.RawIOBase):
+    """Input returning one chunk per read, as a slow producer does, noting the output meanwhile."""
+
+    def __init__(self, chunks: list[bytes], output: io.BytesIO) -> None:
+        self.chunks = iter(chunks)
+        self.output = output
+        self.outputs: list[bytes] = []
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: memoryview) -> int:  # type: ignore[override]
+        self.outputs.append(self.output.getvalue())
+        chunk = next(self.chunks, b"")
+        buffer[: len(chunk)] = chunk
+        return len(chunk)
+
+
+def _peak_memory(path: Path, lines: int) -> int:
+    """Stream a file of ``lines`` lines, and return the peak of the memory allocated meanwhile."""
+    with path.open("wb") as file:
+        for _ in range(lines):
+            file.write(LINE)
+    tracemalloc.start()
+    try:
+        with path.open("rb") as source, Path(os.devnull).open("wb") as sink:
+            streaming.run(source, sink)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+{%- if cookiecutter.use_pytest == "y" %}
+
+
+def test_records_split_across_chunks() -> None:
+    """The records must be found whatever the chunks they are read by."""
+    records = streaming.read_records(io.BytesIO(INPUT), chunk_size=3)
+    assert list(records) == INPUT.split(b"\n")
+    records = streaming.read_records(io.BytesIO(INPUT.replace(b"\n", b"\0")), separator=b"\0")
+    assert list(records) == INPUT.split(b"\n")
+    windows = INPUT.replace(b"\n", b"\r\n")
+    records = streaming.read_records(io.BytesIO(windows), separator=b"\r\n", chunk_size=3)
+    assert list(records) == INPUT.split(b"\n")
+
+
+def test_run_writes_while_waiting() -> None:
+    """The records read must be written before waiting for the next ones."""
+    output = io.BytesIO()
+    source = _SlowInput([b"first\n", b"\nsec", b"ond\n"], output)
+    streaming.run(io.BufferedReader(source), output)
+    assert source.outputs == [b"", b"first\n", b"first\n", b"first\nsecond\n"]
+
+
+def test_run() -> None:
+    """The sample stage must drop the blank lines."""
+    output = io.BytesIO()
+    streaming.run(io.BytesIO(INPUT), output)
+    assert output.getvalue() == OUTPUT
+
+
+def test_constant_memory(tmp_path: Path) -> None:
+    """The memory used must not grow with the size of the input."""
+    small = _peak_memory(tmp_path / "small.txt", SMALL)
+    large = _peak_memory(tmp_path / "large.txt", LARGE)
+    assert large < MEMORY_GROWTH * small
+{%- if command_line != "no command-line interface" %}
+
+
+def test_cli_stream() -> None:
+    """``--stream`` must process the standard input to the standard output."""
+    result = run_python("-m", "{{ cookiecutter.project_slug }}.cli", "--stream", input=INPUT, text=False)
+    assert result.stdout == OUTPUT
+{%- endif %}
+{%- else %}
+
+
+class TestStreaming(unittest.TestCase):
+    """Tests for the `{{ cookiecutter.project_slug }}.streaming` module."""
+
+    def test_records_split_across_chunks(self) -> None:
+        """The records must be found whatever the chunks they are read by."""
+        records = streaming.read_records(io.BytesIO(INPUT), chunk_size=3)
+        assert list(records) == INPUT.split(b"\n")
+        records = streaming.read_records(io.BytesIO(INPUT.replace(b"\n", b"\0")), separator=b"\0")
+        assert list(records) == INPUT.split(b"\n")
+        windows = INPUT.replace(b"\n", b"\r\n")
+        records = streaming.read_records(io.BytesIO(windows), separator=b"\r\n", chunk_size=3)
+        assert list(records) == INPUT.split(b"\n")
+
+    def test_run_writes_while_waiting(self) -> None:
+        """The records read must be written before waiting for the next ones."""
+        output = io.BytesIO()
+        source = _SlowInput([b"first\n", b"\nsec", b"ond\n"], output)
+        streaming.run(io.BufferedReader(source), output)
+        assert source.outputs == [b"", b"first\n", b"first\n", b"first\nsecond\n"]
+
+    def test_run(self) -> None:
+        """The sample stage must drop the blank lines."""
+        output = io.BytesIO()
+        streaming.run(io.BytesIO(INPUT), output)
+        assert output.getvalue() == OUTPUT
+
+    def test_constant_memory(self) -> None:
+        """The memory used must not grow with the size of the input."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            small = _peak_memory(Path(tmp_dir) / "small.txt", SMALL)
+            large = _peak_memory(Path(tmp_dir) / "large.txt", LARGE)
+        assert large < MEMORY_GROWTH * small
+{%- if command_line != "no command-line interface" %}
+
+    def test_cli_stream(self) -> None:
+        """``--stream`` must process the standard input to the standard output."""
+        result = run_python("-m", "{{ cookiecutter.project_slug }}.cli", "--stream", input=INPUT, text=False)
+        assert result.stdout == OUTPUT
+{%- endif %}
+{%- endif %}
@@ -13,6 +13,7 @@ import unittest
 {% endif -%}
 
 {% if cookiecutter.command_line_interface|lower == "click" -%}
+import re
 from click.testing import CliRunner
 {% elif cookiecutter.command_line_interface|lower == "typer" -%}
 import re
@@ -48,7 +49,7 @@ def test_command_line_interface() -> None:
     assert "{{ cookiecutter.project_slug }}.cli.main" in result.output
     help_result = runner.invoke(cli.main, ["--help"])
     assert help_result.exit_code == 0
-    assert "--help  Show this message and exit." in help_result.output
+    assert re.search(r"--help\s+Show this message and exit.", help_result.output) is not None
 {% elif cookiecutter.command_line_interface|lower == "typer" -%}
 
 def test_command_line_interface() -> None:
@@ -110,7 +111,7 @@ class Test{{ cookiecutter.project_slug|title }}(unittest.TestCase):
         assert "{{ cookiecutter.project_slug }}.cli.main" in result.output
         help_result = runner.invoke(cli.main, ["--help"])
         assert help_result.exit_code == 0
-        assert "--help  Show this message and exit." in help_result.output
+        assert re.search(r"--help\s+Show this message and exit.", help_result.output) is not None
 {% elif cookiecutter.command_line_interface|lower == "typer" -%}
 
     def test_command_line_interface(self) -> None:
@@ -0,0 +1,114 @@
+"""Install the dependencies of a tox environment with Poetry, unless they did not change.
+
+tox runs this script before the commands of every environment, see ``commands_pre`` in tox.ini.
+The environment keeps the hash of the files that decide what Poetry installs, the lock file first,
+and ``poetry install`` only runs again when the hash changed. The environments share the cache of
+Poetry, so a wheel is downloaded, or built, once for all of them. They install one at a time, under
+a lock of the operating system on a file next to them, so that with ``tox run-parallel`` the first
+one writes the missing lock file of Poetry, and fills its cache, before the others read them. The
+lock is released when its process ends, even when tox kills it. Run ``tox --recreate`` to
+reinstall an environment from scratch.
+
+Usage: ``python tox_install.py ENV_DIR [POETRY_INSTALL_ARGS...]``
+"""
+
+import hashlib
+import os
+import shutil
+import subprocess
+import sys
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+if sys.platform == "win32":
+    import msvcrt
+else:
+    import fcntl
+
+ROOT_DIR = Path(__file__).parent
+# Files that decide what ``poetry install`` installs, the missing ones are ignored
+INSTALL_FILES = [
+    ROOT_DIR.joinpath("pyproject.toml"),
+    ROOT_DIR.joinpath("poetry.lock"),
+    {%- if cookiecutter.compiled_extensions != "No" %}
+    # The extensions are compiled on install, from the modules listed by the script
+    ROOT_DIR.joinpath("build_extensions.py"),
+    ROOT_DIR.joinpath("src/{{ cookiecutter.project_slug }}/speedups.py"),
+    {%- endif %}
+]
+HASH_FILE_NAME = ".poetry-install.sha256"
+# Locked, in the directory of the environments, by the one that installs
+LOCK_FILE_NAME = ".poetry-install.lock"
+
+
+def install_hash(args: list[str]) -> str:
+    """Return the hash of the install files, and of the arguments of ``poetry install``."""
+    digest = hashlib.sha256("\0".join(args).encode())
+    for path in INSTALL_FILES:
+        if path.is_file():
+            digest.update(path.name.encode())
+            digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+@contextmanager
+def install_lock(lock_file: Path) -> Iterator[None]:
+    """Lock the lock file, waiting while another environment holds the lock.
+
+    The file is kept, only the lock is released, by the operating system if the process dies.
+    """
+    fd = os.open(lock_file, os.O_RDWR | os.O_CREAT)
+    try:
+        if sys.platform == "win32":
+            while True:
+                # Locks the first byte, raising after trying for 10 seconds
+                try:
+                    msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+        else:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if sys.platform == "win32":
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+    finally:
+        os.close(fd)
+
+
+def install(env_dir: Path, args: list[str]) -> bool:
+    """Run ``poetry install`` in a tox environment, unless its last install had the same hash.
+
+    Parameters
+    ----------
+    env_dir : Path
+        Directory of the tox environment, where the hash of its last install is kept.
+    args : list[str]
+        Arguments of ``poetry install``.
+
+    Returns
+    -------
+    bool
+        Whether Poetry ran.
+    """
+    hash_file = env_dir / HASH_FILE_NAME
+    if hash_file.is_file() and hash_file.read_text(encoding="utf-8") == install_hash(args):
+        return False
+    hash_file.unlink(missing_ok=True)
+    poetry = shutil.which("poetry") or "poetry"
+    with install_lock(env_dir.parent / LOCK_FILE_NAME):
+        subprocess.run([poetry, "install", *args], check=True){% if cookiecutter.development_environment == "strict" %}  # noqa: S603{% endif %}
+    # Poetry writes its lock file when it is missing, so hash the files after installing
+    hash_file.write_text(install_hash(args), encoding="utf-8")
+    return True
+
+
+if __name__ == "__main__":
+    env_dir, *poetry_args = sys.argv[1:]
+    if not install(Path(env_dir), poetry_args):
+        sys.stdout.write(f"Dependencies unchanged since the last install of {env_dir}\n")